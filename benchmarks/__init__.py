@@ -0,0 +1 @@
+"""Micro-benchmarks. Run from project root: uv run python -m benchmarks.<name>"""
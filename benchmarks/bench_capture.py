@@ -0,0 +1,92 @@
+"""
+Capture benchmark.
+Compares the compiled TimeCapture engine with the previous per-pattern scan.
+
+Usage:
+    uv run python -m benchmarks.bench_capture
+"""
+import re
+import timeit
+
+from src.capture import TimeCapture, might_contain_time
+from src.config import get_capture_patterns
+
+# Typical group chat traffic: most messages have no time at all
+CORPUS = [
+    "ok",
+    "Доброе утро всем!",
+    "did anyone see the PR from yesterday?",
+    "lol",
+    "I'll be a bit late today, traffic is terrible",
+    "can we move the standup?",
+    "let's sync at 3pm",
+    "Meeting at 15:00 works for me",
+    "+1",
+    "thanks!",
+    "release is blocked on QA again",
+    "10:30 am or 11:30 am?",
+    "цена 500 рублей",
+    "who's on call this weekend?",
+    "с 10:00 до 18:00 я на связи",
+    "sounds good 👍",
+    "Call at 14:00 MSK, then 5:00 pm for the demo",
+    "I pushed the fix, please review when you have a moment",
+    "brb",
+    "Score 12:45, what a game",
+]
+
+REPEAT = 5
+NUMBER = 2000
+
+
+def legacy_extract_times(text: str, patterns: list[str]) -> list[str]:
+    """Previous implementation: one finditer per raw pattern, then dedupe."""
+    matches = []
+    for pattern in patterns:
+        for m in re.finditer(pattern, text, re.IGNORECASE):
+            matches.append(m.group(0))
+
+    seen = set()
+    unique = []
+    for m in matches:
+        if m not in seen:
+            seen.add(m)
+            unique.append(m)
+    return unique
+
+
+def _best(func) -> float:
+    """Best per-message time in microseconds."""
+    total = min(timeit.repeat(func, repeat=REPEAT, number=NUMBER))
+    return total / (NUMBER * len(CORPUS)) * 1e6
+
+
+def main():
+    patterns = get_capture_patterns()
+    engine = TimeCapture(patterns)
+
+    def run_legacy():
+        for text in CORPUS:
+            legacy_extract_times(text, patterns)
+
+    def run_compiled():
+        for text in CORPUS:
+            engine.extract(text)
+
+    def run_prefiltered():
+        for text in CORPUS:
+            if might_contain_time(text):
+                engine.extract(text)
+
+    legacy = _best(run_legacy)
+    compiled = _best(run_compiled)
+    prefiltered = _best(run_prefiltered)
+
+    print(f"messages: {len(CORPUS)} x {NUMBER}")
+    print(f"legacy   : {legacy:.2f} us/msg")
+    print(f"compiled : {compiled:.2f} us/msg  ({legacy / compiled:.1f}x)")
+    print(f"prefilter: {prefiltered:.2f} us/msg  ({legacy / prefiltered:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Geo benchmark.
+Compares city → timezone resolution: offline gazetteer (exact and fuzzy) vs
+Nominatim + TimezoneFinder.
+
+Nominatim is only queried with --network (public API, max 1 request/s).
+
+Usage:
+    uv run python -m src.gazetteer            # build the index first
+    uv run python -m benchmarks.bench_geo [--network]
+"""
+import asyncio
+import sys
+import time
+import timeit
+
+from src import gazetteer, geo
+
+REPEAT = 5
+CITIES = [
+    "Berlin", "New York", "Tokyo", "London", "Paris", "Moscow", "Sydney",
+    "São Paulo", "Mumbai", "Los Angeles", "Sarajevo", "Kyiv", "Toronto", "Dubai",
+]
+TYPOS = ["Berln", "Sao Paolo", "Tokio", "Londn", "Sarajvo", "Torronto"]
+
+
+def main():
+    started = time.perf_counter()
+    index = gazetteer.load_index()
+    load = time.perf_counter() - started
+    if index is None:
+        print(f"No index at {gazetteer.GAZETTEER_PATH}; run: uv run python -m src.gazetteer")
+        return
+
+    def run_gazetteer():
+        for city in CITIES:
+            index.lookup(city)
+
+    hits = sum(index.lookup(city) is not None for city in CITIES)
+    gz = min(timeit.repeat(run_gazetteer, repeat=REPEAT, number=100)) / (100 * len(CITIES)) * 1e6
+
+    print(f"load      : {load:.2f} s ({len(index)} places, {len(index.index)} names)")
+    print(f"gazetteer : {gz:.2f} µs/lookup ({hits}/{len(CITIES)} hits)")
+
+    # Typo-tolerant lookups (first call builds the trigram index)
+    started = time.perf_counter()
+    index.fuzzy("x")
+    build = time.perf_counter() - started
+
+    def run_fuzzy():
+        for city in TYPOS:
+            index.fuzzy(city, limit=1)
+
+    fz = min(timeit.repeat(run_fuzzy, repeat=REPEAT, number=10)) / (10 * len(TYPOS)) * 1e3
+    matched = [index.fuzzy(city, limit=1) for city in TYPOS]
+    print(f"fuzzy     : {fz:.2f} ms/lookup (index built in {build:.2f} s)")
+    for city, found in zip(TYPOS, matched):
+        if found:
+            print(f"  {city!r:14} -> {found[0][0].name} ({found[0][1]:.2f})")
+
+    # TimezoneFinder alone (the offline half of the Nominatim path)
+    coords = [(52.52, 13.40), (40.71, -74.01), (35.68, 139.69), (-33.87, 151.21)]
+
+    def run_tf():
+        for lat, lng in coords:
+            geo._get_tf().timezone_at(lat=lat, lng=lng)
+
+    tf = min(timeit.repeat(run_tf, repeat=REPEAT, number=100)) / (100 * len(coords)) * 1e6
+    print(f"tzfinder  : {tf:.2f} µs/lookup (after geocoding)")
+
+    if "--network" in sys.argv:
+        asyncio.run(bench_nominatim())
+
+
+async def bench_nominatim():
+    """Nominatim round trip over the bots' pooled session."""
+    geolocator = geo._get_client().geolocator
+    timings = []
+    try:
+        for city in CITIES:
+            started = time.perf_counter()
+            await geolocator.geocode(city, language="en", addressdetails=True)
+            timings.append(time.perf_counter() - started)
+            await asyncio.sleep(1)  # Nominatim usage policy
+    finally:
+        await geo.close()
+    timings.sort()
+    print(f"nominatim : {timings[len(timings) // 2] * 1e3:.0f} ms/lookup (median, network)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Storage benchmark.
+Per-operation latency of the storage modes under concurrent load: the
+middleware path of a group message (get_user + add_chat_member) and the
+reply path of a time message (get_user + get_chat_members).
+
+Runs every storage mode ("single": SQLiteStorage, one connection;
+"pooled": PooledSQLiteStorage, WAL readers + one batching writer) with
+every tuning preset (storage.tuning), with and without the read-through
+cache (storage.cache).
+
+Usage:
+    uv run python -m benchmarks.bench_storage
+"""
+import asyncio
+import itertools
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from src.storage.base import Storage
+from src.storage.cached import CachedStorage
+from src.storage.pooled import PooledSQLiteStorage
+from src.storage.sqlite import TUNING_PRESETS, SQLiteStorage, tuning_pragmas
+
+USERS = 2000
+CHATS = 50
+MEMBERS_PER_CHAT = 40
+MESSAGES = 2000
+CONCURRENCY = [1, 16, 64]
+MODES = {"single": SQLiteStorage, "pooled": PooledSQLiteStorage}
+
+
+async def populate(storage: Storage, rng: random.Random):
+    for user_id in range(USERS):
+        await storage.set_user(user_id, "telegram", "Berlin", "Europe/Berlin", "🇩🇪", f"user{user_id}")
+    for chat_id in range(CHATS):
+        for user_id in rng.sample(range(USERS), MEMBERS_PER_CHAT):
+            await storage.add_chat_member(chat_id, user_id, "telegram")
+
+
+async def run(storage: Storage, concurrency: int, rng: random.Random) -> tuple[list[float], float]:
+    """Process MESSAGES messages with `concurrency` workers; returns op latencies and wall time."""
+    messages = [(rng.randrange(CHATS), rng.randrange(USERS), rng.random() < 0.2) for _ in range(MESSAGES)]
+    queue = iter(messages)
+    latencies = []
+
+    async def timed(op):
+        started = time.perf_counter()
+        await op
+        latencies.append(time.perf_counter() - started)
+
+    async def worker():
+        for chat_id, user_id, has_time in queue:
+            await timed(storage.get_user(user_id, "telegram"))
+            await timed(storage.add_chat_member(chat_id, user_id, "telegram"))
+            if has_time:
+                await timed(storage.get_chat_members(chat_id, "telegram"))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, time.perf_counter() - started
+
+
+async def main():
+    for preset in TUNING_PRESETS:
+        for (mode, storage_class), cached in itertools.product(MODES.items(), (False, True)):
+            rng = random.Random(1)
+            with tempfile.TemporaryDirectory() as tmp:
+                storage = storage_class(Path(tmp) / "bench.db", pragmas=tuning_pragmas(preset))
+                if cached:
+                    storage = CachedStorage(storage)
+                    mode += "+cache"
+                await storage.init()
+                await populate(storage, rng)
+
+                for concurrency in CONCURRENCY:
+                    latencies, wall = await run(storage, concurrency, rng)
+                    latencies.sort()
+                    mean = sum(latencies) / len(latencies) * 1e6
+                    p99 = latencies[int(len(latencies) * 0.99)] * 1e6
+                    print(
+                        f"{preset:8} {mode:12} concurrency {concurrency:3}: {mean:7.0f} µs/op mean, "
+                        f"{p99:7.0f} µs p99, {len(latencies) / wall:6.0f} ops/s"
+                    )
+
+                if cached:
+                    stats = storage.get_cache_stats()
+                    print(
+                        f"{'':8} {mode:12} hit rate: users {stats['users']['hit_rate']:.0%}, "
+                        f"rosters {stats['rosters']['hit_rate']:.0%}"
+                    )
+                await storage.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,71 @@
+"""
+Transform benchmark.
+Compares the minute-of-day engine with the datetime reference implementation.
+
+Usage:
+    uv run python -m benchmarks.bench_transform
+"""
+import timeit
+from datetime import datetime
+from zoneinfo import available_timezones
+
+from src.transform import convert_minutes, convert_time_many, convert_time_reference
+
+ZONES = [
+    "America/Los_Angeles", "America/New_York", "America/Sao_Paulo", "Europe/London",
+    "Europe/Berlin", "Europe/Moscow", "Asia/Kolkata", "Asia/Tokyo",
+    "Australia/Sydney", "Pacific/Auckland",
+]
+TIMES = ["09:00", "14:30", "23:45"]
+
+REPEAT = 5
+NUMBER = 500
+
+
+def _best(func, calls: int) -> float:
+    """Best per-conversion time in microseconds."""
+    total = min(timeit.repeat(func, repeat=REPEAT, number=NUMBER))
+    return total / (NUMBER * calls) * 1e6
+
+
+def main():
+    now = datetime.now()
+    today = now.date()
+    minutes = [int(t[:2]) * 60 + int(t[3:]) for t in TIMES]
+    calls = len(TIMES) * len(ZONES)
+
+    def run_reference():
+        for t in TIMES:
+            for tz in ZONES:
+                convert_time_reference(t, "Europe/Berlin", tz, now)
+
+    def run_minutes():
+        for m in minutes:
+            for tz in ZONES:
+                convert_minutes(m, "Europe/Berlin", tz, today)
+
+    reference = _best(run_reference, calls)
+    fast = _best(run_minutes, calls)
+
+    print(f"conversions: {calls} x {NUMBER}")
+    print(f"datetime : {reference:.2f} us/conversion")
+    print(f"minutes  : {fast:.2f} us/conversion  ({reference / fast:.1f}x)")
+
+    # Big community chat: one time to every distinct zone
+    all_zones = sorted(available_timezones())
+
+    def run_loop():
+        for tz in all_zones:
+            convert_minutes(minutes[0], "Europe/Berlin", tz, today)
+
+    def run_batch():
+        convert_time_many("09:00", "Europe/Berlin", all_zones, now)
+
+    loop = _best(run_loop, 1)
+    batch = _best(run_batch, 1)
+    print(f"{len(all_zones)} zones, loop : {loop:.0f} us/reply")
+    print(f"{len(all_zones)} zones, batch: {batch:.0f} us/reply  ({loop / batch:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
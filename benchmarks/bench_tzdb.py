@@ -0,0 +1,50 @@
+"""
+TZDB benchmark.
+Compares transition-table lookups with zoneinfo for "offset of zone Z at instant T".
+
+Usage:
+    uv run python -m benchmarks.bench_tzdb
+"""
+import random
+import time
+import timeit
+from datetime import datetime
+from zoneinfo import ZoneInfo, available_timezones
+
+from src import tzdb
+
+REPEAT = 5
+SAMPLES = 20000
+
+
+def main():
+    started = time.perf_counter()
+    table = tzdb.build_table()
+    build = time.perf_counter() - started
+
+    rng = random.Random(1)
+    zones = sorted(available_timezones())
+    queries = [
+        (rng.choice(zones), rng.randrange(table.range_start, table.range_end))
+        for _ in range(SAMPLES)
+    ]
+    zone_objects = [(ZoneInfo(name), ts) for name, ts in queries]
+
+    def run_zoneinfo():
+        for tz, ts in zone_objects:
+            datetime.fromtimestamp(ts, tz).utcoffset()
+
+    def run_table():
+        for name, ts in queries:
+            table.offset_at(name, ts)
+
+    zi = min(timeit.repeat(run_zoneinfo, repeat=REPEAT, number=1)) / SAMPLES * 1e9
+    tb = min(timeit.repeat(run_table, repeat=REPEAT, number=1)) / SAMPLES * 1e9
+
+    print(f"build    : {build:.2f} s ({len(table.names)} zones, {len(table.times)} transitions)")
+    print(f"zoneinfo : {zi:.0f} ns/lookup")
+    print(f"tzdb     : {tb:.0f} ns/lookup  ({zi / tb:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+TZ raster benchmark.
+Compares coordinate → timezone lookups: raster (with TimezoneFinder for
+border cells) vs TimezoneFinder alone.
+
+Uses data/tzraster.bin if built, otherwise a 1° raster built in memory.
+
+Usage:
+    uv run python -m src.tzraster     # build the file first (optional)
+    uv run python -m benchmarks.bench_tzraster
+"""
+import random
+import time
+import timeit
+
+from timezonefinder import TimezoneFinder
+
+from src import tzraster
+
+REPEAT = 5
+SAMPLES = 20000
+
+
+def main():
+    started = time.perf_counter()
+    tf = TimezoneFinder()
+    tf_init = time.perf_counter() - started
+
+    started = time.perf_counter()
+    raster = tzraster.load_raster()
+    source = str(tzraster.TZRASTER_PATH)
+    if raster is None:
+        raster = tzraster.build_raster(resolution=1.0, tf=tf)
+        source = "built in memory, 1°"
+    load = time.perf_counter() - started
+
+    # Populated-latitude points (where users are), not uniform over oceans
+    rng = random.Random(1)
+    points = [(rng.uniform(-45, 65), rng.uniform(-125, 150)) for _ in range(SAMPLES)]
+
+    def run_tf():
+        for lat, lng in points:
+            tf.timezone_at(lat=lat, lng=lng)
+
+    def run_raster():
+        for lat, lng in points:
+            raster.zone_at(lat, lng) or tf.timezone_at(lat=lat, lng=lng)
+
+    hits = sum(raster.zone_at(lat, lng) is not None for lat, lng in points)
+    base = min(timeit.repeat(run_tf, repeat=REPEAT, number=1)) / SAMPLES * 1e6
+    fast = min(timeit.repeat(run_raster, repeat=REPEAT, number=1)) / SAMPLES * 1e6
+
+    print(f"tzfinder init : {tf_init * 1e3:.0f} ms")
+    print(f"raster load   : {load * 1e3:.0f} ms ({raster.width}x{raster.height}, {source})")
+    print(f"raster hits   : {hits / SAMPLES:.1%}")
+    print(f"tzfinder      : {base:.2f} µs/lookup")
+    print(f"raster        : {fast:.2f} µs/lookup  ({base / fast:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,18 @@ cd "$(dirname "$0")"
 # Trap Ctrl+C to kill all background jobs
 trap 'echo "Stopping bots..."; kill $(jobs -p) 2>/dev/null; exit 0' SIGINT SIGTERM
 
+# Build the shared timezone transition table (memory-mapped by both bots)
+uv run python -m src.tzdb
+
+# Build the offline city index once (needs network for the GeoNames download);
+# without it city lookups go to Nominatim
+[ -f data/gazetteer.tsv.gz ] || uv run python -m src.gazetteer || echo "Gazetteer build failed, using Nominatim only"
+
+# Build the coordinate -> timezone raster once (about a minute, depending on
+# the machine); a stale file (after a timezonefinder upgrade) is ignored until
+# rebuilt
+[ -f data/tzraster.bin ] || uv run python -m src.tzraster
+
 echo "Starting bots... (Ctrl+C to stop)"
 
 # Start Telegram bot in background
@@ -3,33 +3,173 @@ Capture module.
 Extracts time strings from messages using regex patterns from config.
 """
 import re
-from src.config import get_capture_patterns
+from typing import NamedTuple
+
+from src.config import get_capture_patterns, get_capture_prefilter
+from src.transform import parse_time_string
+from src.logger import get_logger
+
+logger = get_logger()
+
+# Every supported pattern needs at least one ASCII digit
+_DIGITS = frozenset("0123456789")
+
+# Message pipeline counters: how far each message got
+_stats = {
+    "messages": 0,
+    "prefilter_rejected": 0,
+    "regex_rejected": 0,
+    "matched": 0,
+}
+
+
+class TimeMatch(NamedTuple):
+    """A time mention, parsed once and passed through the pipeline."""
+    text: str     # raw matched text, e.g. "5 pm"
+    start: int    # span in the message
+    end: int
+    minutes: int  # minute of day (0..1439), e.g. 1020 for "5 pm"
+
+
+def parse_match(text: str) -> TimeMatch:
+    """
+    Build a match record from a bare time string (e.g. a pending time).
+    Raises ValueError if the string is not a time.
+    """
+    t = parse_time_string(text)
+    return TimeMatch(text, 0, len(text), t.hour * 60 + t.minute)
+
+
+class TimeCapture:
+    """
+    Compiled capture engine.
+
+    All configured patterns are combined into a single alternation, so a
+    message is scanned once. When several patterns match at the same
+    position (e.g. "5:00 pm" vs "5:00"), the earlier pattern in the list wins.
+    """
+
+    def __init__(self, patterns: list[str]):
+        self.patterns = list(patterns)
+        combined = "|".join(f"(?:{p})" for p in self.patterns)
+        # An empty alternation would match the empty string everywhere
+        self._regex = re.compile(combined, re.IGNORECASE) if self.patterns else None
+
+    def extract(self, text: str) -> list[str]:
+        """Return unique matched time strings in order of appearance."""
+        if self._regex is None or not text:
+            return []
+
+        seen = set()
+        unique = []
+        for m in self._regex.finditer(text):
+            match = m.group(0)
+            if match not in seen:
+                seen.add(match)
+                unique.append(match)
+
+        return unique
+
+    def find(self, text: str) -> list[TimeMatch]:
+        """Return unique parsed matches in order of appearance."""
+        if self._regex is None or not text:
+            return []
+
+        seen = set()
+        unique = []
+        for m in self._regex.finditer(text):
+            match = m.group(0)
+            if match in seen:
+                continue
+            seen.add(match)
+            try:
+                t = parse_time_string(match)
+            except ValueError:
+                logger.debug(f"Captured '{match}' is not a parseable time, skipping")
+                continue
+            unique.append(TimeMatch(match, m.start(), m.end(), t.hour * 60 + t.minute))
+
+        return unique
+
+
+# Singleton compiled from configuration.yaml
+_capture = None
+
+def get_capture() -> TimeCapture:
+    """Get capture engine compiled from configured patterns."""
+    global _capture
+    if _capture is None:
+        _capture = TimeCapture(get_capture_patterns())
+    return _capture
+
+
+def might_contain_time(text: str) -> bool:
+    """
+    Cheap pre-filter (no regex): can this text contain a time at all?
+    Always True when the pre-filter is disabled in config.
+    """
+    if not text:
+        return False
+    if not get_capture_prefilter():
+        return True
+    return not _DIGITS.isdisjoint(text)
 
 
 def extract_times(text: str) -> list[str]:
     """
     Extract all time strings from a message.
-    
+
     Args:
         text: Message text to scan
-        
+
     Returns:
         List of matched time strings (e.g. ["14:00", "5 pm"])
     """
-    patterns = get_capture_patterns()
-    matches = []
-    
-    for pattern in patterns:
-        # Use finditer to get full match, not just groups
-        for m in re.finditer(pattern, text, re.IGNORECASE):
-            matches.append(m.group(0))  # Full match, not groups
-    
-    # Remove duplicates while preserving order
-    seen = set()
-    unique = []
-    for m in matches:
-        if m not in seen:
-            seen.add(m)
-            unique.append(m)
-    
-    return unique
+    if not might_contain_time(text):
+        return []
+    return get_capture().extract(text)
+
+
+def find_times(text: str) -> list[TimeMatch]:
+    """
+    Extract all time mentions from a message as parsed match records.
+
+    Args:
+        text: Message text to scan
+
+    Returns:
+        List of TimeMatch records (raw text, span, minute of day)
+    """
+    if not might_contain_time(text):
+        return []
+    return get_capture().find(text)
+
+
+def scan_message(text: str) -> list[TimeMatch]:
+    """
+    Entry point for chat messages: pre-filter, then regex.
+    Same result as find_times, but updates pipeline counters.
+    """
+    _stats["messages"] += 1
+
+    if not might_contain_time(text):
+        _stats["prefilter_rejected"] += 1
+        return []
+
+    times = find_times(text)
+    if times:
+        _stats["matched"] += 1
+    else:
+        _stats["regex_rejected"] += 1
+    return times
+
+
+def get_capture_stats() -> dict:
+    """Snapshot of message pipeline counters (for monitoring)."""
+    return dict(_stats)
+
+
+def reset_capture_stats():
+    """Reset message pipeline counters."""
+    for key in _stats:
+        _stats[key] = 0
@@ -5,11 +5,12 @@ from aiogram.types import Message, ChatMemberUpdated, ForceReply
 from aiogram.filters import Command, ChatMemberUpdatedFilter, IS_NOT_MEMBER
 from aiogram.fsm.context import FSMContext
 
-from src.storage import storage
+from src.storage import membership, storage
 from src import capture, formatter
 from src.config import get_bot_settings
 from src.logger import get_logger
 from src.commands.states import SetTimezone
+from src.commands.filters import TimeMentionFilter
 
 router = Router()
 logger = get_logger()
@@ -32,13 +33,15 @@ async def cmd_help(message: Message):
     await message.reply(help_text)
 
 
-@router.message(F.text)
-async def handle_time_mention(message: Message, state: FSMContext):
+@router.message(F.text, TimeMentionFilter())
+async def handle_time_mention(message: Message, state: FSMContext, times: list[capture.TimeMatch] | None = None):
     """Handle regular messages - check for time mentions."""
     if not message.text:
         return
     
-    times = capture.extract_times(message.text)
+    # Normally captured by TimeMentionFilter
+    if times is None:
+        times = capture.find_times(message.text)
     if not times:
         return
     
@@ -52,7 +55,7 @@ async def handle_time_mention(message: Message, state: FSMContext):
         if sender and not sender.get("timezone"):
              logger.error(f"User {user_id} has no timezone data")
 
-        await state.update_data(user_id=user_id, pending_time=times[0])
+        await state.update_data(user_id=user_id, pending_time=times[0].text)
         await state.set_state(SetTimezone.waiting_for_city)
         await message.reply(f"{user_name}, what city are you in?", reply_markup=ForceReply(selective=True))
         return
@@ -67,29 +70,33 @@ async def handle_time_mention(message: Message, state: FSMContext):
             return
         _last_reply[chat_id] = now
 
-    # Get chat members
+    # Version first: a member joining during the fetch then can't leave the
+    # old roster's layout cached under the new version
+    version = await storage.get_chat_version(chat_id, platform="telegram")
     members = await storage.get_chat_members(chat_id, platform="telegram")
     if not members:
         return
     
     sender_flag = sender.get("flag", "")
     
-    for time_str in times:
-        reply = formatter.format_conversion_reply(
-            time_str,
-            sender["city"],
-            sender["timezone"],
-            sender_flag,
-            members,
-            user_name
-        )
+    replies = formatter.iter_conversion_replies(
+        times,
+        sender["city"],
+        sender["timezone"],
+        sender_flag,
+        members,
+        user_name,
+        layout_key=("telegram", chat_id, version),
+        platform="telegram"
+    )
+    for reply in replies:
         await message.answer(reply)
     
-    logger.info(f"[chat:{chat_id}] Times: {times}")
+    logger.info(f"[chat:{chat_id}] Times: {[t.text for t in times]}")
 
 
 @router.my_chat_member(ChatMemberUpdatedFilter(member_status_changed=IS_NOT_MEMBER))
 async def on_bot_kicked(event: ChatMemberUpdated):
     """Clean up chat members when bot is kicked."""
-    await storage.clear_chat_members(event.chat.id, platform="telegram")
+    await membership.clear_chat_members(event.chat.id, platform="telegram")
     logger.info(f"[chat:{event.chat.id}] Bot kicked, cleared chat members")
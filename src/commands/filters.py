@@ -0,0 +1,17 @@
+from aiogram.filters import BaseFilter
+from aiogram.types import Message
+
+from src import capture
+
+
+class TimeMentionFilter(BaseFilter):
+    """
+    Pass only messages that mention a time.
+    Runs the cheap digit pre-filter before any regex and hands
+    the captured TimeMatch records to the handler as `times`.
+    """
+    async def __call__(self, message: Message) -> bool | dict:
+        times = capture.scan_message(message.text or "")
+        if not times:
+            return False
+        return {"times": times}
@@ -1,7 +1,7 @@
 from typing import Any, Awaitable, Callable, Dict
 from aiogram import BaseMiddleware
 from aiogram.types import Message
-from src.storage import storage
+from src.storage import membership, storage
 from src.logger import get_logger
 
 logger = get_logger()
@@ -24,7 +24,8 @@ class PassiveCollectionMiddleware(BaseMiddleware):
                 try:
                     user = await storage.get_user(event.from_user.id, platform="telegram")
                     if user:
-                        await storage.add_chat_member(event.chat.id, event.from_user.id, platform="telegram")
+                        # Buffered: written in bulk by the recorder, not on this message
+                        await membership.add_chat_member(event.chat.id, event.from_user.id, platform="telegram")
                 except Exception as e:
                     logger.error(f"Middleware storage error: {e}", exc_info=True)
         
@@ -4,7 +4,7 @@ from aiogram.filters import Command
 from aiogram.fsm.context import FSMContext
 
 from src.storage import storage
-from src import geo, formatter
+from src import geocache, formatter
 from src.logger import get_logger
 from src.commands.states import SetTimezone
 
@@ -45,7 +45,7 @@ async def process_city(message: Message, state: FSMContext):
         return
     
     city_name = message.text.strip()
-    location = geo.get_timezone_by_city(city_name)
+    location = await geocache.get_timezone_by_city(city_name)
     
     if not location or "error" in location:
         if location and "error" in location:
@@ -80,7 +80,7 @@ async def process_fallback_input(message: Message, state: FSMContext):
     pending_time = data.get("pending_time")
     
     # Use unified resolver
-    location = geo.resolve_timezone_from_input(user_input)
+    location = await geocache.resolve_timezone_from_input(user_input)
     
     if location:
         await _save_and_finish(message, state, location, pending_time, is_retry=True)
@@ -128,12 +128,13 @@ async def _save_and_finish(
     if pending_time:
         members = await storage.get_chat_members(message.chat.id, platform="telegram")
         if members:
-            reply = formatter.format_conversion_reply(
-                pending_time,
+            for reply in formatter.iter_conversion_replies(
+                [pending_time],
                 location["city"],
                 location["timezone"],
                 location["flag"],
                 members,
-                user_name
-            )
-            await message.answer(reply)
+                user_name,
+                platform="telegram"
+            ):
+                await message.answer(reply)
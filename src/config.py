@@ -45,3 +45,27 @@ def get_bot_settings() -> dict:
 def get_capture_patterns() -> list:
     """Get regex patterns for time capture."""
     return get_config().get("capture", {}).get("patterns", [])
+
+def get_capture_prefilter() -> bool:
+    """Whether the digit pre-filter runs before capture regex."""
+    return get_config().get("capture", {}).get("prefilter", True)
+
+def get_transform_settings() -> dict:
+    """Get time conversion settings from config."""
+    return get_config().get("transform", {})
+
+def get_geo_settings() -> dict:
+    """Get city lookup settings from config."""
+    return get_config().get("geo", {})
+
+def get_warmup_settings() -> dict:
+    """Get startup warm-up settings from config."""
+    return get_config().get("warmup", {})
+
+def get_stats_settings() -> dict:
+    """Get periodic stats log settings from config."""
+    return get_config().get("stats", {})
+
+def get_storage_settings() -> dict:
+    """Get database storage settings from config."""
+    return get_config().get("storage", {})
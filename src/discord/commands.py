@@ -7,7 +7,7 @@ from discord import app_commands
 from src.discord import bot
 from src.discord.ui import FallbackView
 from src.storage import storage
-from src import geo, formatter
+from src import geocache, formatter
 from src.transform import get_utc_offset
 from src.logger import get_logger
 
@@ -58,7 +58,7 @@ async def handle_settz(interaction: discord.Interaction, city: str, pending_time
     if not interaction.response.is_done():
         await interaction.response.defer()
     
-    location = geo.get_timezone_by_city(city)
+    location = await geocache.get_timezone_by_city(city)
     
     if not location or "error" in location:
         # Show fallback UI with buttons
@@ -97,15 +97,16 @@ async def handle_settz(interaction: discord.Interaction, city: str, pending_time
     if pending_time and interaction.guild:
         members = await storage.get_chat_members(interaction.guild.id, platform=PLATFORM)
         if members:
-            reply = formatter.format_conversion_reply(
-                pending_time,
+            for reply in formatter.iter_conversion_replies(
+                [pending_time],
                 location["city"],
                 location["timezone"],
                 location["flag"],
                 members,
-                username
-            )
-            await interaction.followup.send(reply)
+                username,
+                platform=PLATFORM
+            ):
+                await interaction.followup.send(reply)
 
 
 @bot.tree.command(name="tb_settz", description="Set your timezone")
@@ -121,7 +122,7 @@ async def handle_manual_time(interaction: discord.Interaction, time_str: str):
     if not interaction.response.is_done():
         await interaction.response.defer()
 
-    location = geo.resolve_timezone_from_input(time_str)
+    location = await geocache.resolve_timezone_from_input(time_str)
     
     if not location:
         # Still invalid time - ask to try again
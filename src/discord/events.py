@@ -23,8 +23,8 @@ async def on_message(message: discord.Message):
     if not message.guild:
         return
     
-    # Check for time patterns
-    times = capture.extract_times(message.content)
+    # Check for time patterns (digit pre-filter first, then regex)
+    times = capture.scan_message(message.content)
     if not times:
         return
     
@@ -35,12 +35,14 @@ async def on_message(message: discord.Message):
         from src.discord.ui import SetTimezoneView
         await message.reply(
             f"{message.author.display_name}, set your timezone to convert times!",
-            view=SetTimezoneView(message.author.id, pending_time=times[0]),
+            view=SetTimezoneView(message.author.id, pending_time=times[0].text),
             mention_author=True
         )
         return
     
-    # Get guild members and auto-cleanup stale ones
+    # Get guild members and auto-cleanup stale ones (version read first, as in
+    # the Telegram handler)
+    version = await storage.get_chat_version(message.guild.id, platform=PLATFORM)
     db_members = await storage.get_chat_members(message.guild.id, platform=PLATFORM)
     if not db_members:
         return
@@ -61,19 +63,26 @@ async def on_message(message: discord.Message):
     
     sender_flag = sender.get("flag", "")
     user_name = message.author.display_name or "User"
+    # If the roster changed since the fetch (stale cleanup above, or a
+    # concurrent write), don't cache this layout; the next message will
+    layout_key = (PLATFORM, message.guild.id, version)
+    if await storage.get_chat_version(message.guild.id, platform=PLATFORM) != version:
+        layout_key = None
     
-    for time_str in times:
-        reply = formatter.format_conversion_reply(
-            time_str,
-            sender["city"],
-            sender["timezone"],
-            sender_flag,
-            active_members,
-            user_name
-        )
+    replies = formatter.iter_conversion_replies(
+        times,
+        sender["city"],
+        sender["timezone"],
+        sender_flag,
+        active_members,
+        user_name,
+        layout_key=layout_key,
+        platform=PLATFORM
+    )
+    for reply in replies:
         await message.reply(reply)
     
-    logger.info(f"[guild:{message.guild.id}] Times: {times}")
+    logger.info(f"[guild:{message.guild.id}] Times: {[t.text for t in times]}")
 
 
 @bot.event
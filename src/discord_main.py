@@ -10,6 +10,7 @@ import asyncio
 from dotenv import load_dotenv
 
 from src.logger import get_logger, setup_logging
+from src import geo, stats, warmup
 from src.storage import storage
 
 logger = get_logger()
@@ -30,13 +31,25 @@ async def main():
     await storage.init()
     logger.info("Storage initialized")
     
+    # Preload timezone/geo caches (in the background by default)
+    await warmup.start()
+    
+    # Log counters periodically (stats.interval_seconds)
+    stats.start()
+    
     # Import bot and register commands/events
     from src.discord import bot
     import src.discord.commands  # noqa: F401 - registers commands
     import src.discord.events    # noqa: F401 - registers events
     
     logger.info("Starting Discord bot...")
-    await bot.start(token)
+    try:
+        await bot.start(token)
+    finally:
+        warmup.cancel()
+        stats.cancel()
+        await geo.close()
+        await storage.close()
 
 
 if __name__ == "__main__":
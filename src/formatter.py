@@ -2,8 +2,15 @@
 Formatter module.
 Builds reply messages according to 07_response_format.md spec.
 """
+from collections import Counter, OrderedDict
+from collections.abc import Iterable, Iterator
+from time import time
+from typing import NamedTuple
+
+from src import offsets
 from src.config import get_bot_settings
-from src.transform import convert_time, get_utc_offset, parse_time_string
+from src.capture import TimeMatch, parse_match
+from src.transform import convert_time_many, get_utc_offset, parse_time_string
 
 
 
@@ -11,8 +18,10 @@ from src.logger import get_logger
 
 logger = get_logger()
 
-def normalize_time(time_str: str) -> str:
+def normalize_time(time_str: str | TimeMatch) -> str:
     """Normalize time string to 24h format (e.g. '5 pm' → '17:00')."""
+    if isinstance(time_str, TimeMatch):
+        return f"{time_str.minutes // 60:02d}:{time_str.minutes % 60:02d}"
     try:
         t = parse_time_string(time_str)
         return t.strftime("%H:%M")
@@ -22,7 +31,7 @@ def normalize_time(time_str: str) -> str:
 
 
 
-def _format_sender_part(original_time: str, city: str, flag: str, name: str) -> str:
+def _format_sender_part(original_time: str | TimeMatch, city: str, flag: str, name: str) -> str:
     """Format the sender's part of the message."""
     normalized = normalize_time(original_time)
     text = f"{normalized} {city} {flag}"
@@ -47,15 +56,30 @@ def _group_and_sort_members(members: list[dict], limit: int) -> list[tuple[str,
     return [(tz, tz_groups[tz]) for tz in sorted_tzs]
 
 
-def _format_tz_group(
-    original_time: str, 
-    sender_tz: str, 
-    target_tz: str, 
-    group: list[dict],
-    show_usernames: bool
-) -> str:
+def _format_group_label(group: list[dict], show_usernames: bool) -> str:
+    """Cities, flag and (optionally) usernames of a timezone group."""
+    cities = ", ".join(m['city'] for m in group)
+    flag = group[0].get('flag', '')
+    
+    label = f"{cities} {flag}"
+    
+    if show_usernames:
+        usernames = [f"@{m['username']}" for m in group if m.get('username')]
+        if usernames:
+            label += f" {', '.join(usernames)}"
+    
+    return label
+
+
+def _format_group_count(group: list[dict]) -> str:
+    """Compact label for big rosters: most common city, flag and member count."""
+    city = Counter(m['city'] for m in group).most_common(1)[0][0]
+    flag = group[0].get('flag', '')
+    return f"{city} {flag} ({len(group)})"
+
+
+def _format_tz_group(converted: str, offset: int, label: str) -> str:
     """Format a single timezone group result."""
-    converted, offset = convert_time(original_time, sender_tz, target_tz)
     
     # Handle day offset indicator
     if offset == 1:
@@ -65,62 +89,268 @@ def _format_tz_group(
     else:
         time_display = converted
     
-    cities = ", ".join(m['city'] for m in group)
-    flag = group[0].get('flag', '')
+    return f"{time_display} {label}"
+
+
+class ReplyLayout(NamedTuple):
+    """Membership-dependent part of a reply, reused across time mentions."""
+    zones: list[str]     # target zones, sorted by UTC offset
+    labels: list[str]    # pre-joined "cities flag @usernames" (or counts) per zone
+    suffix: str          # truncation indicator part (or "")
+    valid_until: float   # earliest offset change among zones (re-sort after)
+
+
+def build_reply_layout(members: list[dict], sender_city: str) -> ReplyLayout:
+    """Group, sort and pre-render everything that doesn't depend on the time."""
+    settings = get_bot_settings()
+    display_limit = settings.get("display_limit_per_chat", 10)
+    # 0 means no limit
+    if display_limit == 0:
+        display_limit = len(members) + 1  # effectively unlimited
+    show_usernames = settings.get("show_usernames", False)
+    compact_threshold = settings.get("compact_threshold", 0)
     
-    part = f"{time_display} {cities} {flag}"
+    # Filter out sender from members (avoid self-conversion)
+    other_members = [m for m in members if m["city"] != sender_city]
     
-    if show_usernames:
-        usernames = [f"@{m['username']}" for m in group if m.get('username')]
-        if usernames:
-            part += f" {', '.join(usernames)}"
-            
-    return part
+    # Group members by timezone and sort by UTC offset
+    sorted_groups = _group_and_sort_members(other_members, display_limit)
+    
+    zones = [tz for tz, _ in sorted_groups]
+    
+    # Past the threshold, show member counts per zone instead of every city,
+    # so the reply grows with the number of zones, not members
+    shown = min(len(other_members), display_limit)
+    if compact_threshold and shown > compact_threshold:
+        labels = [_format_group_count(group) for _, group in sorted_groups]
+    else:
+        labels = [_format_group_label(group, show_usernames) for _, group in sorted_groups]
+    
+    # Add truncation indicator
+    suffix = ""
+    if len(other_members) > display_limit:
+        suffix = f"... +{len(other_members) - display_limit} more"
+    
+    # Sort order holds until the first zone changes its offset
+    now = int(time())
+    valid_until = float("inf")
+    for tz in zones:
+        try:
+            valid_until = min(valid_until, offsets.get_window(tz, now).end)
+        except Exception:
+            valid_until = now  # unknown zone: don't cache
+    
+    return ReplyLayout(zones, labels, suffix, valid_until)
+
+
+# Per-chat layout cache: (platform, chat_id, sender_city) -> (version, layout)
+_LAYOUT_CACHE_SIZE = 1024
+_layouts: OrderedDict[tuple, tuple] = OrderedDict()
+
+
+def _get_layout(members: list[dict], sender_city: str, layout_key: tuple | None) -> ReplyLayout:
+    """Cached layout for (platform, chat_id, version) keys; built fresh otherwise."""
+    if layout_key is None:
+        return build_reply_layout(members, sender_city)
+    
+    *chat, version = layout_key
+    slot = (*chat, sender_city)
+    cached = _layouts.get(slot)
+    if cached is not None and cached[0] == version and time() < cached[1].valid_until:
+        _layouts.move_to_end(slot)
+        return cached[1]
+    
+    layout = build_reply_layout(members, sender_city)
+    _layouts[slot] = (version, layout)
+    _layouts.move_to_end(slot)
+    if len(_layouts) > _LAYOUT_CACHE_SIZE:
+        _layouts.popitem(last=False)
+    return layout
+
+
+def clear_layout_cache():
+    """Drop all cached reply layouts."""
+    _layouts.clear()
+
+
+# Platform message size limits (UTF-16 code units, as Telegram counts them;
+# a flag emoji is 4)
+MESSAGE_LIMITS = {
+    "telegram": 4096,
+    "discord": 2000,
+}
+
+FOOTER = "/tb_help"
+
+
+def _conversion_parts(
+    original_time: str | TimeMatch,
+    sender_city: str,
+    sender_tz: str,
+    sender_flag: str,
+    members: list[dict],
+    sender_name: str = "",
+    layout_key: tuple | None = None
+) -> list[str]:
+    """Parts (joined by " | ") of the conversion line for a single time."""
+    if isinstance(original_time, str):
+        try:
+            original_time = parse_match(original_time)
+        except ValueError:
+            pass  # keep raw string, normalize_time falls back to it
+    
+    layout = _get_layout(members, sender_city, layout_key)
+    
+    # Format sender part (always shown)
+    parts = [_format_sender_part(original_time, sender_city, sender_flag, sender_name)]
+    
+    # If no other members to convert
+    if not layout.zones:
+        return parts
+    
+    # Convert to all target zones at once (one clock snapshot)
+    conversions = convert_time_many(original_time, sender_tz, layout.zones)
+    
+    parts.extend(
+        _format_tz_group(converted, offset, label)
+        for (converted, offset), label in zip(conversions, layout.labels)
+    )
+    if layout.suffix:
+        parts.append(layout.suffix)
+    return parts
 
 
 def format_conversion_reply(
-    original_time: str,
+    original_time: str | TimeMatch,
     sender_city: str,
     sender_tz: str,
     sender_flag: str,
     members: list[dict],
-    sender_name: str = ""
+    sender_name: str = "",
+    layout_key: tuple | None = None
 ) -> str:
     """
     Format according to spec with username:
     Anton: 10:30 Sarajevo 🇧🇦 | 16:30 Paris 🇫🇷 | 18:30 Moscow 🇷🇺
     /tb_help
-    """
-    settings = get_bot_settings()
-    display_limit = settings.get("display_limit_per_chat", 10)
-    # 0 means no limit
-    if display_limit == 0:
-        display_limit = len(members) + 1  # effectively unlimited
-    show_usernames = settings.get("show_usernames", False)
     
-    # Filter out sender from members (avoid self-conversion)
-    other_members = [m for m in members if m["city"] != sender_city]
+    original_time may be a raw string or a capture.TimeMatch; either way
+    it is parsed at most once for all timezone groups.
     
-    # Format sender part (always shown)
-    sender_part = _format_sender_part(original_time, sender_city, sender_flag, sender_name)
+    layout_key: (platform, chat_id, membership_version) from storage.
+    When given, the grouped/sorted layout is reused until the chat's
+    membership changes, so only the times are filled in per message.
     
-    # If no other members to convert
-    if not other_members:
-        return f"{sender_part}\n/tb_help"
+    Not size-limited; use iter_conversion_replies for sending.
+    """
+    parts = _conversion_parts(
+        original_time, sender_city, sender_tz, sender_flag, members, sender_name, layout_key
+    )
+    return " | ".join(parts) + f"\n{FOOTER}"
+
+
+def _utf16_length(text: str) -> int:
+    """Length in UTF-16 code units, the unit of Telegram's message limit."""
+    return len(text.encode("utf-16-le")) // 2
+
+
+def _truncate(text: str, units: int) -> str:
+    """Longest prefix of text within `units` UTF-16 code units (no split surrogate pairs)."""
+    return text.encode("utf-16-le")[:units * 2].decode("utf-16-le", errors="ignore")
+
+
+def iter_chunks(lines: Iterable[list[str]], max_length: int) -> Iterator[str]:
+    """
+    Pack lines (lists of parts joined by " | ") into messages of at most
+    max_length UTF-16 code units (see _utf16_length), each ending with the footer.
     
-    # Group members by timezone and sort by UTC offset
-    sorted_groups = _group_and_sort_members(other_members, display_limit)
+    Lines are kept whole when they fit in a message; a longer line is
+    continued in the next message at a part boundary. A message is yielded
+    as soon as it is full.
+    """
+    budget = max_length - _utf16_length(FOOTER) - 1  # room for lines + "\n" before footer
+    out: list[str] = []
+    size = 0  # _utf16_length("\n".join(out))
     
-    parts = []
-    for tz, group in sorted_groups:
-        part = _format_tz_group(original_time, sender_tz, tz, group, show_usernames)
-        parts.append(part)
+    for parts in lines:
+        sep = 1 if out else 0
+        lengths = [_utf16_length(part) for part in parts]
+        full = sum(lengths) + 3 * (len(parts) - 1)
+        # Whole line fits in a fresh message but not this one: start a new one
+        if out and size + sep + full > budget and full <= budget:
+            yield "\n".join(out + [FOOTER])
+            out, size, sep = [], 0, 0
+        
+        line, length = "", 0
+        for part, part_length in zip(parts, lengths):
+            candidate = length + 3 + part_length if line else part_length
+            if size + sep + candidate <= budget:
+                line = f"{line} | {part}" if line else part
+                length = candidate
+                continue
+            # Message full: close it and continue the line in the next one
+            if line:
+                out.append(line)
+            if out:
+                yield "\n".join(out + [FOOTER])
+            out, size, sep = [], 0, 0
+            # A single part never exceeds a message
+            line = part if part_length <= budget else _truncate(part, budget)
+            length = _utf16_length(line)
+        
+        if line:
+            out.append(line)
+            size += sep + length
+    
+    if out:
+        yield "\n".join(out + [FOOTER])
+
+
+def iter_conversion_replies(
+    times: list[str | TimeMatch],
+    sender_city: str,
+    sender_tz: str,
+    sender_flag: str,
+    members: list[dict],
+    sender_name: str = "",
+    layout_key: tuple | None = None,
+    platform: str = "telegram"
+) -> Iterator[str]:
+    """
+    Replies for all times in a message, yielded one message at a time
+    within the platform size limit (MESSAGE_LIMITS).
     
-    # Combine everything
-    line = sender_part + " | " + " | ".join(parts)
+    Batched (default): one line per time in a single message:
+    Anton: 10:00 Berlin 🇩🇪 | 04:00 New York 🇺🇸
+    Anton: 15:00 Berlin 🇩🇪 | 09:00 New York 🇺🇸
+    /tb_help
     
-    # Add truncation indicator
-    if len(other_members) > display_limit:
-        line += f" | ... +{len(other_members) - display_limit} more"
+    With bot.batch_times: false, a separate reply per time.
+    """
+    max_length = MESSAGE_LIMITS.get(platform, min(MESSAGE_LIMITS.values()))
+    lines = (
+        _conversion_parts(t, sender_city, sender_tz, sender_flag, members, sender_name, layout_key)
+        for t in times
+    )
     
-    return f"{line}\n/tb_help"
+    if get_bot_settings().get("batch_times", True):
+        yield from iter_chunks(lines, max_length)
+    else:
+        for parts in lines:
+            yield from iter_chunks([parts], max_length)
+
+
+def format_conversion_replies(
+    times: list[str | TimeMatch],
+    sender_city: str,
+    sender_tz: str,
+    sender_flag: str,
+    members: list[dict],
+    sender_name: str = "",
+    layout_key: tuple | None = None,
+    platform: str = "telegram"
+) -> list[str]:
+    """All replies of iter_conversion_replies as a list."""
+    return list(iter_conversion_replies(
+        times, sender_city, sender_tz, sender_flag, members, sender_name, layout_key, platform
+    ))
@@ -0,0 +1,263 @@
+"""
+Gazetteer module.
+Offline city → timezone index built from a GeoNames cities dump, so common
+cities resolve in memory without Nominatim/TimezoneFinder.
+
+Index: normalized name (primary, ASCII and alternate names) → places ranked
+by population, each with its IANA zone and country code. A trigram index over
+primary names answers typos ("Berln", "Sao Paolo") with a confidence score.
+
+Build the index file (downloads cities15000 from GeoNames if no dump is given):
+    uv run python -m src.gazetteer [path/to/cities15000.zip|.txt]
+"""
+import gzip
+import io
+import os
+import re
+import sys
+import unicodedata
+import urllib.request
+import zipfile
+from collections import Counter
+from difflib import SequenceMatcher
+from pathlib import Path
+from typing import NamedTuple
+from zoneinfo import available_timezones
+
+from src.config import PROJECT_ROOT
+from src.logger import get_logger
+
+logger = get_logger()
+
+GAZETTEER_PATH = PROJECT_ROOT / "data" / "gazetteer.tsv.gz"
+GEONAMES_URL = "https://download.geonames.org/export/dump/cities15000.zip"
+
+_HEADER = "# gazetteer v1"
+
+# Separators treated as spaces when matching names ("Saint-Denis" == "saint denis")
+_PUNCT = re.compile(r"[-‐'’.,()/]")
+
+# Fuzzy matching: the names sharing most trigrams with the query are ranked
+# by trigram overlap, and the best few are scored by edit similarity
+_FUZZY_POOL = 50
+_FUZZY_SCORED = 10
+
+
+class Place(NamedTuple):
+    """A populated place with its precomputed timezone."""
+    name: str
+    country_code: str
+    timezone: str
+    population: int
+
+
+def normalize_name(name: str) -> str:
+    """Lookup key: casefolded, accents stripped, punctuation as spaces."""
+    decomposed = unicodedata.normalize("NFKD", name)
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return " ".join(_PUNCT.sub(" ", stripped.casefold()).split())
+
+
+def _trigrams(key: str) -> set[str]:
+    """Trigrams of a normalized name, padded so word starts weigh more."""
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _keep_alternate(alt: str) -> bool:
+    """Skip codes and noise among GeoNames alternate names (IATA, postal, URLs)."""
+    if len(alt) < 2 or any(c.isdigit() for c in alt) or "://" in alt:
+        return False
+    return not (alt.isupper() and len(alt) <= 4)
+
+
+class Gazetteer:
+    """In-memory index of places by normalized name."""
+
+    def __init__(self, places: list[Place], keys: list[list[str]]):
+        """places must be sorted by population (descending); keys[i] belong to places[i]."""
+        self.places = places
+        self.index: dict[str, list[Place]] = {}
+        for place, place_keys in zip(places, keys):
+            for key in place_keys:
+                self.index.setdefault(key, []).append(place)
+        # Trigram index over primary names, built on first fuzzy lookup
+        self._fuzzy_names: list[str] | None = None
+        self._gram_counts: list[int] = []
+        self._postings: dict[str, list[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self.places)
+
+    def candidates(self, query: str) -> list[Place]:
+        """All places named query, most populous first."""
+        return self.index.get(normalize_name(query), [])
+
+    def lookup(self, query: str) -> Place | None:
+        """Most populous place named query, or None."""
+        found = self.candidates(query)
+        return found[0] if found else None
+
+    def build_fuzzy_index(self):
+        """Build the trigram index (otherwise built on the first fuzzy lookup)."""
+        names = list(dict.fromkeys(normalize_name(place.name) for place in self.places))
+        postings: dict[str, list[int]] = {}
+        gram_counts = []
+        for i, name in enumerate(names):
+            grams = _trigrams(name)
+            gram_counts.append(len(grams))
+            for gram in grams:
+                postings.setdefault(gram, []).append(i)
+        self._postings = postings
+        self._gram_counts = gram_counts
+        self._fuzzy_names = names
+
+    def fuzzy(self, query: str, limit: int = 5) -> list[tuple[Place, float]]:
+        """
+        Closest known names to a (misspelled) query.
+
+        Returns:
+            Up to `limit` (place, confidence) pairs, best first; confidence is
+            the similarity of the names from 0 to 1
+        """
+        key = normalize_name(query)
+        if not key:
+            return []
+        if self._fuzzy_names is None:
+            self.build_fuzzy_index()
+
+        grams = _trigrams(key)
+        shared = Counter()
+        for gram in grams:
+            shared.update(self._postings.get(gram, ()))
+
+        # Dice coefficient of trigram sets picks the few worth an edit-distance score
+        pool = sorted(
+            shared.most_common(_FUZZY_POOL),
+            key=lambda item: -item[1] / (len(grams) + self._gram_counts[item[0]])
+        )[:_FUZZY_SCORED]
+
+        scored = []
+        for i, _ in pool:
+            name = self._fuzzy_names[i]
+            place = self.index[name][0]
+            scored.append((SequenceMatcher(None, key, name).ratio(), place))
+        scored.sort(key=lambda item: (-item[0], -item[1].population))
+        return [(place, confidence) for confidence, place in scored[:limit]]
+
+
+def _read_dump(path: Path) -> io.TextIOBase:
+    """Open a GeoNames dump (.txt or .zip containing one .txt) as text."""
+    if path.suffix == ".zip":
+        archive = zipfile.ZipFile(path)
+        member = next(n for n in archive.namelist() if n.endswith(".txt"))
+        return io.TextIOWrapper(archive.open(member), encoding="utf-8")
+    return open(path, encoding="utf-8")
+
+
+def parse_dump(path: Path) -> list[tuple[Place, list[str]]]:
+    """
+    Read GeoNames rows into (place, keys), most populous first.
+    Rows with unknown zones are skipped.
+    """
+    zones = available_timezones()
+    rows = []
+    with _read_dump(path) as f:
+        for line in f:
+            fields = line.rstrip("\n").split("\t")
+            if len(fields) < 18:
+                continue
+            name, ascii_name, alternates = fields[1], fields[2], fields[3]
+            country_code, population, timezone = fields[8], fields[14], fields[17]
+            if timezone not in zones:
+                continue
+
+            names = [name, ascii_name] + [a for a in alternates.split(",") if _keep_alternate(a)]
+            keys = list(dict.fromkeys(k for k in map(normalize_name, names) if k))
+            place = Place(name, country_code.upper(), timezone, int(population or 0))
+            rows.append((place, keys))
+
+    rows.sort(key=lambda row: -row[0].population)
+    return rows
+
+
+def save_index(rows: list[tuple[Place, list[str]]], path: Path = GAZETTEER_PATH):
+    """Write the compact index file (gzipped TSV, atomic replace)."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(f".tmp{os.getpid()}")
+    with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+        f.write(_HEADER + "\n")
+        for place, keys in rows:
+            f.write(
+                f"{place.name}\t{place.country_code}\t{place.timezone}\t"
+                f"{place.population}\t{'|'.join(keys)}\n"
+            )
+    os.replace(tmp_path, path)
+
+
+def load_index(path: Path = GAZETTEER_PATH) -> Gazetteer | None:
+    """Load a saved index. Returns None if the file is missing or unusable."""
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            if f.readline().rstrip("\n") != _HEADER:
+                return None
+            places, keys = [], []
+            for line in f:
+                name, country_code, timezone, population, joined = line.rstrip("\n").split("\t")
+                places.append(Place(name, country_code, timezone, int(population)))
+                keys.append(joined.split("|"))
+    except (OSError, ValueError, EOFError):
+        return None
+    return Gazetteer(places, keys)
+
+
+def build_index(dump_path: Path | None = None, path: Path = GAZETTEER_PATH) -> int:
+    """Build the index file from a dump (downloaded if not given). Returns place count."""
+    if dump_path is None:
+        dump_path = path.parent / Path(GEONAMES_URL).name
+        if not dump_path.exists():
+            logger.info(f"Downloading {GEONAMES_URL}")
+            dump_path.parent.mkdir(parents=True, exist_ok=True)
+            urllib.request.urlretrieve(GEONAMES_URL, dump_path)
+    rows = parse_dump(dump_path)
+    save_index(rows, path)
+    return len(rows)
+
+
+# Singleton: index file, or an empty index if it was not built
+_gazetteer = None
+
+def get_gazetteer() -> Gazetteer:
+    """Get the shared gazetteer (empty if the index file is missing)."""
+    global _gazetteer
+    if _gazetteer is None:
+        gazetteer = load_index()
+        if gazetteer is None:
+            logger.info("Gazetteer index not found, city lookups go to Nominatim")
+            gazetteer = Gazetteer([], [])
+        _gazetteer = gazetteer
+    return _gazetteer
+
+
+def lookup_city(city_name: str) -> Place | None:
+    """Resolve a city name offline; None on a miss."""
+    return get_gazetteer().lookup(city_name)
+
+
+def match_city(city_name: str, min_confidence: float) -> tuple[Place, float] | None:
+    """Best fuzzy match for a misspelled city name, if confident enough."""
+    matches = get_gazetteer().fuzzy(city_name, limit=1)
+    if matches and matches[0][1] >= min_confidence:
+        return matches[0]
+    return None
+
+
+if __name__ == "__main__":
+    import time
+
+    started = time.perf_counter()
+    count = build_index(Path(sys.argv[1]) if len(sys.argv) > 1 else None)
+    logger.info(
+        f"Gazetteer: {count} places -> {GAZETTEER_PATH} "
+        f"({time.perf_counter() - started:.1f}s)"
+    )
@@ -1,19 +1,62 @@
 """
 Geo module.
-City to timezone mapping using Nominatim and TimezoneFinder.
+City to timezone mapping using the offline gazetteer, then Nominatim and
+TimezoneFinder on a miss.
+
+Lookups are async (get_timezone_by_city_async; cached in src/geocache.py):
+Nominatim runs over a pooled keep-alive aiohttp session with bounded
+concurrency, and TimezoneFinder runs in a worker thread, so lookups never
+block the event loop.
 """
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import aiohttp
+from geopy.adapters import AioHTTPAdapter
 from geopy.geocoders import Nominatim
 from timezonefinder import TimezoneFinder
-from geopy.exc import GeocoderTimedOut, GeocoderServiceError
+from geopy.exc import GeopyError
+
+from src import gazetteer, offsets, tzraster
+from src.config import get_geo_settings
 
 
 # Initialize logger
 from src.logger import get_logger
 logger = get_logger()
 
-# Initialize clients
-_geolocator = Nominatim(user_agent="timezone_bot", timeout=5)
-_tf = TimezoneFinder()
+# Errors of the async Nominatim request that count against the circuit breaker
+_SERVICE_ERRORS = (GeopyError, aiohttp.ClientError, asyncio.TimeoutError)
+
+# TimezoneFinder is created on first use: with the raster (src/tzraster.py)
+# only border cells need it
+_tf: TimezoneFinder | None = None
+
+# TimezoneFinder is not thread-safe: a single worker thread keeps it off the loop
+_tf_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="tzfinder")
+
+
+def _get_tf() -> TimezoneFinder:
+    global _tf
+    if _tf is None:
+        _tf = TimezoneFinder()
+    return _tf
+
+
+def _raster_zone_at(lat: float, lng: float) -> str | None:
+    """Timezone from the precomputed raster, or None (border cell / no raster)."""
+    if not get_geo_settings().get("raster", True):
+        return None
+    raster = tzraster.get_raster()
+    if raster is None:
+        return None
+    return raster.zone_at(lat, lng)
+
+
+def timezone_at(lat: float, lng: float) -> str | None:
+    """Timezone at coordinates: raster cell if unambiguous, else exact polygon test."""
+    return _raster_zone_at(lat, lng) or _get_tf().timezone_at(lat=lat, lng=lng)
 
 
 def get_country_flag(country_code: str) -> str:
@@ -23,157 +66,418 @@ def get_country_flag(country_code: str) -> str:
     return "".join(chr(ord(c) + 127397) for c in country_code.upper())
 
 
-def get_timezone_by_city(city_name: str) -> dict | None:
+def _location_dict(city_name: str, timezone: str, country_code: str, display_name: str) -> dict:
+    """Location dict returned by city lookups."""
+    return {
+        "city": city_name.title(),
+        "timezone": timezone,
+        "country_code": country_code,
+        "flag": get_country_flag(country_code),
+        "display_name": display_name
+    }
+
+
+def _gazetteer_location(city_name: str) -> dict | None:
+    """Offline lookup (exact name, then typo-tolerant), or None on a miss."""
+    settings = get_geo_settings()
+    if not settings.get("gazetteer", True):
+        return None
+    place = gazetteer.lookup_city(city_name)
+    if place is not None:
+        return _location_dict(city_name, place.timezone, place.country_code, place.name)
+
+    fuzzy = settings.get("fuzzy", {})
+    if not fuzzy.get("enabled", True):
+        return None
+    match = gazetteer.match_city(city_name, fuzzy.get("min_confidence", 0.85))
+    if match is None:
+        return None
+    place, confidence = match
+    logger.debug(f"Fuzzy match '{city_name}' -> '{place.name}' ({confidence:.2f})")
+    # Show the corrected name, not the typo
+    return _location_dict(place.name, place.timezone, place.country_code, place.name)
+
+
+def _geocoded_location(city_name: str, location, timezone: str | None) -> dict | None:
+    """Location dict from a Nominatim result and its timezone."""
+    if not timezone:
+        return None
+
+    # Extract country code
+    address = location.raw.get("address", {})
+    country_code = address.get("country_code", "").upper()
+
+    return _location_dict(city_name, timezone, country_code, location.address.split(",")[0])  # Short name
+
+
+class GovernorBusy(Exception):
+    """Too many lookups already waiting for the rate limit."""
+
+
+class TokenBucket:
     """
-    Look up timezone by city name.
-    
-    Args:
-        city_name: Name of city (e.g. "Berlin", "New York")
+    Rate-limit governor: `rate` requests per second with bursts up to `burst`.
+    Waiters are served in FIFO order; at most `max_queue` may wait.
+    """
+
+    def __init__(self, rate: float, burst: int = 1, max_queue: int = 20):
+        self.rate = rate
+        self.burst = burst
+        self.max_queue = max_queue
+        self.waiting = 0
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()  # FIFO
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self) -> float:
+        """Wait for a token. Returns the time waited; raises GovernorBusy if the queue is full."""
+        if self.waiting >= self.max_queue:
+            raise GovernorBusy(f"{self.waiting} lookups already waiting")
         
-    Returns:
-        Dict with city, timezone, country, flag or None if not found
+        started = time.monotonic()
+        self.waiting += 1
+        try:
+            async with self._lock:
+                self._refill()
+                while self._tokens < 1:
+                    await asyncio.sleep((1 - self._tokens) / self.rate)
+                    self._refill()
+                self._tokens -= 1
+        finally:
+            self.waiting -= 1
+        return time.monotonic() - started
+
+
+class CircuitBreaker:
+    """
+    Stops calling a degraded service.
+
+    closed: calls pass; `failure_threshold` failures (or slow responses) in
+        a row open the breaker.
+    open: calls are refused for `reset_seconds`.
+    half_open: one probe call is let through; success closes the breaker,
+        failure opens it again.
     """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = 3, slow_seconds: float = 2.0, reset_seconds: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.slow_seconds = slow_seconds
+        self.reset_seconds = reset_seconds
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened = 0  # times opened (metric)
+        self._opened_at = 0.0
+        self._probing = False
+
+    def _set_state(self, state: str):
+        if state != self.state:
+            log = logger.warning if state == self.OPEN else logger.info
+            log(f"Circuit breaker '{self.name}': {self.state} -> {state}")
+            self.state = state
+
+    def allow(self) -> bool:
+        """May a call go out now?"""
+        if self.state == self.OPEN:
+            if time.monotonic() - self._opened_at < self.reset_seconds:
+                return False
+            self._set_state(self.HALF_OPEN)
+        if self.state == self.HALF_OPEN:
+            if self._probing:
+                return False
+            self._probing = True
+        return True
+
+    def release(self):
+        """Give back a half-open probe slot that was not used."""
+        self._probing = False
+
+    def record_success(self, duration: float):
+        """Report a finished call; slow calls count as failures."""
+        if duration > self.slow_seconds:
+            logger.warning(f"Circuit breaker '{self.name}': slow response ({duration:.1f}s)")
+            self.record_failure()
+            return
+        self._probing = False
+        self.failures = 0
+        self._set_state(self.CLOSED)
+
+    def record_failure(self):
+        """Report a failed call."""
+        self._probing = False
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self._opened_at = time.monotonic()
+            if self.state != self.OPEN:
+                self.opened += 1
+            self._set_state(self.OPEN)
+
+
+class _AsyncClient:
+    """Nominatim over a keep-alive aiohttp session, bound to one event loop."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        settings = get_geo_settings()
+        limits = settings.get("rate_limit", {})
+        self.loop = loop
+        self.geolocator = Nominatim(user_agent="timezone_bot", timeout=5, adapter_factory=AioHTTPAdapter)
+        self.semaphore = asyncio.Semaphore(settings.get("max_concurrency", 4))
+        self.governor = TokenBucket(
+            limits.get("requests_per_second", 0.5),  # per process; two bots share Nominatim's 1/s
+            limits.get("burst", 1),
+            limits.get("max_queue", 20)
+        )
+        breaker = settings.get("breaker", {})
+        self.breaker = CircuitBreaker(
+            "nominatim",
+            breaker.get("failure_threshold", 3),
+            breaker.get("slow_seconds", 2.0),
+            breaker.get("reset_seconds", 30)
+        )
+        # normalized city -> in-flight lookup shared by concurrent callers
+        self.inflight: dict[str, asyncio.Task] = {}
+
+
+# One client per process (each bot runs a single event loop)
+_client: _AsyncClient | None = None
+
+# Lookup counters (exposed for monitoring)
+_stats = {
+    "requests": 0,          # sent to Nominatim
+    "coalesced": 0,         # served by another caller's in-flight request
+    "rejected": 0,          # governor queue full
+    "short_circuited": 0,   # refused by the open circuit breaker
+    "wait_seconds_total": 0.0,
+    "wait_seconds_max": 0.0,
+}
+
+def _get_client() -> _AsyncClient:
+    """Async client for the running loop (recreated if the loop changed)."""
+    global _client
+    loop = asyncio.get_running_loop()
+    if _client is None or _client.loop is not loop:
+        _client = _AsyncClient(loop)
+    return _client
+
+
+async def close():
+    """Close the pooled HTTP session (call on shutdown)."""
+    global _client
+    if _client is not None:
+        await _client.geolocator.__aexit__(None, None, None)
+        _client = None
+
+
+async def preload():
+    """Load offline lookup data (gazetteer, raster, TimezoneFinder) now instead of on first use."""
+    settings = get_geo_settings()
+    if settings.get("gazetteer", True):
+        index = await asyncio.to_thread(gazetteer.get_gazetteer)
+        if settings.get("fuzzy", {}).get("enabled", True):
+            await asyncio.to_thread(index.build_fuzzy_index)
+    if settings.get("raster", True):
+        await asyncio.to_thread(tzraster.get_raster)
+    await asyncio.get_running_loop().run_in_executor(_tf_executor, _get_tf)
+
+
+def get_geo_stats() -> dict:
+    """Lookup counters plus governor queue length and circuit breaker state."""
+    if _client is None:
+        return {**_stats, "queue_length": 0, "breaker_state": CircuitBreaker.CLOSED, "breaker_opened": 0}
+    return {
+        **_stats,
+        "queue_length": _client.governor.waiting,
+        "breaker_state": _client.breaker.state,
+        "breaker_opened": _client.breaker.opened,
+    }
+
+
+def reset_geo_stats():
+    """Reset lookup counters."""
+    for key in _stats:
+        _stats[key] = 0
+
+
+async def _geocode(client: _AsyncClient, city_name: str) -> dict | None:
+    """One rate-limited Nominatim request plus TimezoneFinder."""
+    # Degraded service: fail fast so the user gets the time-offset fallback at once
+    if not client.breaker.allow():
+        _stats["short_circuited"] += 1
+        return {"error": "Geocoding service unavailable", "details": "circuit breaker open"}
+    probe = client.breaker.state == CircuitBreaker.HALF_OPEN
+    reported = False
+
     try:
-        location = _geolocator.geocode(city_name, language="en", addressdetails=True)
+        try:
+            waited = await client.governor.acquire()
+        except GovernorBusy as e:
+            _stats["rejected"] += 1
+            logger.warning(f"Geocoding queue full, rejecting '{city_name}': {e}")
+            return {"error": "Geocoding service busy", "details": str(e)}
+        _stats["wait_seconds_total"] += waited
+        _stats["wait_seconds_max"] = max(_stats["wait_seconds_max"], waited)
+
+        # Breaker may have opened while this lookup waited for the governor
+        if client.breaker.state == CircuitBreaker.OPEN:
+            _stats["short_circuited"] += 1
+            return {"error": "Geocoding service unavailable", "details": "circuit breaker open"}
+
+        async with client.semaphore:
+            _stats["requests"] += 1
+            started = time.monotonic()
+            try:
+                location = await client.geolocator.geocode(city_name, language="en", addressdetails=True)
+            except _SERVICE_ERRORS:
+                reported = True
+                client.breaker.record_failure()
+                raise
+            reported = True
+            client.breaker.record_success(time.monotonic() - started)
         
         if not location:
             return None
         
-        # Get timezone from coordinates
-        timezone = _tf.timezone_at(lat=location.latitude, lng=location.longitude)
-        
-        if not timezone:
-            return None
-        
-        # Extract country code
-        address = location.raw.get("address", {})
-        country_code = address.get("country_code", "").upper()
+        # Get timezone from coordinates: raster index on the loop, polygon
+        # test (CPU-bound) off the loop
+        timezone = _raster_zone_at(location.latitude, location.longitude)
+        if timezone is None:
+            timezone = await client.loop.run_in_executor(
+                _tf_executor,
+                lambda: _get_tf().timezone_at(lat=location.latitude, lng=location.longitude)
+            )
+        return _geocoded_location(city_name, location, timezone)
         
-        return {
-            "city": city_name.title(),
-            "timezone": timezone,
-            "country_code": country_code,
-            "flag": get_country_flag(country_code),
-            "display_name": location.address.split(",")[0]  # Short name
-        }
-        
-    except (GeocoderTimedOut, GeocoderServiceError) as e:
+    except _SERVICE_ERRORS as e:
         logger.error(f"Geocoding error for '{city_name}': {e}")
-        return {"error": "Geocoding service unavailable", "details": str(e)}
-
-
-
-# Common timezones by UTC offset (for fallback)
-OFFSET_TO_TIMEZONE = {
-    -12: "Etc/GMT+12",
-    -11: "Pacific/Midway",
-    -10: "Pacific/Honolulu",
-    -9: "America/Anchorage",
-    -8: "America/Los_Angeles",
-    -7: "America/Denver",
-    -6: "America/Chicago",
-    -5: "America/New_York",
-    -4: "America/Halifax",
-    -3: "America/Sao_Paulo",
-    -2: "Atlantic/South_Georgia",
-    -1: "Atlantic/Azores",
-    0: "Europe/London",
-    1: "Europe/Paris",
-    2: "Europe/Helsinki",
-    3: "Europe/Moscow",
-    4: "Asia/Dubai",
-    5: "Asia/Karachi",
-    6: "Asia/Dhaka",
-    7: "Asia/Bangkok",
-    8: "Asia/Singapore",
-    9: "Asia/Tokyo",
-    10: "Australia/Sydney",
-    11: "Pacific/Noumea",
-    12: "Pacific/Auckland",
-}
+        return {"error": "Geocoding service unavailable", "details": str(e) or type(e).__name__}
+    finally:
+        # Rejected, cancelled or failed before an outcome was reported: give
+        # the half-open probe slot back, or the breaker would stay half-open
+        if probe and not reported:
+            client.breaker.release()
 
 
-def get_timezone_by_offset(offset_hours: float) -> dict:
+async def get_timezone_by_city_async(city_name: str) -> dict | None:
     """
-    Find IANA timezone matching given UTC offset.
-    
+    Look up timezone by city name without blocking the event loop.
+
+    Concurrent lookups of the same (normalized) city share one request;
+    requests go through the rate-limit governor (geo.rate_limit).
+
     Args:
-        offset_hours: UTC offset in hours (e.g. 3.0 for UTC+3)
+        city_name: Name of city (e.g. "Berlin", "New York")
         
     Returns:
-        Dict with timezone and display info
+        Dict with city, timezone, country, flag; None if not found;
+        {"error": ...} if the geocoding service failed or is busy
     """
-    # Round to nearest integer
-    rounded_offset = round(offset_hours)
-    
-    # Clamp to valid range
-    rounded_offset = max(-12, min(12, rounded_offset))
-    
-    timezone = OFFSET_TO_TIMEZONE.get(rounded_offset, "Etc/UTC")
-    
-    # Format offset for display
-    sign = "+" if rounded_offset >= 0 else ""
-    city_name = f"UTC{sign}{rounded_offset}"
-    
+    # Off the loop: the first lookup loads the index and builds the fuzzy
+    # index (unless the warm-up already did), and fuzzy scoring is CPU-bound
+    found = await asyncio.to_thread(_gazetteer_location, city_name)
+    if found is not None:
+        return found
+
+    client = _get_client()
+    key = gazetteer.normalize_name(city_name)
+    task = client.inflight.get(key)
+    if task is not None:
+        _stats["coalesced"] += 1
+    else:
+        task = client.loop.create_task(_geocode(client, city_name))
+        client.inflight[key] = task
+        
+        def forget(done: asyncio.Task):
+            if client.inflight.get(key) is done:
+                del client.inflight[key]
+        
+        task.add_done_callback(forget)
+
+    # Shielded: a cancelled caller doesn't cancel the lookup for the others
+    result = await asyncio.shield(task)
+    if result and "error" not in result:
+        result = {**result, "city": city_name.title()}
+    return result
+
+
+
+def _offset_location(timezone: str, offset_seconds: int) -> dict:
+    """Location dict for an offset-based zone ("UTC+5:30")."""
+    sign = "+" if offset_seconds >= 0 else "-"
+    hours, minutes = divmod(abs(offset_seconds) // 60, 60)
+    city_name = f"UTC{sign}{hours}" + (f":{minutes:02d}" if minutes else "")
+
     return {
         "city": city_name,
         "timezone": timezone,
         "flag": "🌐",
-        "offset": rounded_offset
+        "offset": offset_seconds / 3600
     }
 
 
-def resolve_timezone_from_input(user_input: str) -> dict | None:
+def get_timezone_by_offset(offset_hours: float) -> dict:
     """
-    Universal timezone resolver: checks TIME pattern first (via regex),
-    then falls back to city geocoding.
-    
-    This order prevents false geo matches like '19:53' -> Jakarta.
-    
+    Find IANA timezone matching given UTC offset.
+
+    An offset names a zone by its standard time ("UTC-5" is New York all
+    year), as in the standard-offset index (offsets.get_zone_index): the
+    nearest offset in 15-minute steps, represented by its most populous zone.
+
     Args:
-        user_input: City name OR current time string (e.g. "Berlin" or "15:30")
+        offset_hours: UTC offset in hours (e.g. 3.0 for UTC+3, 5.5 for India), clamped to ±12
         
     Returns:
-        Location dict with city/timezone/flag, or None if unresolved
+        Dict with timezone and display info
+    """
+    offset_hours = max(-12, min(12, offset_hours))
+    found = offsets.get_zone_index(standard=True).lookup(round(offset_hours * 3600))
+    if found is None:
+        return _offset_location("Etc/UTC", 0)
+    return _offset_location(*found)
+
+
+def get_timezone_by_time_input(user_input: str) -> dict | None:
+    """
+    Offset-based timezone from the user's current time (e.g. "15:30").
+
+    Returns:
+        Location dict (see get_timezone_by_offset), or None if the input
+        is not a time
     """
     from datetime import datetime, timezone as tz
     from src import capture
-    from src.transform import parse_time_string
-    
-    user_input = user_input.strip()
-    
-    # 1. Check if input matches time pattern (regex) — FIRST
-    times = capture.extract_times(user_input)
-    if times:
-        try:
-            user_time = parse_time_string(times[0])
-            now_utc = datetime.now(tz.utc)
-            
-            # Calculate offset in hours
-            utc_hours = now_utc.hour + now_utc.minute / 60
-            user_hours = user_time.hour + user_time.minute / 60
-            offset = user_hours - utc_hours
-            
-            logger.debug(f"Offset calc: user_input='{user_input}' user_time={user_time} utc_now={now_utc.strftime('%H:%M')} offset={offset:.2f}")
-            
-            # Handle day boundary
-            if offset > 12:
-                offset -= 24
-            elif offset < -12:
-                offset += 24
-            
-            logger.debug(f"Final offset after boundary: {offset:.2f}")
-            
-            return get_timezone_by_offset(offset)
-            
-        except Exception as e:
-            logger.error(f"Time parsing error: {e}")
-            # Fall through to city lookup
-    
-    # 2. Not a time pattern — try city geocoding
-    location = get_timezone_by_city(user_input)
-    if location and "error" not in location:
-        return location
-    
-    return None
 
+    times = capture.find_times(user_input.strip())
+    if not times:
+        return None
+
+    try:
+        user_time = times[0]
+        now_utc = datetime.now(tz.utc)
+        
+        # Calculate offset in minutes
+        utc_minutes = now_utc.hour * 60 + now_utc.minute
+        offset = user_time.minutes - utc_minutes
+        
+        logger.debug(f"Offset calc: user_input='{user_input}' user_time={user_time.text} utc_now={now_utc.strftime('%H:%M')} offset={offset}m")
+        
+        # Handle day boundary: [-12h, +12h), the index also weighs offset ± 24h
+        offset = (offset + 720) % 1440 - 720
+        
+        found = offsets.get_zone_index().lookup_clock(offset * 60)
+        logger.debug(f"Final offset after boundary: {offset}m -> {found}")
+        if found is None:
+            return _offset_location("Etc/UTC", 0)
+        return _offset_location(*found)
+        
+    except Exception as e:
+        logger.error(f"Time parsing error: {e}")
+        return None
@@ -0,0 +1,136 @@
+"""
+Geocache module.
+Cached city → timezone lookups: in-process LRU, then the geocode_cache table
+in storage, then geo (gazetteer / Nominatim).
+
+Found cities are kept for geo.cache.ttl_seconds, "not found" for the shorter
+geo.cache.negative_ttl_seconds. Service errors are never cached. Entries are
+shared by every spelling of a query, so the caller's own spelling is not
+stored: hits show the current caller's city name.
+"""
+import asyncio
+from collections import OrderedDict
+from time import time
+
+from src import geo
+from src.config import get_geo_settings
+from src.gazetteer import normalize_name
+from src.logger import get_logger
+from src.storage import storage
+
+logger = get_logger()
+
+_DEFAULTS = {
+    "enabled": True,
+    "ttl_seconds": 30 * 86400,
+    "negative_ttl_seconds": 86400,
+    "max_size": 1024,
+}
+
+# normalized query -> (location or None, expires_at)
+_lru: OrderedDict[str, tuple[dict | None, float]] = OrderedDict()
+
+# Where lookups were answered (exposed for monitoring)
+_stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+
+
+def _settings() -> dict:
+    return {**_DEFAULTS, **get_geo_settings().get("cache", {})}
+
+
+def _shared(location: dict | None, city_name: str) -> dict | None:
+    """
+    Location as cached for every spelling of the key: without the caller's
+    own city spelling (a corrected name, e.g. from a fuzzy match, is kept).
+    """
+    if location is None or location.get("city", "").strip() != city_name.strip().title():
+        return location
+    return {k: v for k, v in location.items() if k != "city"}
+
+
+def _for_caller(location: dict | None, city_name: str) -> dict | None:
+    """Cached location with the caller's spelling as city (unless corrected)."""
+    if location is None:
+        return None
+    return {"city": city_name.strip().title(), **location}
+
+
+def _remember(key: str, location: dict | None, expires_at: float, max_size: int):
+    _lru[key] = (location, expires_at)
+    _lru.move_to_end(key)
+    while len(_lru) > max_size:
+        _lru.popitem(last=False)
+
+
+async def get_timezone_by_city(city_name: str) -> dict | None:
+    """
+    Cached geo.get_timezone_by_city_async.
+
+    Returns:
+        Dict with city, timezone, country, flag; None if not found;
+        {"error": ...} if the geocoding service failed
+    """
+    settings = _settings()
+    key = normalize_name(city_name)
+    if not settings["enabled"] or not key:
+        return await geo.get_timezone_by_city_async(city_name)
+
+    now = time()
+    cached = _lru.get(key)
+    if cached is not None and now < cached[1]:
+        _lru.move_to_end(key)
+        _stats["memory_hits"] += 1
+        return _for_caller(cached[0], city_name)
+
+    try:
+        row = await storage.get_geocode(key)
+    except Exception as e:
+        logger.warning(f"Geocode cache read failed for '{key}': {e}")
+        row = None
+    if row is not None:
+        _stats["disk_hits"] += 1
+        _remember(key, row["location"], row["expires_at"], settings["max_size"])
+        return _for_caller(row["location"], city_name)
+
+    _stats["misses"] += 1
+    location = await geo.get_timezone_by_city_async(city_name)
+    if location and "error" in location:
+        return location
+
+    ttl = settings["ttl_seconds"] if location else settings["negative_ttl_seconds"]
+    shared = _shared(location, city_name)
+    _remember(key, shared, now + ttl, settings["max_size"])
+    try:
+        await storage.set_geocode(key, shared, now + ttl)
+    except Exception as e:
+        logger.warning(f"Geocode cache write failed for '{key}': {e}")
+    return location
+
+
+async def resolve_timezone_from_input(user_input: str) -> dict | None:
+    """Cached geo.resolve_timezone_from_input: time first, then city."""
+    user_input = user_input.strip()
+
+    # Off the loop: a cold zone index is built (transition table plus
+    # gazetteer populations) on first use
+    location = await asyncio.to_thread(geo.get_timezone_by_time_input, user_input)
+    if location:
+        return location
+
+    location = await get_timezone_by_city(user_input)
+    if location and "error" not in location:
+        return location
+
+    return None
+
+
+def get_geocache_stats() -> dict:
+    """Lookup counters and number of entries in memory."""
+    return {**_stats, "size": len(_lru)}
+
+
+def clear_geocache():
+    """Drop the in-process LRU and reset counters (the table is kept)."""
+    _lru.clear()
+    for key in _stats:
+        _stats[key] = 0
@@ -9,7 +9,8 @@ from aiogram.fsm.storage.memory import MemoryStorage
 
 from src.config import get_telegram_token
 from src.logger import get_logger
-from src.storage import storage
+from src import geo, stats, warmup
+from src.storage import membership, storage
 from src.commands import router, PassiveCollectionMiddleware
 
 logger = get_logger()
@@ -24,6 +25,12 @@ async def on_startup(bot: Bot):
     await storage.init()
     logger.info("Database initialized")
     
+    # Preload timezone/geo caches (in the background by default)
+    await warmup.start()
+    
+    # Log counters periodically (stats.interval_seconds)
+    stats.start()
+    
 
 
 
@@ -42,8 +49,9 @@ async def main():
     # Register startup hook
     dp.startup.register(on_startup)
     
-    # Register middleware
-    dp.message.middleware(PassiveCollectionMiddleware())
+    # Register middleware (outer: runs even when no handler matches,
+    # e.g. messages dropped by TimeMentionFilter)
+    dp.message.outer_middleware(PassiveCollectionMiddleware())
     
     # Register routers
     dp.include_router(router)
@@ -56,7 +64,12 @@ async def main():
     try:
         await dp.start_polling(bot)
     finally:
+        warmup.cancel()
+        stats.cancel()
         await bot.session.close()
+        await geo.close()
+        await membership.close()
+        await storage.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,83 @@
+"""
+Mmap file module.
+File layout shared by the memory-mapped data files (src/tzdb.py,
+src/tzraster.py): a struct header starting with magic, format version and
+byte order, then 8-byte aligned arrays, then newline-separated names.
+"""
+import mmap
+import os
+import struct
+import sys
+from array import array
+from pathlib import Path
+
+NATIVE_ORDER = b"<" if sys.byteorder == "little" else b">"
+
+
+def pad(n: int) -> int:
+    """Padding to keep arrays 8-byte aligned."""
+    return -n % 8
+
+
+def save(path: Path, header: bytes, arrays: list[array], names: list[str]):
+    """Write header, arrays and names to a memory-mappable file (atomic replace)."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(f".tmp{os.getpid()}")
+    with open(tmp_path, "wb") as f:
+        f.write(header)
+        f.write(b"\0" * pad(f.tell()))
+        for arr in arrays:
+            f.write(arr.tobytes())
+            f.write(b"\0" * pad(f.tell()))
+        f.write("\n".join(names).encode("utf-8"))
+    os.replace(tmp_path, path)
+
+
+def names_size(names: list[str]) -> int:
+    """Size in bytes of the names section written by save()."""
+    return len("\n".join(names).encode("utf-8"))
+
+
+def load(
+    path: Path,
+    header: struct.Struct,
+    magic: bytes,
+    format_version: int,
+) -> tuple[memoryview, tuple] | None:
+    """
+    Memory-map a file and check its header.
+
+    Returns:
+        (view of the whole file, header fields after magic/version/byte order),
+        or None if the file is missing, truncated, foreign or another format
+    """
+    try:
+        with open(path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    try:
+        fields = header.unpack_from(mm, 0)
+    except struct.error:
+        return None
+    if fields[0] != magic or fields[1] != format_version or fields[2] != NATIVE_ORDER:
+        return None
+    return memoryview(mm), fields[3:]
+
+
+def read_body(
+    view: memoryview,
+    header: struct.Struct,
+    arrays: list[tuple[str, int]],
+    names_size: int,
+) -> tuple[list[memoryview], list[str]]:
+    """Zero-copy arrays ((typecode, count) each) and the names after the header."""
+    pos = header.size + pad(header.size)
+    result = []
+    for code, count in arrays:
+        size = struct.calcsize(code) * count
+        result.append(view[pos:pos + size].cast(code))
+        pos += size + pad(size)
+    names = bytes(view[pos:pos + names_size]).decode("utf-8").split("\n")
+    return result, names
@@ -0,0 +1,298 @@
+"""
+Offsets module.
+Cached UTC offsets per timezone, valid for the zone's current offset window
+(i.e. until its next DST transition), and the reverse index: UTC offset →
+representative zone, rebuilt when any zone's offset changes.
+"""
+import threading
+from collections import Counter
+from datetime import datetime
+from importlib import resources
+from time import time
+from typing import NamedTuple
+from zoneinfo import ZoneInfo, available_timezones
+
+from src import gazetteer, tzdb
+from src.config import get_transform_settings
+
+DAY = 86400
+
+# Zone index slots: 15 minutes from UTC-12 to UTC+14 (the full IANA range)
+QUARTER = 900
+MIN_OFFSET = -12 * 3600
+MAX_OFFSET = 14 * 3600
+
+# Geographic zone areas (preferred over fixed Etc/GMT±N zones)
+_AREAS = {"Africa", "America", "Antarctica", "Asia", "Atlantic", "Australia", "Europe", "Indian", "Pacific"}
+
+# How many days to look for a transition on each side of an instant
+_SEARCH_DAYS = 60
+
+# Representative zones when the gazetteer has no population data, most
+# preferred first: the well-known zone of each standard whole-hour offset,
+# then fractional and day-boundary offsets, then tiny populations
+_PRIORITY = [
+    "America/New_York", "Europe/London", "Europe/Paris", "Europe/Moscow",
+    "Asia/Tokyo", "Asia/Kolkata", "America/Los_Angeles", "America/Chicago",
+    "America/Sao_Paulo", "Asia/Singapore", "Asia/Dubai", "Asia/Karachi",
+    "Asia/Dhaka", "Asia/Bangkok", "Australia/Sydney", "Europe/Helsinki",
+    "America/Denver", "America/Halifax", "America/Anchorage", "Pacific/Honolulu",
+    "Pacific/Auckland", "Pacific/Noumea", "Atlantic/Azores", "Atlantic/South_Georgia",
+    "Asia/Tehran", "Asia/Kabul", "Asia/Kathmandu", "Asia/Yangon", "America/St_Johns",
+    "Australia/Adelaide", "Australia/Darwin", "Pacific/Tongatapu", "Pacific/Kiritimati",
+    "Pacific/Chatham", "Pacific/Marquesas", "Australia/Eucla", "Pacific/Midway",
+]
+_PRIORITY_SCORE = {name: len(_PRIORITY) - i for i, name in enumerate(_PRIORITY)}
+
+
+class OffsetWindow(NamedTuple):
+    """Span of UTC time during which a zone keeps the same offset."""
+    start: int   # UTC timestamp, inclusive
+    end: int     # UTC timestamp, exclusive
+    offset: int  # UTC offset in seconds
+
+
+# Current window per zone name; an entry expires at the zone's next transition
+_windows: dict[str, OffsetWindow] = {}
+
+# Cache counters (exposed for monitoring)
+_stats = {"hits": 0, "misses": 0}
+
+
+def _find_edge(tz: ZoneInfo, ts: int, offset: int, step: int) -> int:
+    """
+    Walk from ts in day-sized steps (step = +1/-1) until the offset changes,
+    then bisect down to the exact second. Returns the last timestamp that
+    still has `offset` (or the search horizon if there is no transition).
+    """
+    same = ts
+    changed = None
+    for _ in range(_SEARCH_DAYS):
+        probe = same + step * DAY
+        if tzdb.zoneinfo_offset(tz, probe) != offset:
+            changed = probe
+            break
+        same = probe
+
+    if changed is None:
+        return same
+
+    while abs(changed - same) > 1:
+        mid = (same + changed) // 2
+        if tzdb.zoneinfo_offset(tz, mid) == offset:
+            same = mid
+        else:
+            changed = mid
+    return same
+
+
+def compute_window(tz_name: str, ts: int) -> OffsetWindow:
+    """
+    Compute the offset window of a zone around UTC timestamp ts.
+    Uses the tzdb transition table when enabled, zoneinfo probing otherwise
+    (or when ts/zone is not covered by the table).
+    """
+    if get_transform_settings().get("offset_backend", "tzdb") == "tzdb":
+        window = tzdb.get_table().window(tz_name, ts)
+        if window is not None:
+            return OffsetWindow(*window)
+    
+    tz = ZoneInfo(tz_name)
+    offset = tzdb.zoneinfo_offset(tz, ts)
+    start = _find_edge(tz, ts, offset, -1)
+    end = _find_edge(tz, ts, offset, +1) + 1
+    return OffsetWindow(start, end, offset)
+
+
+def get_window(tz_name: str, ts: int) -> OffsetWindow:
+    """Get the (cached) offset window of a zone containing UTC timestamp ts."""
+    window = _windows.get(tz_name)
+    if window is not None and window.start <= ts < window.end:
+        _stats["hits"] += 1
+        return window
+    
+    _stats["misses"] += 1
+    window = compute_window(tz_name, ts)
+    _windows[tz_name] = window
+    return window
+
+
+def utc_offset_seconds(tz_name: str, ts: int) -> int:
+    """UTC offset in seconds of a zone at UTC timestamp ts."""
+    return get_window(tz_name, ts).offset
+
+
+def get_offset_stats() -> dict:
+    """Cache hit/miss counters and number of cached zones."""
+    return {**_stats, "size": len(_windows)}
+
+
+def clear_cache():
+    """Drop all cached windows and zone indexes, and reset counters."""
+    _windows.clear()
+    _zone_indexes.clear()
+    _next_indexes.clear()
+    for key in _stats:
+        _stats[key] = 0
+
+
+class ZoneIndex:
+    """Representative zone per 15-minute UTC offset slot, valid from valid_from until valid_until."""
+
+    def __init__(self, zones: list[str | None], weights: list[tuple], valid_until: int, valid_from: int = 0):
+        self.zones = zones          # slot -> zone, None if no zone has that offset now
+        self.weights = weights      # slot -> (population, priority) of the chosen zone
+        self.valid_from = valid_from
+        self.valid_until = valid_until
+
+        # slot -> nearest slot with a zone (ties: the heavier one)
+        filled = [i for i, zone in enumerate(zones) if zone is not None]
+        self.nearest = [self._nearest(i, filled) for i in range(len(zones))]
+
+    def _nearest(self, slot: int, filled: list[int]) -> int | None:
+        if not filled:
+            return None
+        distance = min(abs(slot - j) for j in filled)
+        return max((j for j in filled if abs(slot - j) == distance), key=lambda j: self.weights[j])
+
+    def _slot(self, offset: int) -> int:
+        offset = max(MIN_OFFSET, min(MAX_OFFSET, offset))
+        return round((offset - MIN_OFFSET) / QUARTER)
+
+    def _entry(self, slot: int) -> tuple[str, int]:
+        return self.zones[slot], MIN_OFFSET + slot * QUARTER
+
+    def lookup(self, offset: int) -> tuple[str, int] | None:
+        """
+        Zone for the nearest valid offset.
+
+        Args:
+            offset: UTC offset in seconds (rounded to 15 minutes, clamped to the IANA range)
+
+        Returns:
+            (zone, exact offset in seconds), or None if the index is empty
+        """
+        slot = self.nearest[self._slot(offset)]
+        return None if slot is None else self._entry(slot)
+
+    def lookup_clock(self, offset: int) -> tuple[str, int] | None:
+        """
+        Like lookup, for an offset derived from a wall clock time: the date is
+        unknown, so offset ± 24h (e.g. UTC-11 vs UTC+13) is equally plausible
+        and the more populous valid offset wins.
+        """
+        exact = [
+            slot
+            for candidate in (offset, offset + DAY, offset - DAY)
+            if MIN_OFFSET <= candidate <= MAX_OFFSET
+            for slot in [self._slot(candidate)]
+            if self.zones[slot] is not None
+        ]
+        if not exact:
+            return self.lookup(offset)
+        return self._entry(max(exact, key=lambda slot: self.weights[slot]))
+
+
+def _candidate_zones() -> list[str]:
+    """Geographic zones plus whole-hour Etc/GMT±N fallbacks, sorted by name."""
+    return sorted(
+        name for name in available_timezones()
+        if name.split("/")[0] in _AREAS or (name.startswith("Etc/GMT") and len(name) > 7)
+    )
+
+
+def _representative_zones() -> set[str]:
+    """
+    Zones tzdata lists as the representative of a present-day clock
+    (zonenow.tab); empty if unavailable.
+    """
+    try:
+        table = resources.files("tzdata").joinpath("zoneinfo", "zonenow.tab").read_text(encoding="utf-8")
+    except (ModuleNotFoundError, OSError):
+        return set()
+    return {line.split("\t")[2] for line in table.splitlines() if line and not line.startswith("#")}
+
+
+def _zone_populations() -> Counter:
+    """Population per zone from the gazetteer (empty if it was not built)."""
+    populations = Counter()
+    for place in gazetteer.get_gazetteer().places:
+        populations[place.timezone] += place.population
+    return populations
+
+
+def _standard_offset(name: str, ts: int) -> int:
+    """Standard-time UTC offset in seconds of a zone at UTC timestamp ts (DST removed)."""
+    local = datetime.fromtimestamp(ts, ZoneInfo(name))
+    return int((local.utcoffset() - local.dst()).total_seconds())
+
+
+def build_zone_index(ts: int, populations: dict[str, int], standard: bool = False) -> ZoneIndex:
+    """
+    Index every zone by its UTC offset at timestamp ts (its standard-time
+    offset if standard). Each slot keeps the most populous zone; without
+    population data the _PRIORITY zones win, then tzdata's representative
+    zones, then other geographic zones, then Etc/GMT±N.
+
+    Doesn't touch the window cache, so it can run in a worker thread.
+    """
+    size = (MAX_OFFSET - MIN_OFFSET) // QUARTER + 1
+    zones: list[str | None] = [None] * size
+    ranks: list[tuple[int, int, bool, bool]] = [(-1, 0, False, False)] * size
+    representative = _representative_zones()
+    windows = {name: compute_window(name, ts) for name in _candidate_zones()}
+
+    for name, window in windows.items():
+        offset = _standard_offset(name, ts) if standard else window.offset
+        if offset % QUARTER or not MIN_OFFSET <= offset <= MAX_OFFSET:
+            continue
+        slot = (offset - MIN_OFFSET) // QUARTER
+        rank = (
+            populations.get(name, 0),
+            _PRIORITY_SCORE.get(name, 0),
+            name in representative,
+            not name.startswith("Etc/"),
+        )
+        if rank > ranks[slot]:
+            zones[slot], ranks[slot] = name, rank
+
+    weights = [(max(0, population), priority) for population, priority, _, _ in ranks]
+    return ZoneIndex(zones, weights, min(window.end for window in windows.values()), ts)
+
+
+# Current zone index by kind (standard offsets or not); replaced once any zone changes offset
+_zone_indexes: dict[bool, ZoneIndex] = {}
+
+# Index for the next window of each kind, built ahead in a thread
+_next_indexes: dict[bool, ZoneIndex] = {}
+
+
+def _prepare_next(index: ZoneIndex, standard: bool):
+    """Build the index following `index` in a background thread."""
+    def build():
+        upcoming = build_zone_index(index.valid_until, _zone_populations(), standard)
+        if _zone_indexes.get(standard) is index:  # not replaced or cleared meanwhile
+            _next_indexes[standard] = upcoming
+
+    threading.Thread(target=build, name="zone-index", daemon=True).start()
+
+
+def get_zone_index(ts: int | None = None, standard: bool = False) -> ZoneIndex:
+    """
+    Get the zone index for UTC timestamp ts (now by default): by current
+    offsets, or by standard-time offsets if standard. At a transition the
+    next index, prepared in a background thread, replaces it; it is only
+    built inline if not ready yet.
+    """
+    if ts is None:
+        ts = int(time())
+    index = _zone_indexes.get(standard)
+    if index is None or not index.valid_from <= ts < index.valid_until:
+        upcoming = _next_indexes.pop(standard, None)
+        if upcoming is not None and upcoming.valid_from <= ts < upcoming.valid_until:
+            index = upcoming
+        else:
+            index = build_zone_index(ts, _zone_populations(), standard)
+        _zone_indexes[standard] = index
+        _prepare_next(index, standard)
+    return index
@@ -0,0 +1,93 @@
+"""
+Stats module.
+Periodic log line with the in-process counters: message pre-filter and regex
+rejections, offset window cache, conversion memo, geocoding (governor
+rejections, breaker state), geocache, storage cache and the last warm-up.
+
+Every bot process logs its own counters every stats.interval_seconds and
+once more on shutdown.
+"""
+import asyncio
+
+from src import capture, geo, geocache, offsets, transform, warmup
+from src.config import get_stats_settings
+from src.logger import get_logger
+from src.storage import storage
+from src.storage.cached import CachedStorage
+
+logger = get_logger()
+
+_DEFAULTS = {
+    "interval_seconds": 600,
+}
+
+# Periodic log task (kept referenced so it isn't garbage collected)
+_task: asyncio.Task | None = None
+
+
+def _settings() -> dict:
+    return {**_DEFAULTS, **get_stats_settings()}
+
+
+def collect() -> dict:
+    """Counters of every component, keyed by component."""
+    stats = {
+        "capture": capture.get_capture_stats(),
+        "offsets": offsets.get_offset_stats(),
+        "memo": transform.get_memo_stats(),
+        "geo": geo.get_geo_stats(),
+        "geocache": geocache.get_geocache_stats(),
+        "warmup": warmup.get_warmup_stats(),
+    }
+    if isinstance(storage, CachedStorage):
+        stats["storage"] = storage.get_cache_stats()
+    return stats
+
+
+def _format(stats: dict, prefix: str = "") -> list[str]:
+    """key=value pairs of nested counters ("geo.rejected=3")."""
+    pairs = []
+    for key, value in stats.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            pairs.extend(_format(value, f"{name}."))
+        elif isinstance(value, float):
+            pairs.append(f"{name}={value:.2f}")
+        else:
+            pairs.append(f"{name}={value}")
+    return pairs
+
+
+def log_stats():
+    """Log all counters in one line."""
+    logger.info("Stats: " + " ".join(_format(collect())))
+
+
+async def _run(interval: float):
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            log_stats()
+        except Exception as e:
+            logger.warning(f"Stats log failed: {e}")
+
+
+def start():
+    """Start the periodic stats log (stats.interval_seconds, 0 = off)."""
+    global _task
+    interval = _settings()["interval_seconds"]
+    if interval and interval > 0:
+        _task = asyncio.create_task(_run(interval))
+
+
+def cancel():
+    """Stop the periodic log and log the counters a last time (call on shutdown)."""
+    global _task
+    if _task is None:
+        return
+    _task.cancel()
+    _task = None
+    try:
+        log_stats()
+    except Exception as e:
+        logger.warning(f"Stats log failed: {e}")
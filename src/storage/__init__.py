@@ -1,7 +1,53 @@
-from src.config import PROJECT_ROOT
-from src.storage.sqlite import SQLiteStorage
+from src.config import PROJECT_ROOT, get_storage_settings
+from src.storage.base import Storage
+from src.storage.cached import CachedStorage
+from src.storage.membership import MembershipRecorder
+from src.storage.pooled import PooledSQLiteStorage
+from src.storage.sqlite import SQLiteStorage, tuning_pragmas
 
-# Singleton instance
-storage = SQLiteStorage(PROJECT_ROOT / "data" / "bot.db")
+DB_PATH = PROJECT_ROOT / "data" / "bot.db"
 
-__all__ = ["storage"]
+
+def _create_storage() -> Storage:
+    """
+    Storage backend for storage.mode ("single" connection or "pooled") and
+    storage.tuning, behind the read-through cache if storage.cache is enabled.
+    """
+    settings = get_storage_settings()
+    pragmas = tuning_pragmas(settings.get("tuning", "durable"), settings.get("pragmas"))
+    if settings.get("mode", "single") == "pooled":
+        backend = PooledSQLiteStorage(
+            DB_PATH,
+            readers=settings.get("readers", 3),
+            batch_size=settings.get("write_batch_max", 100),
+            pragmas=pragmas,
+        )
+    else:
+        backend = SQLiteStorage(DB_PATH, pragmas)
+
+    cache = settings.get("cache", {})
+    if not cache.get("enabled", True):
+        return backend
+    return CachedStorage(
+        backend,
+        max_users=cache.get("max_users", 10000),
+        max_chats=cache.get("max_chats", 1000),
+    )
+
+
+def _create_membership(storage: Storage) -> MembershipRecorder:
+    """Write-behind membership recorder for storage.write_behind."""
+    settings = get_storage_settings().get("write_behind", {})
+    return MembershipRecorder(
+        storage,
+        enabled=settings.get("enabled", True),
+        flush_seconds=settings.get("flush_seconds", 1.0),
+        max_pending=settings.get("max_pending", 500),
+    )
+
+
+# Singleton instances
+storage = _create_storage()
+membership = _create_membership(storage)
+
+__all__ = ["storage", "membership"]
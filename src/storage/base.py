@@ -1,17 +1,46 @@
 from abc import ABC, abstractmethod
-from typing import List, Dict, Optional
+from typing import Dict, Iterable, List, Optional, Tuple
 
 class Storage(ABC):
     """
     Abstract Interface for Database Storage.
     Supports multi-platform (Telegram, Discord) via 'platform' parameter.
+    
+    Tracks an in-process membership version per chat, so callers can cache
+    data derived from a roster (e.g. reply layouts) until it changes.
     """
 
+    def __init__(self):
+        self._users_version = 0
+        self._chat_versions: Dict[tuple, int] = {}
+
+    def _touch_chat(self, chat_id: int, platform: str):
+        """Mark a chat roster as changed."""
+        key = (chat_id, platform)
+        self._chat_versions[key] = self._chat_versions.get(key, 0) + 1
+
+    def _touch_users(self):
+        """Mark user data as changed (affects every chat the user is in)."""
+        self._users_version += 1
+
+    async def get_chat_version(self, chat_id: int, platform: str) -> tuple:
+        """Membership version of a chat; changes on every write affecting it."""
+        return (self._users_version, self._chat_versions.get((chat_id, platform), 0))
+
     @abstractmethod
     async def init(self):
         """Initialize database connection and schema."""
         pass
 
+    @abstractmethod
+    async def close(self):
+        """Close database connections (call on shutdown)."""
+        pass
+
+    async def flush(self):
+        """Wait until queued writes are committed (no-op if writes are synchronous)."""
+        pass
+
     @abstractmethod
     async def get_user(self, user_id: int, platform: str) -> Optional[Dict]:
         """Get user by ID and platform. Returns None if not found."""
@@ -35,6 +64,14 @@ class Storage(ABC):
         """Register user as member of a chat."""
         pass
 
+    @abstractmethod
+    async def add_chat_members(self, members: Iterable[Tuple[int, int, str]]) -> int:
+        """
+        Register many (chat_id, user_id, platform) memberships in one transaction.
+        Returns the number of new rows.
+        """
+        pass
+
     @abstractmethod
     async def get_chat_members(self, chat_id: int, platform: str) -> List[Dict]:
         """Get all users in a chat with their timezone info."""
@@ -49,3 +86,26 @@ class Storage(ABC):
     async def clear_chat_members(self, chat_id: int, platform: str):
         """Remove all members of a chat (e.g. when bot is kicked)."""
         pass
+
+    @abstractmethod
+    async def get_user_timezones(self) -> List[str]:
+        """Distinct timezones of all users (any platform)."""
+        pass
+
+    @abstractmethod
+    async def get_popular_cities(self, limit: int) -> List[str]:
+        """Cities users set most often, most common first (offset-based entries excluded)."""
+        pass
+
+    @abstractmethod
+    async def get_geocode(self, query: str) -> Optional[Dict]:
+        """
+        Cached city lookup for a normalized query:
+        {"location": dict | None, "expires_at": float}, or None if not cached/expired.
+        """
+        pass
+
+    @abstractmethod
+    async def set_geocode(self, query: str, location: Optional[Dict], expires_at: float):
+        """Cache a city lookup result (None = not found) until expires_at (UNIX time)."""
+        pass
@@ -0,0 +1,173 @@
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from src.logger import get_logger
+from src.storage.base import Storage
+
+logger = get_logger()
+
+
+class _LRU:
+    """Bounded mapping with hit/miss counters."""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.entries: OrderedDict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        """Entry for key (marked recently used), without counting."""
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            return self.entries[key]
+        return default
+
+    def count(self, hit: bool):
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+
+    def put(self, key, value):
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def pop(self, key):
+        self.entries.pop(key, None)
+
+    def stats(self) -> Dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "size": len(self.entries),
+        }
+
+
+# Cached "no such user" (distinct from a cache miss)
+_MISSING = object()
+
+
+class CachedStorage(Storage):
+    """
+    Read-through cache in front of another Storage (storage.cache).
+
+    Users are cached by (user_id, platform), unknown users included, and
+    replaced by set_user. Chat rosters are cached with the membership version
+    of the wrapped storage (get_chat_version) and reused while it is
+    unchanged, so any write that really changes a roster or a user's data
+    invalidates it, and no-op writes don't. Everything else is forwarded.
+
+    Cached rows are shared between callers: treat them as read-only.
+    The cache is per process: each bot process serves its own platform.
+    """
+
+    def __init__(self, inner: Storage, max_users: int = 10000, max_chats: int = 1000):
+        super().__init__()
+        self.inner = inner
+        self._users = _LRU(max_users)
+        self._rosters = _LRU(max_chats)
+        # Bumped by set_user: a get_user that raced a write doesn't cache its row
+        self._user_writes = 0
+
+    async def init(self):
+        """Initialize the wrapped storage and start with empty caches."""
+        self.clear_cache()
+        await self.inner.init()
+
+    async def close(self):
+        """Close the wrapped storage and log the cache hit rates."""
+        users, rosters = self._users.stats(), self._rosters.stats()
+        if users["hits"] + users["misses"] + rosters["hits"] + rosters["misses"]:
+            logger.info(
+                f"Storage cache: users {users['hit_rate']:.0%} of {users['hits'] + users['misses']}, "
+                f"rosters {rosters['hit_rate']:.0%} of {rosters['hits'] + rosters['misses']}"
+            )
+        await self.inner.close()
+
+    async def flush(self):
+        await self.inner.flush()
+
+    async def get_chat_version(self, chat_id: int, platform: str) -> tuple:
+        return await self.inner.get_chat_version(chat_id, platform)
+
+    async def get_user(self, user_id: int, platform: str) -> Optional[Dict]:
+        key = (user_id, platform)
+        cached = self._users.get(key)
+        self._users.count(cached is not None)
+        if cached is not None:
+            return None if cached is _MISSING else cached
+
+        writes = self._user_writes
+        user = await self.inner.get_user(user_id, platform)
+        if writes == self._user_writes:
+            self._users.put(key, _MISSING if user is None else user)
+        return user
+
+    async def set_user(
+        self,
+        user_id: int,
+        platform: str,
+        city: str,
+        timezone: str,
+        flag: str = "",
+        username: str = ""
+    ):
+        self._user_writes += 1
+        self._users.pop((user_id, platform))
+        try:
+            await self.inner.set_user(user_id, platform, city, timezone, flag, username)
+        finally:
+            self._user_writes += 1
+
+    async def add_chat_member(self, chat_id: int, user_id: int, platform: str):
+        await self.inner.add_chat_member(chat_id, user_id, platform)
+
+    async def add_chat_members(self, members: Iterable[Tuple[int, int, str]]) -> int:
+        return await self.inner.add_chat_members(members)
+
+    async def get_chat_members(self, chat_id: int, platform: str) -> List[Dict]:
+        key = (chat_id, platform)
+        version = await self.inner.get_chat_version(chat_id, platform)
+        cached = self._rosters.get(key)
+        fresh = cached is not None and cached[0] == version
+        self._rosters.count(fresh)
+        if fresh:
+            return list(cached[1])
+
+        members = await self.inner.get_chat_members(chat_id, platform)
+        # Cache under the version read before the query: a write racing the
+        # query bumps the version, so the next call re-reads
+        self._rosters.put(key, (version, members))
+        return list(members)
+
+    async def remove_chat_member(self, chat_id: int, user_id: int, platform: str):
+        await self.inner.remove_chat_member(chat_id, user_id, platform)
+
+    async def clear_chat_members(self, chat_id: int, platform: str):
+        await self.inner.clear_chat_members(chat_id, platform)
+
+    async def get_user_timezones(self) -> List[str]:
+        return await self.inner.get_user_timezones()
+
+    async def get_popular_cities(self, limit: int) -> List[str]:
+        return await self.inner.get_popular_cities(limit)
+
+    async def get_geocode(self, query: str) -> Optional[Dict]:
+        return await self.inner.get_geocode(query)
+
+    async def set_geocode(self, query: str, location: Optional[Dict], expires_at: float):
+        await self.inner.set_geocode(query, location, expires_at)
+
+    def get_cache_stats(self) -> Dict:
+        """Hit/miss counters, hit rate and size of the user and roster caches."""
+        return {"users": self._users.stats(), "rosters": self._rosters.stats()}
+
+    def clear_cache(self):
+        """Drop cached users and rosters and reset counters."""
+        self._users = _LRU(self._users.max_size)
+        self._rosters = _LRU(self._rosters.max_size)
@@ -0,0 +1,112 @@
+import asyncio
+from typing import Optional, Set, Tuple
+
+from src.logger import get_logger
+from src.storage.base import Storage
+
+logger = get_logger()
+
+
+class MembershipRecorder:
+    """
+    Write-behind buffer for passive chat membership registration.
+
+    record() only adds (chat_id, user_id, platform) to an in-memory set
+    (duplicates collapse); the set is written with one bulk insert every
+    flush_seconds, or as soon as it holds max_pending entries. close()
+    writes what is left. A failed flush keeps its entries for the next one.
+    remove_chat_member/clear_chat_members drop matching entries first, so a
+    later flush can't re-add a member who just left.
+
+    With enabled=False, add_chat_member writes through to storage.
+    """
+
+    def __init__(
+        self,
+        storage: Storage,
+        enabled: bool = True,
+        flush_seconds: float = 1.0,
+        max_pending: int = 500,
+    ):
+        self.storage = storage
+        self.enabled = enabled
+        self.flush_seconds = flush_seconds
+        self.max_pending = max_pending
+        self._pending: Set[Tuple[int, int, str]] = set()
+        self._lock: Optional[asyncio.Lock] = None
+        self._timer: Optional[asyncio.Task] = None
+        self._flushing: Optional[asyncio.Task] = None
+
+    @property
+    def pending(self) -> int:
+        """Memberships waiting to be written."""
+        return len(self._pending)
+
+    async def add_chat_member(self, chat_id: int, user_id: int, platform: str):
+        """Register a membership: buffered (returns at once) or written through."""
+        if self.enabled:
+            self.record(chat_id, user_id, platform)
+        else:
+            await self.storage.add_chat_member(chat_id, user_id, platform)
+
+    def record(self, chat_id: int, user_id: int, platform: str):
+        """Buffer a membership (call from the event loop; never waits)."""
+        self._pending.add((chat_id, user_id, platform))
+        if self._timer is None or self._timer.done():
+            self._timer = asyncio.create_task(self._flush_periodically())
+        if len(self._pending) >= self.max_pending and (self._flushing is None or self._flushing.done()):
+            self._flushing = asyncio.create_task(self.flush())
+
+    async def remove_chat_member(self, chat_id: int, user_id: int, platform: str):
+        """Remove a membership, including a buffered one."""
+        async with self._get_lock():  # waits for a flush that may hold the entry
+            self._pending.discard((chat_id, user_id, platform))
+            await self.storage.remove_chat_member(chat_id, user_id, platform)
+
+    async def clear_chat_members(self, chat_id: int, platform: str):
+        """Remove all members of a chat, including buffered ones."""
+        async with self._get_lock():
+            self._pending = {
+                entry for entry in self._pending
+                if entry[0] != chat_id or entry[2] != platform
+            }
+            await self.storage.clear_chat_members(chat_id, platform)
+
+    def _get_lock(self) -> asyncio.Lock:
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    async def _flush_periodically(self):
+        while True:
+            await asyncio.sleep(self.flush_seconds)
+            await self.flush()
+
+    async def flush(self) -> int:
+        """Write buffered memberships now. Returns the number of new rows."""
+        async with self._get_lock():
+            if not self._pending:
+                return 0
+            batch, self._pending = self._pending, set()
+            try:
+                return await self.storage.add_chat_members(sorted(batch))
+            except asyncio.CancelledError:
+                self._pending |= batch
+                raise
+            except Exception as e:
+                logger.error(f"Membership flush of {len(batch)} failed, will retry: {e}")
+                self._pending |= batch
+                return 0
+
+    async def close(self):
+        """Stop the timer and write what is left (call on shutdown, before storage.close)."""
+        if self._timer is not None and not self._timer.done():
+            self._timer.cancel()
+            try:
+                await self._timer
+            except asyncio.CancelledError:
+                pass
+        if self._flushing is not None:
+            await self._flushing
+        self._timer = self._flushing = None
+        await self.flush()
@@ -0,0 +1,178 @@
+import asyncio
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import aiosqlite
+
+from src.logger import get_logger
+from src.storage.sqlite import SQLiteStorage
+
+logger = get_logger()
+
+# busy_timeout (ms) if none is configured: BEGIN IMMEDIATE waits this long for
+# another process's write lock before failing the batch (set explicitly rather
+# than relying on the driver's connect timeout)
+DEFAULT_BUSY_TIMEOUT = 5000
+
+
+class PooledSQLiteStorage(SQLiteStorage):
+    """
+    SQLite storage for concurrent load (storage.mode: pooled).
+
+    The database runs in WAL mode, so reads never wait for writers:
+    get_user/get_chat_members use a small pool of read-only connections.
+    All writes are queued to one writer task on the primary connection,
+    which commits whatever is queued at that moment in one transaction
+    (BEGIN IMMEDIATE, so another process holding the lock is waited for
+    up front instead of failing mid-transaction; a busy_timeout is always
+    set so that wait is bounded, not skipped).
+
+    A write call returns once its transaction is committed; flush() waits
+    for everything queued so far.
+    """
+
+    def __init__(
+        self,
+        db_path: Path,
+        readers: int = 3,
+        batch_size: int = 100,
+        pragmas: Optional[Dict] = None,
+    ):
+        super().__init__(
+            db_path,
+            {"busy_timeout": DEFAULT_BUSY_TIMEOUT, **(pragmas or {}), "journal_mode": "wal"},
+        )
+        self.reader_count = readers
+        self.batch_size = batch_size
+        self._readers: Optional[asyncio.Queue] = None
+        self._reader_connections: List[aiosqlite.Connection] = []
+        self._writes: Optional[asyncio.Queue] = None
+        self._writer: Optional[asyncio.Task] = None
+
+    async def init(self):
+        """Create the schema, switch to WAL, open readers and start the writer."""
+        await super().init()
+        mode = await self.db.execute_fetchall("PRAGMA journal_mode")
+        if mode[0][0] != "wal":
+            logger.warning(f"SQLite WAL mode unavailable (journal_mode={mode[0][0]}), readers may wait for writes")
+
+        self._readers = asyncio.Queue()
+        for _ in range(self.reader_count):
+            conn = await self._connect(read_only=True)
+            self._reader_connections.append(conn)
+            self._readers.put_nowait(conn)
+
+        self._writes = asyncio.Queue()
+        self._writer = asyncio.create_task(self._write_loop())
+
+
+    async def close(self):
+        """Commit queued writes, stop the writer and close all connections."""
+        if self._writer is not None:
+            await self.flush()
+            self._writer.cancel()
+            try:
+                await self._writer
+            except asyncio.CancelledError:
+                pass
+            self._writer = None
+
+        for conn in self._reader_connections:
+            await conn.close()
+        self._reader_connections = []
+        self._readers = None
+        await super().close()
+
+
+    async def flush(self):
+        """Wait until every write queued so far is committed."""
+        if self._writer is not None:
+            await self._enqueue(None, ())
+
+
+    async def _read(self, sql: str, params: tuple = ()) -> List[aiosqlite.Row]:
+        """Run a query on an idle read-only connection."""
+        if self._readers is None:
+            raise RuntimeError("SQLiteStorage is not initialized, await init() first")
+        conn = await self._readers.get()
+        try:
+            return await conn.execute_fetchall(sql, params)
+        finally:
+            self._readers.put_nowait(conn)
+
+
+    async def _write(self, sql: str, params: tuple = ()) -> int:
+        """Queue a write for the writer task; returns its rowcount once committed."""
+        if self._writes is None:
+            raise RuntimeError("SQLiteStorage is not initialized, await init() first")
+        return await self._enqueue(sql, params)
+
+
+    async def _write_many(self, sql: str, groups: List[List[tuple]]) -> List[int]:
+        """Queue the writes together: they share the writer's next transaction(s)."""
+        if self._writes is None:
+            raise RuntimeError("SQLiteStorage is not initialized, await init() first")
+        counts = await asyncio.gather(*(
+            self._enqueue(sql, params) for params_list in groups for params in params_list
+        ))
+        totals, start = [], 0
+        for params_list in groups:
+            totals.append(sum(counts[start:start + len(params_list)]))
+            start += len(params_list)
+        return totals
+
+
+    def _enqueue(self, sql: Optional[str], params: tuple) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        self._writes.put_nowait((sql, params, future))
+        return future
+
+
+    async def _write_loop(self):
+        """
+        Writer task: drain the queue into shared transactions. _commit_batch
+        never raises, so one bad batch cannot stop the writer and strand
+        every later caller.
+        """
+        while True:
+            batch = [await self._writes.get()]
+            while len(batch) < self.batch_size and not self._writes.empty():
+                batch.append(self._writes.get_nowait())
+            await self._commit_batch(batch)
+
+
+    async def _commit_batch(self, batch: list):
+        """
+        Run a batch in one transaction. A failing statement only fails its
+        own caller; if the transaction itself fails, every caller gets the error.
+        Any exception counts, not just sqlite3.Error (aiosqlite raises
+        ValueError on a closed connection, bad params raise TypeError).
+        """
+        results = []
+        try:
+            await self.db.execute("BEGIN IMMEDIATE")
+            for sql, params, _ in batch:
+                if sql is None:  # flush marker
+                    results.append(0)
+                    continue
+                try:
+                    cursor = await self.db.execute(sql, params)
+                    results.append(cursor.rowcount)
+                except Exception as e:
+                    results.append(e)
+            await self.db.commit()
+        except Exception as e:
+            logger.error(f"Write batch of {len(batch)} failed: {e}")
+            try:
+                await self.db.rollback()
+            except Exception:
+                pass
+            results = [e] * len(batch)
+
+        for (_, _, future), result in zip(batch, results):
+            if future.done():  # caller cancelled
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
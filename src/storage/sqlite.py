@@ -1,119 +1,322 @@
-
+import asyncio
 import aiosqlite
+import json
+import time
 from pathlib import Path
 from src.logger import get_logger
 from src.storage.base import Storage
-from typing import List, Dict, Optional
+from typing import Dict, Iterable, List, Optional, Tuple
 
 logger = get_logger()
 
+# PRAGMA profiles (storage.tuning). "durable" survives power loss after every
+# commit; "fast" (WAL + synchronous=NORMAL) may lose the last commits on power
+# loss but never corrupts, and keeps hot pages in memory.
+TUNING_PRESETS = {
+    "default": {},
+    "durable": {
+        "busy_timeout": 5000,
+        "journal_mode": "wal",
+        "synchronous": "full",
+        "temp_store": "default",
+    },
+    "fast": {
+        "busy_timeout": 5000,
+        "journal_mode": "wal",
+        "synchronous": "normal",
+        "mmap_size": 256 * 1024 * 1024,
+        "cache_size": -16384,           # KiB (negative) = 16 MiB per connection
+        "temp_store": "memory",
+    },
+}
+
+# Applied in this order: busy_timeout first, so switching the journal mode
+# can wait for another process
+_PRAGMAS = ["busy_timeout", "journal_mode", "synchronous", "mmap_size", "cache_size", "temp_store"]
+
+# Database-level settings that read-only connections cannot change
+_WRITER_ONLY = {"journal_mode"}
+
+
+def tuning_pragmas(profile, overrides: Optional[Dict] = None) -> Dict:
+    """
+    PRAGMA values for a preset name (or a mapping of pragmas), plus overrides.
+    Unknown presets fall back to "durable"; unknown pragmas and values other
+    than integers or single words (e.g. booleans) are ignored.
+    """
+    if isinstance(profile, dict):
+        pragmas = dict(profile)
+    elif profile in TUNING_PRESETS:
+        pragmas = dict(TUNING_PRESETS[profile])
+    else:
+        logger.warning(f"Unknown storage tuning preset '{profile}', using 'durable'")
+        pragmas = dict(TUNING_PRESETS["durable"])
+    pragmas.update(overrides or {})
+
+    for name in list(pragmas):
+        value = pragmas[name]
+        valid = (isinstance(value, int) and not isinstance(value, bool)) or (
+            isinstance(value, str) and value.isalpha()
+        )
+        if name not in _PRAGMAS or not valid:
+            logger.warning(f"Ignoring storage pragma {name}={value!r}")
+            del pragmas[name]
+    return pragmas
+
+
 class SQLiteStorage(Storage):
-    def __init__(self, db_path: Path):
+    """
+    SQLite storage over one long-lived connection, opened in init() and
+    closed in close(). aiosqlite runs statements in order on the
+    connection's worker thread; sqlite3 keeps them prepared in its
+    per-connection statement cache.
+
+    pragmas (see tuning_pragmas) are applied to every connection opened.
+
+    A transaction on the shared connection would otherwise commit (or roll
+    back) statements other coroutines ran in between, so every write
+    transaction holds _tx_lock.
+    """
+
+    def __init__(self, db_path: Path, pragmas: Optional[Dict] = None):
+        super().__init__()
         self.db_path = db_path
+        self.pragmas = pragmas or {}
+        self._db: Optional[aiosqlite.Connection] = None
+        self._tx_lock = asyncio.Lock()
+
+    @property
+    def db(self) -> aiosqlite.Connection:
+        """The shared connection."""
+        if self._db is None:
+            raise RuntimeError("SQLiteStorage is not initialized, await init() first")
+        return self._db
+
+    async def _connect(self, read_only: bool = False) -> aiosqlite.Connection:
+        """Open a connection with the tuning pragmas applied."""
+        if read_only:
+            db = await aiosqlite.connect(f"file:{self.db_path}?mode=ro", uri=True)
+        else:
+            db = await aiosqlite.connect(self.db_path)
+        db.row_factory = aiosqlite.Row
+
+        for name in _PRAGMAS:
+            if name not in self.pragmas or (read_only and name in _WRITER_ONLY):
+                continue
+            # Fetch the result: an unfinished PRAGMA statement keeps the database locked
+            await db.execute_fetchall(f"PRAGMA {name} = {self.pragmas[name]}")
+        return db
 
     async def init(self):
-        """Initialize database and create tables if not exist."""
+        """Open the connection and create tables if not exist (re-opens if already open)."""
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
-        
-        async with aiosqlite.connect(self.db_path) as db:
-            # Users table: Key = (user_id, platform)
-            await db.execute("""
-                CREATE TABLE IF NOT EXISTS users (
-                    user_id INTEGER,
-                    platform TEXT DEFAULT 'telegram',
-                    username TEXT DEFAULT '',
-                    city TEXT NOT NULL,
-                    timezone TEXT NOT NULL,
-                    flag TEXT DEFAULT '',
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    PRIMARY KEY (user_id, platform)
-                )
-            """)
-            
-            # Chat members table: Key = (chat_id, user_id, platform)
-            await db.execute("""
-                CREATE TABLE IF NOT EXISTS chat_members (
-                    chat_id INTEGER,
-                    user_id INTEGER,
-                    platform TEXT DEFAULT 'telegram',
-                    PRIMARY KEY (chat_id, user_id, platform),
-                    FOREIGN KEY (user_id, platform) REFERENCES users(user_id, platform)
-                )
-            """)
-            
-            await db.commit()
+        await self.close()
+        self._tx_lock = asyncio.Lock()
+        self._db = await self._connect()
+        db = self._db
+
+        # Users table: Key = (user_id, platform)
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS users (
+                user_id INTEGER,
+                platform TEXT DEFAULT 'telegram',
+                username TEXT DEFAULT '',
+                city TEXT NOT NULL,
+                timezone TEXT NOT NULL,
+                flag TEXT DEFAULT '',
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (user_id, platform)
+            )
+        """)
+
+        # Chat members table: Key = (chat_id, user_id, platform)
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS chat_members (
+                chat_id INTEGER,
+                user_id INTEGER,
+                platform TEXT DEFAULT 'telegram',
+                PRIMARY KEY (chat_id, user_id, platform),
+                FOREIGN KEY (user_id, platform) REFERENCES users(user_id, platform)
+            )
+        """)
+
+        # Geocoding cache: Key = normalized city query; location NULL = not found
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS geocode_cache (
+                query TEXT PRIMARY KEY,
+                location TEXT,
+                expires_at REAL NOT NULL
+            )
+        """)
+        await db.execute("DELETE FROM geocode_cache WHERE expires_at <= ?", (time.time(),))
+
+        await db.commit()
+
+
+    async def close(self):
+        """Close the connection (call on shutdown)."""
+        if self._db is not None:
+            db, self._db = self._db, None
+            await db.close()
+
+
+    async def _read(self, sql: str, params: tuple = ()) -> List[aiosqlite.Row]:
+        """Run a query, return all rows."""
+        return await self.db.execute_fetchall(sql, params)
+
+
+    async def _write(self, sql: str, params: tuple = ()) -> int:
+        """
+        Run and commit one write statement, return its rowcount. A failed
+        statement is rolled back so its implicit transaction doesn't keep the
+        write lock (or get committed by the next write).
+        """
+        async with self._tx_lock:
+            try:
+                cursor = await self.db.execute(sql, params)
+                await self.db.commit()
+            except Exception:
+                await self.db.rollback()
+                raise
+            return cursor.rowcount
+
+
+    async def _write_many(self, sql: str, groups: List[List[tuple]]) -> List[int]:
+        """
+        Run a write statement for every params of every group (executemany per
+        group) in a single transaction; return the total rowcount of each group.
+        """
+        async with self._tx_lock:
+            counts = []
+            try:
+                for params_list in groups:
+                    cursor = await self.db.executemany(sql, params_list)
+                    counts.append(cursor.rowcount)
+                await self.db.commit()
+            except Exception:
+                await self.db.rollback()
+                raise
+            return counts
 
 
     async def get_user(self, user_id: int, platform: str) -> Optional[Dict]:
         """Get user by ID and platform."""
-        async with aiosqlite.connect(self.db_path) as db:
-            db.row_factory = aiosqlite.Row
-            async with db.execute(
-                "SELECT user_id, platform, username, city, timezone, flag FROM users WHERE user_id = ? AND platform = ?",
-                (user_id, platform)
-            ) as cursor:
-                row = await cursor.fetchone()
-                return dict(row) if row else None
+        rows = await self._read(
+            "SELECT user_id, platform, username, city, timezone, flag FROM users WHERE user_id = ? AND platform = ?",
+            (user_id, platform)
+        )
+        return dict(rows[0]) if rows else None
 
 
     async def set_user(
-        self, 
-        user_id: int, 
+        self,
+        user_id: int,
         platform: str,
-        city: str, 
-        timezone: str, 
-        flag: str = "", 
+        city: str,
+        timezone: str,
+        flag: str = "",
         username: str = ""
     ):
         """Create or update user timezone."""
-        async with aiosqlite.connect(self.db_path) as db:
-            await db.execute("""
-                INSERT INTO users (user_id, platform, username, city, timezone, flag)
-                VALUES (?, ?, ?, ?, ?, ?)
-                ON CONFLICT(user_id, platform) DO UPDATE SET username = ?, city = ?, timezone = ?, flag = ?
-            """, (user_id, platform, username, city, timezone, flag, username, city, timezone, flag))
-            await db.commit()
+        await self._write("""
+            INSERT INTO users (user_id, platform, username, city, timezone, flag)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(user_id, platform) DO UPDATE SET username = ?, city = ?, timezone = ?, flag = ?
+        """, (user_id, platform, username, city, timezone, flag, username, city, timezone, flag))
+        self._touch_users()
 
 
     async def add_chat_member(self, chat_id: int, user_id: int, platform: str):
         """Register user as member of a chat."""
-        async with aiosqlite.connect(self.db_path) as db:
-            await db.execute("""
-                INSERT OR IGNORE INTO chat_members (chat_id, user_id, platform)
-                VALUES (?, ?, ?)
-            """, (chat_id, user_id, platform))
-            await db.commit()
+        inserted = await self._write("""
+            INSERT OR IGNORE INTO chat_members (chat_id, user_id, platform)
+            VALUES (?, ?, ?)
+        """, (chat_id, user_id, platform))
+        # Most calls are no-op re-registrations: only a new row changes the roster
+        if inserted > 0:
+            self._touch_chat(chat_id, platform)
+
+
+    async def add_chat_members(self, members: Iterable[Tuple[int, int, str]]) -> int:
+        """Register many memberships in one transaction; returns the number of new rows."""
+        # One group per chat: its rowcount tells whether that roster changed
+        chats: Dict[tuple, List[tuple]] = {}
+        for chat_id, user_id, platform in members:
+            chats.setdefault((chat_id, platform), []).append((chat_id, user_id, platform))
+        counts = await self._write_many("""
+            INSERT OR IGNORE INTO chat_members (chat_id, user_id, platform)
+            VALUES (?, ?, ?)
+        """, list(chats.values()))
+        for (chat_id, platform), inserted in zip(chats, counts):
+            if inserted > 0:
+                self._touch_chat(chat_id, platform)
+        return sum(counts)
 
 
     async def get_chat_members(self, chat_id: int, platform: str) -> List[Dict]:
         """Get all users in a chat with their timezone info."""
-        async with aiosqlite.connect(self.db_path) as db:
-            db.row_factory = aiosqlite.Row
-            async with db.execute("""
-                SELECT u.user_id, u.username, u.city, u.timezone, u.flag, u.platform
-                FROM chat_members cm
-                JOIN users u ON cm.user_id = u.user_id AND cm.platform = u.platform
-                WHERE cm.chat_id = ? AND cm.platform = ?
-            """, (chat_id, platform)) as cursor:
-                rows = await cursor.fetchall()
-                return [dict(row) for row in rows]
+        rows = await self._read("""
+            SELECT u.user_id, u.username, u.city, u.timezone, u.flag, u.platform
+            FROM chat_members cm
+            JOIN users u ON cm.user_id = u.user_id AND cm.platform = u.platform
+            WHERE cm.chat_id = ? AND cm.platform = ?
+        """, (chat_id, platform))
+        return [dict(row) for row in rows]
 
 
     async def remove_chat_member(self, chat_id: int, user_id: int, platform: str):
         """Remove user from chat members."""
-        async with aiosqlite.connect(self.db_path) as db:
-            await db.execute(
-                "DELETE FROM chat_members WHERE chat_id = ? AND user_id = ? AND platform = ?",
-                (chat_id, user_id, platform)
-            )
-            await db.commit()
+        await self._write(
+            "DELETE FROM chat_members WHERE chat_id = ? AND user_id = ? AND platform = ?",
+            (chat_id, user_id, platform)
+        )
+        self._touch_chat(chat_id, platform)
 
 
     async def clear_chat_members(self, chat_id: int, platform: str):
         """Remove all members of a chat."""
-        async with aiosqlite.connect(self.db_path) as db:
-            await db.execute(
-                "DELETE FROM chat_members WHERE chat_id = ? AND platform = ?",
-                (chat_id, platform)
-            )
-            await db.commit()
+        await self._write(
+            "DELETE FROM chat_members WHERE chat_id = ? AND platform = ?",
+            (chat_id, platform)
+        )
+        self._touch_chat(chat_id, platform)
+
+
+    async def get_user_timezones(self) -> List[str]:
+        """Distinct timezones of all users."""
+        rows = await self._read("SELECT DISTINCT timezone FROM users")
+        return [row[0] for row in rows]
+
+
+    async def get_popular_cities(self, limit: int) -> List[str]:
+        """Most common user cities; offset-based ones ("UTC+3", 🌐 flag) are skipped."""
+        rows = await self._read("""
+            SELECT city FROM users
+            WHERE city != '' AND flag != '🌐'
+            GROUP BY city
+            ORDER BY COUNT(*) DESC, city
+            LIMIT ?
+        """, (limit,))
+        return [row[0] for row in rows]
+
+
+    async def get_geocode(self, query: str) -> Optional[Dict]:
+        """Cached city lookup for a normalized query, or None if not cached/expired."""
+        rows = await self._read(
+            "SELECT location, expires_at FROM geocode_cache WHERE query = ? AND expires_at > ?",
+            (query, time.time())
+        )
+        if not rows:
+            return None
+        location = json.loads(rows[0][0]) if rows[0][0] is not None else None
+        return {"location": location, "expires_at": rows[0][1]}
+
+
+    async def set_geocode(self, query: str, location: Optional[Dict], expires_at: float):
+        """Cache a city lookup result (None = not found) until expires_at."""
+        payload = json.dumps(location) if location is not None else None
+        await self._write("""
+            INSERT INTO geocode_cache (query, location, expires_at)
+            VALUES (?, ?, ?)
+            ON CONFLICT(query) DO UPDATE SET location = ?, expires_at = ?
+        """, (query, payload, expires_at, payload, expires_at))
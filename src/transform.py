@@ -1,17 +1,37 @@
 """
 Transform module.
 Time conversion using UTC-pivot architecture.
+
+Two engines produce identical results:
+- minutes: integer minute-of-day math on cached offset windows (default)
+- datetime: zoneinfo/astimezone reference implementation
 """
-from datetime import datetime, time
+from collections import OrderedDict
+from datetime import date, datetime, time
+from time import time as time_now
 from zoneinfo import ZoneInfo
 
+from src import offsets
+from src.config import get_transform_settings
+
+# date(1970, 1, 1).toordinal()
+_EPOCH_ORDINAL = 719163
+
+# Wider than any real UTC offset; used to check a whole local day
+# sits inside one offset window
+_MAX_OFFSET = 16 * 3600
+
+# "HH:MM" for every minute of the day
+_HHMM = [f"{m // 60:02d}:{m % 60:02d}" for m in range(24 * 60)]
+
 
 def get_utc_offset(tz_name: str) -> float:
-    """Get UTC offset in hours for sorting timezones."""
+    """
+    Get current UTC offset in hours for sorting timezones.
+    Served from the offset window cache (valid until the next DST transition).
+    """
     try:
-        tz = ZoneInfo(tz_name)
-        now = datetime.now(tz)
-        return now.utcoffset().total_seconds() / 3600
+        return offsets.utc_offset_seconds(tz_name, int(time_now())) / 3600
     except Exception:
         return 0
 
@@ -49,8 +69,26 @@ def parse_time_string(time_str: str) -> time:
     return time(hour, minute)
 
 
+def to_time(time_value) -> time:
+    """
+    Get a time object from a time string or a parsed capture.TimeMatch.
+    Match records are not parsed again.
+    """
+    if isinstance(time_value, str):
+        return parse_time_string(time_value)
+    return time(time_value.minutes // 60, time_value.minutes % 60)
+
+
+def to_minutes(time_value) -> int:
+    """Get minute of day (0..1439) from a time string or capture.TimeMatch."""
+    if isinstance(time_value, str):
+        t = parse_time_string(time_value)
+        return t.hour * 60 + t.minute
+    return time_value.minutes
+
+
 def convert_time(
-    time_str: str,
+    time_value,
     from_tz: str,
     to_tz: str,
     reference_date: datetime | None = None
@@ -59,7 +97,202 @@ def convert_time(
     Convert time from one timezone to another.
     
     Args:
-        time_str: Original time string (e.g. "14:00")
+        time_value: Time string (e.g. "14:00") or capture.TimeMatch
+        from_tz: Source IANA timezone (e.g. "Europe/Berlin")
+        to_tz: Target IANA timezone (e.g. "America/New_York")
+        reference_date: Date context (default: today)
+        
+    Returns:
+        Tuple of (converted_time_str, day_offset)
+        day_offset: 0 = same day, +1 = next day, -1 = previous day
+    """
+    return convert_time_many(time_value, from_tz, [to_tz], reference_date)[0]
+
+
+def _source_offset(from_tz: str, day: date, minutes: int) -> int:
+    """
+    UTC offset (seconds) of a wall time on a given day in the source zone.
+    On DST edge days falls back to zoneinfo so gaps/folds resolve exactly
+    like datetime (fold=0).
+    """
+    day_start = (day.toordinal() - _EPOCH_ORDINAL) * offsets.DAY
+    window = offsets.get_window(from_tz, day_start)
+    if window.start <= day_start - _MAX_OFFSET and day_start + offsets.DAY + _MAX_OFFSET <= window.end:
+        return window.offset
+    
+    local = datetime.combine(day, time(minutes // 60, minutes % 60), tzinfo=ZoneInfo(from_tz))
+    return int(local.utcoffset().total_seconds())
+
+
+def convert_minutes(minutes: int, from_tz: str, to_tz: str, day: date) -> tuple[str, int]:
+    """
+    Minute-of-day conversion engine for a single target.
+    Same result as convert_time_reference, without datetime objects
+    on the per-target path.
+    """
+    return _convert_batch(minutes, from_tz, [to_tz], day)[0]
+
+
+def convert_time_many(
+    time_value,
+    from_tz: str,
+    to_tzs: list[str],
+    reference_date: datetime | None = None
+) -> list[tuple[str, int]]:
+    """
+    Convert one time to many target timezones in a single pass.
+    
+    All targets share one reference clock snapshot and one source offset
+    lookup. Results are memoized per (minute, from_tz, to_tz, date) when the memo is enabled.
+    
+    Returns:
+        List of (converted_time_str, day_offset), in the order of to_tzs
+    """
+    if reference_date is None:
+        reference_date = datetime.now()
+    
+    minutes = to_minutes(time_value)
+    day = reference_date.date()
+    
+    convert = _engine()
+    memo = get_memo()
+    if memo is None:
+        return convert(minutes, from_tz, to_tzs, day)
+    
+    memo.roll(day)
+    results = [memo.get((minutes, from_tz, tz, day)) for tz in to_tzs]
+    missing = [i for i, result in enumerate(results) if result is None]
+    if missing:
+        computed = convert(minutes, from_tz, [to_tzs[i] for i in missing], day)
+        for i, result in zip(missing, computed):
+            results[i] = result
+            memo.put((minutes, from_tz, to_tzs[i], day), result)
+    return results
+
+
+def _engine():
+    """Uncached batch conversion function of the configured engine."""
+    if get_transform_settings().get("engine", "minutes") == "datetime":
+        return _reference_batch
+    return _convert_batch
+
+
+def _reference_batch(minutes: int, from_tz: str, to_tzs: list[str], day: date) -> list[tuple[str, int]]:
+    """Batch conversion with the datetime reference engine."""
+    reference = datetime.combine(day, time())
+    return [convert_time_reference(_HHMM[minutes], from_tz, tz, reference) for tz in to_tzs]
+
+
+def _convert_batch(minutes: int, from_tz: str, to_tzs: list[str], day: date) -> list[tuple[str, int]]:
+    """
+    Minute-of-day engine: one time to many target zones. The source offset
+    is looked up once; a target equal to the source keeps the wall time
+    (datetime.astimezone() to the same zone is a no-op, even in DST gaps).
+    """
+    day_index = day.toordinal() - _EPOCH_ORDINAL
+    source_offset = _source_offset(from_tz, day, minutes)
+    utc_ts = day_index * offsets.DAY + minutes * 60 - source_offset
+    
+    target_offsets = [
+        source_offset if tz == from_tz else offsets.utc_offset_seconds(tz, utc_ts)
+        for tz in to_tzs
+    ]
+    
+    results = []
+    for target_offset in target_offsets:
+        local_ts = utc_ts + target_offset
+        results.append((_HHMM[local_ts % offsets.DAY // 60], local_ts // offsets.DAY - day_index))
+    return results
+
+
+class ConversionMemo:
+    """
+    Bounded LRU of conversion results keyed by (minute, from_tz, to_tz, date).
+    
+    A result is fully determined by its key (DST changes are covered by the
+    date), so entries never go stale; the memo is cleared when the date
+    rolls over at midnight to drop the previous day's entries.
+    """
+    
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.day = None
+        self._entries: OrderedDict[tuple, tuple[str, int]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+    
+    def roll(self, day: date):
+        """Start a new day: drop all entries if the date changed."""
+        if day != self.day:
+            self._entries.clear()
+            self.day = day
+    
+    def get(self, key: tuple) -> tuple[str, int] | None:
+        """Cached result or None; counts hit/miss."""
+        result = self._entries.get(key)
+        if result is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return result
+    
+    def put(self, key: tuple, result: tuple[str, int]):
+        """Store a result, evicting the least recently used entry if full."""
+        self._entries[key] = result
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+    
+    def stats(self) -> dict:
+        """Hit/miss counters, hit rate and size."""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "size": len(self._entries),
+            "max_size": self.max_size,
+        }
+
+
+# Singleton configured from transform.memo (False = disabled)
+_memo = None
+
+def get_memo() -> ConversionMemo | None:
+    """Get the conversion memo, or None if disabled in config."""
+    global _memo
+    if _memo is None:
+        settings = get_transform_settings().get("memo", {})
+        if not settings.get("enabled", True):
+            _memo = False
+        else:
+            _memo = ConversionMemo(settings.get("max_size", 4096))
+    return _memo or None
+
+
+def get_memo_stats() -> dict:
+    """Memo hit rate and size (empty dict if disabled)."""
+    memo = get_memo()
+    return memo.stats() if memo else {}
+
+
+def reset_memo():
+    """Drop the memo so it is rebuilt from current config."""
+    global _memo
+    _memo = None
+
+
+def convert_time_reference(
+    time_value,
+    from_tz: str,
+    to_tz: str,
+    reference_date: datetime | None = None
+) -> tuple[str, int]:
+    """
+    Reference datetime/zoneinfo implementation of convert_time.
+    
+    Args:
+        time_value: Time string (e.g. "14:00") or capture.TimeMatch
         from_tz: Source IANA timezone (e.g. "Europe/Berlin")
         to_tz: Target IANA timezone (e.g. "America/New_York")
         reference_date: Date context (default: today)
@@ -71,8 +304,8 @@ def convert_time(
     if reference_date is None:
         reference_date = datetime.now()
     
-    # Parse the time
-    t = parse_time_string(time_str)
+    # Parse the time (no-op for match records)
+    t = to_time(time_value)
     
     # Create datetime in source timezone
     source_tz = ZoneInfo(from_tz)
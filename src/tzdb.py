@@ -0,0 +1,210 @@
+"""
+TZDB module.
+Compact transition table for all IANA zones: "offset of zone Z at instant T"
+by binary search over flat arrays, without datetime allocation.
+
+The table can be saved to a file and memory-mapped, so the Telegram and
+Discord processes share one copy through the OS page cache.
+
+Build the file (run.sh does this before starting the bots):
+    uv run python -m src.tzdb
+"""
+import struct
+from array import array
+from bisect import bisect_right
+from datetime import datetime, timezone
+from importlib.metadata import PackageNotFoundError, version
+from pathlib import Path
+from zoneinfo import ZoneInfo, available_timezones
+
+from src import mmapfile
+from src.config import PROJECT_ROOT
+from src.logger import get_logger
+
+logger = get_logger()
+
+TZDB_PATH = PROJECT_ROOT / "data" / "tzdb.bin"
+
+# Covered range, relative to the build year
+YEARS_BEFORE = 1
+YEARS_AFTER = 10
+
+# Transitions are found by weekly probes, then bisected to the second.
+# Offset changes that revert within a week would be missed (none in modern tzdata).
+_STEP = 7 * 86400
+
+_MAGIC = b"TZDB"
+_FORMAT_VERSION = 1
+# magic, format version, byte order, tzdata version, range start/end, zones, entries, names size
+_HEADER = struct.Struct("=4sB1s16sqqIII")
+
+
+def _tzdata_version() -> str:
+    try:
+        return version("tzdata")
+    except PackageNotFoundError:
+        return "system"
+
+
+def zoneinfo_offset(tz: ZoneInfo, ts: int) -> int:
+    """UTC offset in seconds of tz at UTC timestamp ts, straight from zoneinfo."""
+    return int(datetime.fromtimestamp(ts, tz).utcoffset().total_seconds())
+
+
+def _zone_transitions(tz: ZoneInfo, start: int, end: int) -> list[tuple[int, int]]:
+    """List of (utc_timestamp, offset) from start to end; first entry is at start."""
+    current = zoneinfo_offset(tz, start)
+    result = [(start, current)]
+    t = start
+    while t < end:
+        probe = min(t + _STEP, end)
+        offset = zoneinfo_offset(tz, probe)
+        if offset == current:
+            t = probe
+            continue
+
+        # Bisect to the first second with the new offset
+        lo, hi = t, probe
+        while hi - lo > 1:
+            mid = (lo + hi) // 2
+            if zoneinfo_offset(tz, mid) == current:
+                lo = mid
+            else:
+                hi = mid
+        current = zoneinfo_offset(tz, hi)
+        result.append((hi, current))
+        t = hi
+    return result
+
+
+class TransitionTable:
+    """Flat arrays of transitions for all zones."""
+
+    def __init__(
+        self,
+        names: list[str],
+        starts,
+        times,
+        offsets,
+        range_start: int,
+        range_end: int,
+        tzdata_version: str,
+    ):
+        self.names = names
+        self.index = {name: i for i, name in enumerate(names)}
+        self.starts = starts    # zone i owns entries [starts[i], starts[i + 1])
+        self.times = times      # UTC timestamps, ascending within a zone
+        self.offsets = offsets  # UTC offset in seconds from times[k]
+        self.range_start = range_start
+        self.range_end = range_end
+        self.tzdata_version = tzdata_version
+
+    def _entry(self, tz_name: str, ts: int) -> tuple[int, int] | None:
+        """(entry index, end of zone slice) for ts, or None if not covered."""
+        i = self.index.get(tz_name)
+        if i is None or not self.range_start <= ts < self.range_end:
+            return None
+        lo, hi = self.starts[i], self.starts[i + 1]
+        return bisect_right(self.times, ts, lo, hi) - 1, hi
+
+    def offset_at(self, tz_name: str, ts: int) -> int | None:
+        """UTC offset in seconds of a zone at UTC timestamp ts (None if not covered)."""
+        entry = self._entry(tz_name, ts)
+        if entry is None:
+            return None
+        return self.offsets[entry[0]]
+
+    def window(self, tz_name: str, ts: int) -> tuple[int, int, int] | None:
+        """(start, end, offset) of the constant-offset span containing ts."""
+        entry = self._entry(tz_name, ts)
+        if entry is None:
+            return None
+        k, hi = entry
+        end = self.times[k + 1] if k + 1 < hi else self.range_end
+        return self.times[k], end, self.offsets[k]
+
+    def is_current(self, now: int | None = None) -> bool:
+        """True if the table covers now and matches the installed tzdata."""
+        if now is None:
+            now = int(datetime.now(timezone.utc).timestamp())
+        return self.tzdata_version == _tzdata_version() and self.range_start <= now < self.range_end
+
+
+def build_table(year: int | None = None) -> TransitionTable:
+    """Build the table from zoneinfo/tzdata for [year - 1, year + 10]."""
+    if year is None:
+        year = datetime.now(timezone.utc).year
+    range_start = int(datetime(year - YEARS_BEFORE, 1, 1, tzinfo=timezone.utc).timestamp())
+    range_end = int(datetime(year + YEARS_AFTER + 1, 1, 1, tzinfo=timezone.utc).timestamp())
+
+    names = sorted(available_timezones())
+    starts = array("I", [0])
+    times = array("q")
+    offsets = array("i")
+    for name in names:
+        for ts, offset in _zone_transitions(ZoneInfo(name), range_start, range_end):
+            times.append(ts)
+            offsets.append(offset)
+        starts.append(len(times))
+
+    return TransitionTable(names, starts, times, offsets, range_start, range_end, _tzdata_version())
+
+
+def save_table(table: TransitionTable, path: Path = TZDB_PATH):
+    """Write the table to a memory-mappable file (atomic replace)."""
+    header = _HEADER.pack(
+        _MAGIC,
+        _FORMAT_VERSION,
+        mmapfile.NATIVE_ORDER,
+        table.tzdata_version.encode("ascii")[:16],
+        table.range_start,
+        table.range_end,
+        len(table.names),
+        len(table.times),
+        mmapfile.names_size(table.names),
+    )
+    arrays = [array("q", table.times), array("i", table.offsets), array("I", table.starts)]
+    mmapfile.save(path, header, arrays, table.names)
+
+
+def load_table(path: Path = TZDB_PATH) -> TransitionTable | None:
+    """Memory-map a saved table. Returns None if the file is missing or unusable."""
+    loaded = mmapfile.load(path, _HEADER, _MAGIC, _FORMAT_VERSION)
+    if loaded is None:
+        return None
+    view, (tz_version, range_start, range_end, n_zones, n_entries, names_size) = loaded
+
+    (times, offsets, starts), names = mmapfile.read_body(
+        view, _HEADER, [("q", n_entries), ("i", n_entries), ("I", n_zones + 1)], names_size
+    )
+    return TransitionTable(
+        names, starts, times, offsets, range_start, range_end,
+        tz_version.rstrip(b"\0").decode("ascii"),
+    )
+
+
+# Singleton: memory-mapped file if current, otherwise built in memory
+_table = None
+
+def get_table() -> TransitionTable:
+    """Get the shared transition table."""
+    global _table
+    if _table is None:
+        table = load_table()
+        if table is None or not table.is_current():
+            logger.info("TZDB file missing or stale, building transition table in memory")
+            table = build_table()
+        _table = table
+    return _table
+
+
+if __name__ == "__main__":
+    import time
+
+    started = time.perf_counter()
+    built = build_table()
+    save_table(built)
+    logger.info(
+        f"TZDB: {len(built.names)} zones, {len(built.times)} transitions -> {TZDB_PATH} "
+        f"({time.perf_counter() - started:.1f}s)"
+    )
@@ -0,0 +1,170 @@
+"""
+TZ raster module.
+Coarse lat/lng grid of timezone ids in a memory-mapped file, so most
+coordinate → timezone lookups are a single array index instead of
+TimezoneFinder polygon tests, and both bot processes share one copy through
+the OS page cache.
+
+A cell stores a zone only if its four corners and its center all resolve to
+that zone; other (border) cells are left to the exact TimezoneFinder test.
+
+Build the file (run.sh does this once before starting the bots):
+    uv run python -m src.tzraster [resolution_degrees]
+"""
+import struct
+import sys
+from array import array
+from importlib.metadata import PackageNotFoundError, version
+from pathlib import Path
+
+from src import mmapfile
+from src.config import PROJECT_ROOT
+from src.logger import get_logger
+
+logger = get_logger()
+
+TZRASTER_PATH = PROJECT_ROOT / "data" / "tzraster.bin"
+
+DEFAULT_RESOLUTION = 0.1  # degrees per cell: 3600 x 1800 cells, ~13 MB
+
+# Cell value for "not a single zone, ask TimezoneFinder"
+BORDER = 0xFFFF
+
+_MAGIC = b"TZRS"
+_FORMAT_VERSION = 1
+# magic, format version, byte order, timezonefinder version, resolution (micro-degrees), width, height, names size
+_HEADER = struct.Struct("=4sB1s16sIIII")
+
+
+def _data_version() -> str:
+    """Installed timezonefinder version (its polygon data ships with the package)."""
+    try:
+        return version("timezonefinder")
+    except PackageNotFoundError:
+        return "unknown"
+
+
+class TimezoneRaster:
+    """Grid of zone ids: row 0 starts at latitude -90, column 0 at longitude -180."""
+
+    def __init__(self, grid, names: list[str], resolution: float, data_version: str):
+        self.grid = grid              # uint16 per cell, row-major
+        self.names = names            # zone id -> IANA name
+        self.resolution = resolution
+        self.width = round(360 / resolution)
+        self.height = round(180 / resolution)
+        self.data_version = data_version
+
+    def zone_at(self, lat: float, lng: float) -> str | None:
+        """Zone of an interior cell, or None for border cells."""
+        if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+            return None
+        row = min(int((lat + 90) / self.resolution), self.height - 1)
+        col = min(int((lng + 180) / self.resolution), self.width - 1)
+        value = self.grid[row * self.width + col]
+        return None if value == BORDER else self.names[value]
+
+    def interior_ratio(self) -> float:
+        """Share of cells answered without TimezoneFinder."""
+        return 1 - self.grid.tolist().count(BORDER) / len(self.grid)
+
+    def is_current(self) -> bool:
+        """True if built from the installed timezonefinder data."""
+        return self.data_version == _data_version()
+
+
+def build_raster(resolution: float = DEFAULT_RESOLUTION, tf=None) -> TimezoneRaster:
+    """Sample TimezoneFinder at every cell corner and center."""
+    if tf is None:
+        from timezonefinder import TimezoneFinder
+        tf = TimezoneFinder()
+
+    width = round(360 / resolution)
+    height = round(180 / resolution)
+    ids: dict[str | None, int] = {None: BORDER}
+    names: list[str] = []
+
+    def zone_id(lat: float, lng: float) -> int:
+        name = tf.timezone_at(lat=lat, lng=lng)
+        value = ids.get(name)
+        if value is None:
+            value = ids[name] = len(names)
+            names.append(name)
+        return value
+
+    def corner_row(row: int) -> list[int]:
+        lat = max(-90.0, min(90.0, -90 + row * resolution))
+        return [zone_id(lat, -180 + col * resolution) for col in range(width + 1)]
+
+    grid = array("H")
+    below = corner_row(0)
+    for row in range(height):
+        above = corner_row(row + 1)
+        center_lat = -90 + (row + 0.5) * resolution
+        for col in range(width):
+            value = below[col]
+            if (
+                value == below[col + 1] == above[col] == above[col + 1]
+                and value == zone_id(center_lat, -180 + (col + 0.5) * resolution)
+            ):
+                grid.append(value)
+            else:
+                grid.append(BORDER)
+        below = above
+
+    return TimezoneRaster(grid, names, resolution, _data_version())
+
+
+def save_raster(raster: TimezoneRaster, path: Path = TZRASTER_PATH):
+    """Write the raster to a memory-mappable file (atomic replace)."""
+    header = _HEADER.pack(
+        _MAGIC,
+        _FORMAT_VERSION,
+        mmapfile.NATIVE_ORDER,
+        raster.data_version.encode("ascii")[:16],
+        round(raster.resolution * 1e6),
+        raster.width,
+        raster.height,
+        mmapfile.names_size(raster.names),
+    )
+    mmapfile.save(path, header, [array("H", raster.grid)], raster.names)
+
+
+def load_raster(path: Path = TZRASTER_PATH) -> TimezoneRaster | None:
+    """Memory-map a saved raster. Returns None if the file is missing or unusable."""
+    loaded = mmapfile.load(path, _HEADER, _MAGIC, _FORMAT_VERSION)
+    if loaded is None:
+        return None
+    view, (data_version, micro_degrees, width, height, names_size) = loaded
+
+    (grid,), names = mmapfile.read_body(view, _HEADER, [("H", width * height)], names_size)
+    return TimezoneRaster(grid, names, micro_degrees / 1e6, data_version.rstrip(b"\0").decode("ascii"))
+
+
+# Singleton: memory-mapped file, or None if missing/stale
+_raster = None
+_loaded = False
+
+def get_raster() -> TimezoneRaster | None:
+    """Get the shared raster (None if the file is missing or stale)."""
+    global _raster, _loaded
+    if not _loaded:
+        raster = load_raster()
+        if raster is None or not raster.is_current():
+            logger.info("TZ raster missing or stale, coordinates go to TimezoneFinder")
+            raster = None
+        _raster = raster
+        _loaded = True
+    return _raster
+
+
+if __name__ == "__main__":
+    import time
+
+    started = time.perf_counter()
+    built = build_raster(float(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_RESOLUTION)
+    save_raster(built)
+    logger.info(
+        f"TZ raster: {built.width}x{built.height} cells, {built.interior_ratio():.1%} interior "
+        f"-> {TZRASTER_PATH} ({time.perf_counter() - started:.1f}s)"
+    )
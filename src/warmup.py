@@ -0,0 +1,116 @@
+"""
+Warmup module.
+Startup warm-up of the timezone and geo caches, so the first /tb_settz calls
+and the first large-chat replies after a deploy don't pay for cold data.
+
+Steps: transition table and offset windows for every zone users have set,
+the offset → zone index, offline geo data (gazetteer, raster,
+TimezoneFinder), then the most common user cities into the geocache.
+"""
+import asyncio
+from time import perf_counter, time
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from src import geo, geocache, offsets, tzdb
+from src.config import get_warmup_settings
+from src.logger import get_logger
+from src.storage import storage
+
+logger = get_logger()
+
+_DEFAULTS = {
+    "enabled": True,
+    "background": True,
+    "top_cities": 50,
+}
+
+# Result of the last warm-up (exposed for monitoring)
+_stats = {"seconds": None, "zones": 0, "cities": 0, "resolved": 0}
+
+# Background warm-up task (kept referenced so it isn't garbage collected)
+_task: asyncio.Task | None = None
+
+
+def _settings() -> dict:
+    return {**_DEFAULTS, **get_warmup_settings()}
+
+
+def _warm_zones(zones: list[str]) -> int:
+    """Load the transition table and cache offset windows (runs in a thread)."""
+    tzdb.get_table()
+    now = int(time())
+    warmed = 0
+    for zone in zones:
+        try:
+            ZoneInfo(zone)
+        except (ZoneInfoNotFoundError, ValueError):
+            continue
+        offsets.get_window(zone, now)
+        warmed += 1
+    offsets.get_zone_index(now)
+    return warmed
+
+
+async def warm_up() -> dict:
+    """
+    Run all warm-up steps. A failing step is logged and the rest still run.
+
+    Returns:
+        Stats: seconds taken, zones warmed, cities tried and resolved
+    """
+    settings = _settings()
+    started = perf_counter()
+    stats = {"seconds": None, "zones": 0, "cities": 0, "resolved": 0}
+
+    try:
+        zones = await storage.get_user_timezones()
+        stats["zones"] = await asyncio.to_thread(_warm_zones, zones)
+    except Exception as e:
+        logger.warning(f"Warm-up: timezones failed: {e}")
+
+    try:
+        await geo.preload()
+    except Exception as e:
+        logger.warning(f"Warm-up: geo data failed: {e}")
+
+    try:
+        cities = await storage.get_popular_cities(settings["top_cities"]) if settings["top_cities"] else []
+        stats["cities"] = len(cities)
+        # One at a time: misses go to Nominatim through its rate limiter
+        for city in cities:
+            location = await geocache.get_timezone_by_city(city)
+            if location and "error" not in location:
+                stats["resolved"] += 1
+    except Exception as e:
+        logger.warning(f"Warm-up: cities failed: {e}")
+
+    stats["seconds"] = perf_counter() - started
+    _stats.update(stats)
+    logger.info(
+        f"Warm-up done in {stats['seconds']:.2f}s: {stats['zones']} zones, "
+        f"{stats['resolved']}/{stats['cities']} cities"
+    )
+    return stats
+
+
+async def start():
+    """Run the warm-up if enabled: in the background or before returning."""
+    global _task
+    settings = _settings()
+    if not settings["enabled"]:
+        return
+    if settings["background"]:
+        _task = asyncio.create_task(warm_up())
+    else:
+        await warm_up()
+
+
+def cancel():
+    """Stop a background warm-up still running (call on shutdown)."""
+    if _task is not None and not _task.done():
+        _task.cancel()
+
+
+def get_warmup_stats() -> dict:
+    """Duration and counts of the last warm-up (seconds is None until one finished)."""
+    return dict(_stats)
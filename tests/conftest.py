@@ -0,0 +1,19 @@
+"""Shared test fixtures."""
+import pytest
+
+from src.storage.sqlite import SQLiteStorage
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    """Path of a fresh SQLite database in the test's temporary directory."""
+    return tmp_path / "bot.db"
+
+
+@pytest.fixture
+async def sqlite_storage(db_path):
+    """Fresh, initialized SQLite storage (closed after the test)."""
+    storage = SQLiteStorage(db_path)
+    await storage.init()
+    yield storage
+    await storage.close()
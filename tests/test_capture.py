@@ -1,5 +1,8 @@
 """Tests for time capture module."""
-from src.capture import extract_times
+from src import capture
+from src.capture import (
+    TimeCapture, TimeMatch, extract_times, find_times, might_contain_time, parse_match, scan_message
+)
 
 
 class TestExtractTimes:
@@ -100,3 +103,92 @@ class TestExtractTimes:
         # Given current regex, it will actually catch it. Let's see if we want to forbid it.
         # For now, just documenting behavior.
         assert "10:30" in result or result == []
+
+    def test_overlapping_12h_wins_over_24h(self):
+        """'5:00 pm' is captured once, not also as 24h '5:00'."""
+        assert extract_times("let's meet at 5:00 pm") == ["5:00 pm"]
+
+    def test_order_of_appearance(self):
+        """Results follow message order, not pattern order."""
+        assert extract_times("10:30 am or 11:30 am") == ["10:30 am", "11:30 am"]
+        assert extract_times("2 pm or 14:00") == ["2 pm", "14:00"]
+
+
+class TestTimeCapture:
+    """Test compiled TimeCapture engine."""
+
+    def test_custom_patterns(self):
+        """Engine works with arbitrary pattern lists."""
+        engine = TimeCapture([r"\b\d{1,2}h\d{2}\b"])
+        assert engine.extract("rdv à 14h30") == ["14h30"]
+
+    def test_priority_follows_pattern_order(self):
+        """Earlier pattern wins when both match at the same position."""
+        short_first = TimeCapture([r"\d:\d\d", r"\d:\d\d pm"])
+        long_first = TimeCapture([r"\d:\d\d pm", r"\d:\d\d"])
+        assert short_first.extract("5:00 pm") == ["5:00"]
+        assert long_first.extract("5:00 pm") == ["5:00 pm"]
+
+    def test_no_patterns(self):
+        """Empty pattern list never matches."""
+        assert TimeCapture([]).extract("14:00") == []
+
+
+class TestPrefilter:
+    """Test digit pre-filter and pipeline counters."""
+
+    def test_rejects_text_without_digits(self):
+        """Messages without digits never reach regex."""
+        assert might_contain_time("просто текст без времени") is False
+        assert might_contain_time("") is False
+
+    def test_accepts_text_with_digits(self):
+        """Any digit lets the message through."""
+        assert might_contain_time("at 5 pm") is True
+        assert might_contain_time("цена 500") is True
+
+    def test_disabled_in_config(self, monkeypatch):
+        """Disabled pre-filter lets everything through."""
+        monkeypatch.setattr(capture, "get_capture_prefilter", lambda: False)
+        assert might_contain_time("no digits here") is True
+
+    def test_stage_counters(self):
+        """Each message is counted at the stage where it stopped."""
+        capture.reset_capture_stats()
+
+        assert scan_message("hello") == []
+        assert scan_message("цена 500 рублей") == []
+        assert [t.text for t in scan_message("meet at 14:00")] == ["14:00"]
+
+        stats = capture.get_capture_stats()
+        assert stats == {
+            "messages": 3,
+            "prefilter_rejected": 1,
+            "regex_rejected": 1,
+            "matched": 1,
+        }
+
+
+class TestFindTimes:
+    """Test structured match records."""
+
+    def test_record_fields(self):
+        """Record carries raw text, span and minute of day."""
+        text = "meet at 5 pm"
+        [match] = find_times(text)
+        assert match == TimeMatch("5 pm", 8, 12, 17 * 60)
+        assert text[match.start:match.end] == "5 pm"
+
+    def test_24h_minutes(self):
+        """24h time is parsed to minute of day."""
+        assert [m.minutes for m in find_times("с 10:00 до 18:30")] == [600, 1110]
+
+    def test_unparseable_match_skipped(self):
+        """Matches the parser can't handle are dropped from records only."""
+        engine = TimeCapture([r"\b\d{1,2}h\d{2}\b"])
+        assert engine.extract("rdv à 14h30") == ["14h30"]
+        assert engine.find("rdv à 14h30") == []
+
+    def test_parse_match(self):
+        """Bare string becomes a record covering the whole string."""
+        assert parse_match("12 am") == TimeMatch("12 am", 0, 5, 0)
@@ -41,7 +41,7 @@ class TestAutoCleanup:
     def mock_formatter(self, monkeypatch):
         """Mock the formatter."""
         formatter_mock = MagicMock()
-        formatter_mock.format_conversion_reply.return_value = "Converted times..."
+        formatter_mock.iter_conversion_replies.return_value = ["Converted times..."]
         monkeypatch.setattr("src.discord.events.formatter", formatter_mock)
         return formatter_mock
     
@@ -116,8 +116,8 @@ class TestAutoCleanup:
         mock_storage.remove_chat_member.assert_not_called()
         
         # Verify formatter called with both members
-        mock_formatter.format_conversion_reply.assert_called_once()
-        call_args = mock_formatter.format_conversion_reply.call_args[0]
+        mock_formatter.iter_conversion_replies.assert_called_once()
+        call_args = mock_formatter.iter_conversion_replies.call_args[0]
         members_passed = call_args[4]  # 5th argument is members list
         assert len(members_passed) == 2
     
@@ -153,6 +153,26 @@ class TestAutoCleanup:
         # Verify NO reply sent (no active members)
         mock_message.reply.assert_not_called()
 
+    @pytest.mark.asyncio
+    async def test_layout_cached_only_for_unchanged_roster(self, mock_message, mock_storage, mock_formatter):
+        """The layout is cached under the version read before the fetch, unless the roster changed since."""
+        from src.discord.events import on_message
+        
+        mock_storage.get_user.return_value = {"city": "Berlin", "timezone": "Europe/Berlin", "flag": "🇩🇪"}
+        mock_storage.get_chat_members.return_value = [
+            {"user_id": 12345, "city": "Berlin", "timezone": "Europe/Berlin", "flag": "🇩🇪"},
+        ]
+        mock_message.guild.get_member = lambda uid: MagicMock()
+        
+        mock_storage.get_chat_version.side_effect = [(0, 1), (0, 1)]
+        await on_message(mock_message)
+        assert mock_formatter.iter_conversion_replies.call_args.kwargs["layout_key"] == ("discord", 9999, (0, 1))
+        
+        # A member joined between the fetch and the reply
+        mock_storage.get_chat_version.side_effect = [(0, 1), (0, 2)]
+        await on_message(mock_message)
+        assert mock_formatter.iter_conversion_replies.call_args.kwargs["layout_key"] is None
+
 
 class TestOnMemberRemove:
     """Tests for on_member_remove event handler."""
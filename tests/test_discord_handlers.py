@@ -48,13 +48,13 @@ class TestHandleSettz:
         from src.discord.commands import handle_settz
         
         # Mock geo
-        mock_geo = MagicMock()
+        mock_geo = AsyncMock()
         mock_geo.get_timezone_by_city.return_value = {
             "city": "Berlin",
             "timezone": "Europe/Berlin",
             "flag": "🇩🇪"
         }
-        monkeypatch.setattr("src.discord.commands.geo", mock_geo)
+        monkeypatch.setattr("src.discord.commands.geocache", mock_geo)
         
         await handle_settz(mock_interaction, "Berlin")
         
@@ -77,9 +77,9 @@ class TestHandleSettz:
         from src.discord.commands import handle_settz
         
         # Mock geo to return None (city not found)
-        mock_geo = MagicMock()
+        mock_geo = AsyncMock()
         mock_geo.get_timezone_by_city.return_value = None
-        monkeypatch.setattr("src.discord.commands.geo", mock_geo)
+        monkeypatch.setattr("src.discord.commands.geocache", mock_geo)
         
         await handle_settz(mock_interaction, "InvalidCity123")
         
@@ -96,9 +96,9 @@ class TestHandleSettz:
         from src.discord.commands import handle_settz
         
         # Mock geo to return error dict
-        mock_geo = MagicMock()
+        mock_geo = AsyncMock()
         mock_geo.get_timezone_by_city.return_value = {"error": "Service unavailable"}
-        monkeypatch.setattr("src.discord.commands.geo", mock_geo)
+        monkeypatch.setattr("src.discord.commands.geocache", mock_geo)
         
         await handle_settz(mock_interaction, "Berlin")
         
@@ -116,13 +116,13 @@ class TestHandleManualTime:
         from src.discord.commands import handle_manual_time
         
         # Mock geo
-        mock_geo = MagicMock()
+        mock_geo = AsyncMock()
         mock_geo.resolve_timezone_from_input.return_value = {
             "city": "UTC+3",
             "timezone": "Europe/Moscow",
             "flag": "🌐"
         }
-        monkeypatch.setattr("src.discord.commands.geo", mock_geo)
+        monkeypatch.setattr("src.discord.commands.geocache", mock_geo)
         
         await handle_manual_time(mock_interaction, "15:30")
         
@@ -143,9 +143,9 @@ class TestHandleManualTime:
         from src.discord.commands import handle_manual_time
         
         # Mock geo to return None (invalid input)
-        mock_geo = MagicMock()
+        mock_geo = AsyncMock()
         mock_geo.resolve_timezone_from_input.return_value = None
-        monkeypatch.setattr("src.discord.commands.geo", mock_geo)
+        monkeypatch.setattr("src.discord.commands.geocache", mock_geo)
         
         await handle_manual_time(mock_interaction, "invalid")
         
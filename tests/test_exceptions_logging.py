@@ -1,9 +1,11 @@
 import pytest
-from unittest.mock import MagicMock, patch
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
 from geopy.exc import GeocoderTimedOut, GeocoderServiceError
 import logging
 
-from src.geo import get_timezone_by_city
+from src import geo
+from src.geo import get_timezone_by_city_async
 from src.formatter import normalize_time
 from src.commands.middleware import PassiveCollectionMiddleware
 from aiogram.types import Message, Chat, User
@@ -12,29 +14,43 @@ from aiogram.types import Message, Chat, User
 # 1. Geo Tests: Verify API Failures are Handled & Logged
 # ----------------------------------------------------------------------
 
-def test_geo_timeout_logging(caplog):
+@pytest.fixture
+def failing_geocoder(monkeypatch):
+    """Async client of the test loop whose Nominatim request raises the given error."""
+    monkeypatch.setattr("src.geo.get_geo_settings", lambda: {"gazetteer": False})
+
+    def install(error):
+        geo._client = None
+        geo._get_client().geolocator = SimpleNamespace(geocode=AsyncMock(side_effect=error))
+
+    yield install
+    geo._client = None
+
+@pytest.mark.asyncio
+async def test_geo_timeout_logging(caplog, failing_geocoder):
     """Test that GeocoderTimedOut is caught and logged as warning."""
-    with patch("src.geo._geolocator.geocode", side_effect=GeocoderTimedOut("Connection lost")):
-        with caplog.at_level(logging.ERROR):
-            result = get_timezone_by_city("Lost City")
-            
-            # Should return error dict
-            assert isinstance(result, dict)
-            assert "error" in result
-            assert "Geocoding service unavailable" in result["error"]
-            
-            # Should capture error log
-            assert "Geocoding error for 'Lost City'" in caplog.text
-            assert "Connection lost" in caplog.text
+    failing_geocoder(GeocoderTimedOut("Connection lost"))
+    with caplog.at_level(logging.ERROR):
+        result = await get_timezone_by_city_async("Lost City")
+        
+        # Should return error dict
+        assert isinstance(result, dict)
+        assert "error" in result
+        assert "Geocoding service unavailable" in result["error"]
+        
+        # Should capture error log
+        assert "Geocoding error for 'Lost City'" in caplog.text
+        assert "Connection lost" in caplog.text
 
-def test_geo_service_error_logging(caplog):
+@pytest.mark.asyncio
+async def test_geo_service_error_logging(caplog, failing_geocoder):
     """Test that GeocoderServiceError (500/503) is caught and logged."""
-    with patch("src.geo._geolocator.geocode", side_effect=GeocoderServiceError("Service unavailable")):
-        with caplog.at_level(logging.ERROR):
-            result = get_timezone_by_city("Berlin")
-            assert isinstance(result, dict)
-            assert "error" in result
-            assert "Geocoding error for 'Berlin'" in caplog.text
+    failing_geocoder(GeocoderServiceError("Service unavailable"))
+    with caplog.at_level(logging.ERROR):
+        result = await get_timezone_by_city_async("Berlin")
+        assert isinstance(result, dict)
+        assert "error" in result
+        assert "Geocoding error for 'Berlin'" in caplog.text
 
 # ----------------------------------------------------------------------
 # 2. Formatter Tests: Parsing Robustness
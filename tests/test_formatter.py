@@ -1,5 +1,11 @@
 """Tests for formatter module."""
-from src.formatter import normalize_time, format_conversion_reply
+import pytest
+
+from src.capture import parse_match
+from src.formatter import (
+    normalize_time, format_conversion_reply, format_conversion_replies, iter_chunks,
+    build_reply_layout, clear_layout_cache
+)
 
 
 class TestNormalizeTime:
@@ -53,6 +59,10 @@ class TestNormalizeTime:
         """Invalid input returns original string."""
         assert normalize_time("not a time") == "not a time"
     
+    def test_match_record(self):
+        """TimeMatch is formatted without re-parsing."""
+        assert normalize_time(parse_match("5:30 pm")) == "17:30"
+
     def test_case_insensitive(self):
         """AM/PM case insensitive."""
         assert normalize_time("5 PM") == "17:00"
@@ -115,3 +125,218 @@ class TestFormatConversionReply:
         )
         
         assert "07:00⁺¹ Tokyo 🇯🇵" in reply
+
+    def test_match_parsed_once(self, monkeypatch):
+        """A TimeMatch is never re-parsed, however many groups there are."""
+        def fail(*args):
+            raise AssertionError("time string parsed again")
+        
+        match = parse_match("14:00")
+        monkeypatch.setattr("src.formatter.parse_time_string", fail)
+        monkeypatch.setattr("src.transform.parse_time_string", fail)
+        
+        members = [
+            {"city": "New York", "timezone": "America/New_York", "flag": "🇺🇸", "username": "bob"},
+            {"city": "Tokyo", "timezone": "Asia/Tokyo", "flag": "🇯🇵", "username": "charlie"},
+            {"city": "London", "timezone": "Europe/London", "flag": "🇬🇧", "username": "dave"},
+        ]
+        
+        reply = format_conversion_reply(match, "UTC", "UTC", "", members)
+        assert "14:00 UTC" in reply
+        assert "23:00 Tokyo 🇯🇵" in reply
+
+
+class TestReplyLayoutCache:
+    """Test per-chat reply layout reuse."""
+    
+    MEMBERS = [
+        {"city": "Berlin", "timezone": "Europe/Berlin", "flag": "🇩🇪", "username": "alice"},
+        {"city": "Tokyo", "timezone": "Asia/Tokyo", "flag": "🇯🇵", "username": "charlie"},
+        {"city": "New York", "timezone": "America/New_York", "flag": "🇺🇸", "username": "bob"},
+    ]
+    
+    @pytest.fixture(autouse=True)
+    def fresh_cache(self):
+        clear_layout_cache()
+        yield
+        clear_layout_cache()
+    
+    def test_layout_sorted_and_prejoined(self):
+        """Layout excludes sender and orders zones by offset."""
+        layout = build_reply_layout(self.MEMBERS, "Berlin")
+        assert layout.zones == ["America/New_York", "Asia/Tokyo"]
+        assert layout.labels == ["New York 🇺🇸", "Tokyo 🇯🇵"]
+        assert layout.suffix == ""
+    
+    def test_reused_for_same_version(self, monkeypatch):
+        """Same version: layout built once for many messages."""
+        calls = []
+        real_build = build_reply_layout
+        monkeypatch.setattr(
+            "src.formatter.build_reply_layout",
+            lambda *args: calls.append(args) or real_build(*args)
+        )
+        
+        for t in ("10:00", "11:00", "12:00"):
+            format_conversion_reply(t, "Berlin", "Europe/Berlin", "🇩🇪", self.MEMBERS,
+                                    layout_key=("telegram", 1, (0, 1)))
+        assert len(calls) == 1
+        
+        # New membership version rebuilds
+        format_conversion_reply("10:00", "Berlin", "Europe/Berlin", "🇩🇪", self.MEMBERS[:2],
+                                layout_key=("telegram", 1, (0, 2)))
+        assert len(calls) == 2
+    
+    def test_cached_reply_matches_uncached(self):
+        """Cached path renders exactly like the uncached one."""
+        plain = format_conversion_reply("09:30", "Berlin", "Europe/Berlin", "🇩🇪", self.MEMBERS, "Alice")
+        for _ in range(2):
+            cached = format_conversion_reply("09:30", "Berlin", "Europe/Berlin", "🇩🇪", self.MEMBERS, "Alice",
+                                             layout_key=("discord", 5, (3, 4)))
+            assert cached == plain
+
+
+class TestFormatConversionReplies:
+    """Test replies for messages with several times."""
+    
+    MEMBERS = [
+        {"city": "Berlin", "timezone": "Europe/Berlin", "flag": "🇩🇪"},
+        {"city": "New York", "timezone": "America/New_York", "flag": "🇺🇸"},
+    ]
+    
+    def test_batched_single_message(self):
+        """All times in one reply, one line each, footer once."""
+        replies = format_conversion_replies(
+            ["10:00", "15:00"], "Berlin", "Europe/Berlin", "🇩🇪", self.MEMBERS
+        )
+        assert len(replies) == 1
+        lines = replies[0].split("\n")
+        assert lines[0].startswith("10:00 Berlin")
+        assert lines[1].startswith("15:00 Berlin")
+        assert lines[2] == "/tb_help"
+    
+    def test_single_time_matches_single_reply(self):
+        """One time: same text as format_conversion_reply."""
+        replies = format_conversion_replies(["10:00"], "Berlin", "Europe/Berlin", "🇩🇪", self.MEMBERS)
+        assert replies == [format_conversion_reply("10:00", "Berlin", "Europe/Berlin", "🇩🇪", self.MEMBERS)]
+    
+    def test_split_at_platform_limit(self):
+        """Only split when the platform limit is reached."""
+        times = [f"{h:02d}:{m:02d}" for h in range(24) for m in range(0, 60, 10)]
+        replies = format_conversion_replies(
+            times, "Berlin", "Europe/Berlin", "🇩🇪", self.MEMBERS, platform="discord"
+        )
+        assert len(replies) > 1
+        assert all(len(r) <= 2000 for r in replies)
+        assert all(r.endswith("\n/tb_help") for r in replies)
+        lines = [line for r in replies for line in r.split("\n") if line != "/tb_help"]
+        assert len(lines) == len(times)
+        
+        telegram = format_conversion_replies(
+            times, "Berlin", "Europe/Berlin", "🇩🇪", self.MEMBERS, platform="telegram"
+        )
+        assert len(telegram) < len(replies)
+    
+    def test_separate_mode(self, monkeypatch):
+        """batch_times: false keeps one message per time."""
+        monkeypatch.setattr("src.formatter.get_bot_settings", lambda: {"batch_times": False})
+        replies = format_conversion_replies(
+            ["10:00", "15:00"], "Berlin", "Europe/Berlin", "🇩🇪", self.MEMBERS
+        )
+        assert len(replies) == 2
+        assert all(r.endswith("\n/tb_help") for r in replies)
+
+
+class TestReplyChunks:
+    """Test size-limited reply chunks for huge rosters."""
+    
+    @staticmethod
+    def roster(n):
+        zones = ["America/New_York", "Europe/Paris", "Asia/Tokyo", "Australia/Sydney", "America/Sao_Paulo"]
+        return [
+            {"city": f"City{i}", "timezone": zones[i % len(zones)], "flag": "🏳", "username": f"user{i}"}
+            for i in range(n)
+        ]
+    
+    @pytest.fixture
+    def unlimited(self, monkeypatch):
+        settings = {"display_limit_per_chat": 0, "compact_threshold": 0}
+        monkeypatch.setattr("src.formatter.get_bot_settings", lambda: settings)
+        return settings
+    
+    def test_iter_chunks_keeps_lines_whole(self):
+        """Lines that fit are never split across messages."""
+        lines = [["a" * 30, "b" * 30], ["c" * 30, "d" * 30]]
+        chunks = list(iter_chunks(lines, 80))
+        assert chunks == [
+            f"{'a' * 30} | {'b' * 30}\n/tb_help",
+            f"{'c' * 30} | {'d' * 30}\n/tb_help",
+        ]
+    
+    def test_iter_chunks_splits_long_line_at_parts(self):
+        """A line longer than a message continues at a part boundary."""
+        parts = [f"part{i:03d}" for i in range(100)]
+        chunks = list(iter_chunks([parts], 100))
+        assert len(chunks) > 1
+        assert all(len(c) <= 100 for c in chunks)
+        rebuilt = [p for c in chunks for p in c.removesuffix("\n/tb_help").split(" | ")]
+        assert rebuilt == parts
+    
+    def test_iter_chunks_counts_utf16_units(self):
+        """Flag emoji count as 4 units (Telegram's limit is in UTF-16 code units)."""
+        flags = "🇩🇪🇺🇸🇯🇵🇧🇷🇦🇺"
+        lines = [[f"10:00 City{i} {flags}", f"11:00 Town{i} {flags}"] for i in range(400)]
+        chunks = list(iter_chunks(lines, 4096))
+        
+        assert len(chunks) > 1
+        assert all(len(c.encode("utf-16-le")) // 2 <= 4096 for c in chunks)
+        # Code points alone would have allowed more rows per message
+        assert max(len(c) for c in chunks) < 4096 - 1000
+        rebuilt = [line for c in chunks for line in c.removesuffix("\n/tb_help").split("\n")]
+        assert rebuilt == [" | ".join(parts) for parts in lines]
+    
+    def test_iter_chunks_truncates_without_splitting_emoji(self):
+        """A single oversized part is cut at a character boundary."""
+        chunks = list(iter_chunks([["🇩🇪" * 50]], 40))
+        assert len(chunks[0].encode("utf-16-le")) // 2 <= 40
+        assert chunks[0].removesuffix("\n/tb_help") == "🇩🇪" * 7 + "🇩"
+    
+    def test_iter_chunks_is_lazy(self):
+        """First chunk is yielded before later lines are produced."""
+        produced = []
+        
+        def lines():
+            for i in range(10):
+                produced.append(i)
+                yield ["x" * 50]
+        
+        first = next(iter_chunks(lines(), 60))
+        assert first == "x" * 50 + "\n/tb_help"
+        assert len(produced) < 10
+    
+    @pytest.mark.parametrize("platform,limit", [("telegram", 4096), ("discord", 2000)])
+    def test_huge_roster_within_platform_limit(self, unlimited, platform, limit):
+        """3000 members, unlimited display: every chunk fits the platform."""
+        members = self.roster(3000)
+        replies = format_conversion_replies(
+            ["10:00"], "Berlin", "Europe/Berlin", "🇩🇪", members, platform=platform
+        )
+        assert len(replies) > 1
+        assert all(len(r.encode("utf-16-le")) // 2 <= limit for r in replies)
+    
+    def test_compact_counts_per_zone(self, unlimited):
+        """Past the threshold, one count per zone replaces the city lists."""
+        unlimited["compact_threshold"] = 50
+        members = self.roster(3000)
+        replies = format_conversion_replies(["10:00"], "Berlin", "Europe/Berlin", "🇩🇪", members)
+        assert len(replies) == 1
+        assert "(600)" in replies[0]
+        assert replies[0].count(" | ") == 5
+    
+    def test_compact_not_used_below_threshold(self, unlimited):
+        """Small rosters keep the full labels."""
+        unlimited["compact_threshold"] = 50
+        members = self.roster(10)
+        reply = format_conversion_reply("10:00", "Berlin", "Europe/Berlin", "🇩🇪", members)
+        assert "City0" in reply and "City5" in reply
+        assert "(" not in reply
@@ -0,0 +1,218 @@
+"""Tests for gazetteer module - offline city index."""
+import zipfile
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+
+from src import gazetteer
+from src.gazetteer import Gazetteer, Place, build_index, load_index, normalize_name, parse_dump
+
+
+def geonames_row(name, alternates, country, population, timezone, ascii_name=None):
+    """One line in GeoNames dump format (19 tab-separated fields)."""
+    fields = [""] * 19
+    fields[0] = "1"
+    fields[1] = name
+    fields[2] = ascii_name or name
+    fields[3] = ",".join(alternates)
+    fields[6] = "P"
+    fields[8] = country
+    fields[14] = str(population)
+    fields[17] = timezone
+    return "\t".join(fields) + "\n"
+
+
+DUMP = "".join([
+    geonames_row("Paris", ["Parigi", "Париж", "PAR"], "FR", 2138551, "Europe/Paris"),
+    geonames_row("Paris", [], "US", 24171, "America/Chicago"),
+    geonames_row("São Paulo", ["Sao Paulo", "SAO"], "BR", 10021295, "America/Sao_Paulo", "Sao Paulo"),
+    geonames_row("Saint-Denis", [], "RE", 147931, "Indian/Reunion"),
+    geonames_row("Nowhere", [], "XX", 20000, "Not/AZone"),
+])
+
+
+@pytest.fixture
+def dump_path(tmp_path):
+    path = tmp_path / "cities15000.txt"
+    path.write_text(DUMP, encoding="utf-8")
+    return path
+
+
+@pytest.fixture
+def index(dump_path, tmp_path):
+    out = tmp_path / "gazetteer.tsv.gz"
+    build_index(dump_path, out)
+    return load_index(out)
+
+
+class TestNormalizeName:
+    """Test lookup key normalization."""
+
+    def test_case_and_accents(self):
+        assert normalize_name("São Paulo") == "sao paulo"
+        assert normalize_name("  BERLIN ") == "berlin"
+
+    def test_punctuation_as_spaces(self):
+        assert normalize_name("Saint-Denis") == "saint denis"
+        assert normalize_name("St. John's") == "st john s"
+
+    def test_non_latin_kept(self):
+        assert normalize_name("Париж") == "париж"
+
+
+class TestBuildAndLoad:
+    """Test dump parsing and the index file."""
+
+    def test_parse_ranks_by_population(self, dump_path):
+        rows = parse_dump(dump_path)
+        assert [place.population for place, _ in rows] == sorted(
+            (place.population for place, _ in rows), reverse=True
+        )
+
+    def test_unknown_zone_skipped(self, dump_path):
+        names = [place.name for place, _ in parse_dump(dump_path)]
+        assert "Nowhere" not in names
+
+    def test_codes_not_indexed(self, index):
+        assert index.lookup("PAR") is None
+        assert index.lookup("SAO") is None
+
+    def test_zip_dump(self, tmp_path):
+        archive = tmp_path / "cities15000.zip"
+        with zipfile.ZipFile(archive, "w") as z:
+            z.writestr("cities15000.txt", DUMP)
+        out = tmp_path / "index.tsv.gz"
+        assert build_index(archive, out) == 4
+        assert load_index(out).lookup("Paris").country_code == "FR"
+
+    def test_missing_or_bad_file(self, tmp_path):
+        assert load_index(tmp_path / "missing.tsv.gz") is None
+        bad = tmp_path / "bad.tsv.gz"
+        bad.write_bytes(b"not gzip")
+        assert load_index(bad) is None
+
+
+class TestLookup:
+    """Test city resolution from the index."""
+
+    def test_most_populous_wins(self, index):
+        place = index.lookup("paris")
+        assert place == Place("Paris", "FR", "Europe/Paris", 2138551)
+        assert [p.country_code for p in index.candidates("Paris")] == ["FR", "US"]
+
+    def test_alternate_and_ascii_names(self, index):
+        assert index.lookup("Parigi").timezone == "Europe/Paris"
+        assert index.lookup("Париж").timezone == "Europe/Paris"
+        assert index.lookup("sao paulo").timezone == "America/Sao_Paulo"
+        assert index.lookup("saint denis").timezone == "Indian/Reunion"
+
+    def test_miss(self, index):
+        assert index.lookup("Atlantis") is None
+
+    def test_empty_index(self):
+        assert Gazetteer([], []).lookup("Paris") is None
+
+
+class TestFuzzy:
+    """Test typo-tolerant matching."""
+
+    def test_typos_resolve(self, index):
+        place, confidence = index.fuzzy("Sao Paolo", limit=1)[0]
+        assert place.name == "São Paulo"
+        assert confidence >= 0.85
+
+    def test_ranked_best_first(self, index):
+        matches = index.fuzzy("Pariss")
+        assert matches[0][0] == Place("Paris", "FR", "Europe/Paris", 2138551)
+        confidences = [confidence for _, confidence in matches]
+        assert confidences == sorted(confidences, reverse=True)
+
+    def test_unrelated_query_low_confidence(self, index):
+        matches = index.fuzzy("Atlantis")
+        assert all(confidence < 0.85 for _, confidence in matches)
+
+    def test_empty(self, index):
+        assert index.fuzzy("") == []
+        assert Gazetteer([], []).fuzzy("Paris") == []
+
+    def test_match_city_threshold(self, index, monkeypatch):
+        monkeypatch.setattr(gazetteer, "_gazetteer", index)
+        assert gazetteer.match_city("Sao Paolo", 0.85)[0].name == "São Paulo"
+        assert gazetteer.match_city("Sao Paolo", 0.99) is None
+
+
+@pytest.fixture
+async def geocoder():
+    """Nominatim request of the async client (test loop), answering "not found"."""
+    from src import geo
+    geo._client = None
+    geocode = AsyncMock(return_value=None)
+    geo._get_client().geolocator = SimpleNamespace(geocode=geocode)
+    yield geocode
+    geo._client = None
+
+
+class TestGeoIntegration:
+    """Test geo.get_timezone_by_city_async with the gazetteer in front."""
+
+    @pytest.mark.asyncio
+    async def test_hit_skips_nominatim(self, index, geocoder, monkeypatch):
+        from src.geo import get_timezone_by_city_async
+        monkeypatch.setattr(gazetteer, "_gazetteer", index)
+
+        result = await get_timezone_by_city_async("paris")
+
+        assert result == {
+            "city": "Paris",
+            "timezone": "Europe/Paris",
+            "country_code": "FR",
+            "flag": "🇫🇷",
+            "display_name": "Paris",
+        }
+        geocoder.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_miss_falls_back_to_nominatim(self, index, geocoder, monkeypatch):
+        from src.geo import get_timezone_by_city_async
+        monkeypatch.setattr(gazetteer, "_gazetteer", index)
+
+        assert await get_timezone_by_city_async("Atlantis") is None
+        geocoder.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_disabled(self, index, geocoder, monkeypatch):
+        from src.geo import get_timezone_by_city_async
+        monkeypatch.setattr(gazetteer, "_gazetteer", index)
+        monkeypatch.setattr("src.geo.get_geo_settings", lambda: {"gazetteer": False})
+
+        assert await get_timezone_by_city_async("Paris") is None
+        geocoder.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_typo_corrected(self, index, geocoder, monkeypatch):
+        from src.geo import get_timezone_by_city_async
+        monkeypatch.setattr(gazetteer, "_gazetteer", index)
+
+        result = await get_timezone_by_city_async("Sao Paolo")
+
+        assert result["city"] == "São Paulo"
+        assert result["timezone"] == "America/Sao_Paulo"
+        geocoder.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_low_confidence_goes_to_nominatim(self, index, geocoder, monkeypatch):
+        from src.geo import get_timezone_by_city_async
+        monkeypatch.setattr(gazetteer, "_gazetteer", index)
+
+        assert await get_timezone_by_city_async("Paros Island") is None
+        geocoder.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_fuzzy_disabled(self, index, geocoder, monkeypatch):
+        from src.geo import get_timezone_by_city_async
+        monkeypatch.setattr(gazetteer, "_gazetteer", index)
+        monkeypatch.setattr("src.geo.get_geo_settings", lambda: {"fuzzy": {"enabled": False}})
+
+        assert await get_timezone_by_city_async("Sao Paolo") is None
+        geocoder.assert_called_once()
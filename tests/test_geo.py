@@ -1,16 +1,45 @@
 """Tests for geo module - city lookup and timezone resolution."""
-from unittest.mock import patch
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+from geopy.exc import GeocoderTimedOut
+
+
+@pytest.fixture(autouse=True)
+def no_gazetteer(monkeypatch):
+    """These tests cover the Nominatim path; keep a locally built index out of it."""
+    from src import gazetteer
+    monkeypatch.setattr(gazetteer, "_gazetteer", gazetteer.Gazetteer([], []))
+
+
+@pytest.fixture
+async def live_geo():
+    """Async client talking to the real Nominatim (network), closed afterwards."""
+    from src import geo
+    geo._client = None
+    yield
+    await geo.close()
+
+
+@pytest.fixture
+def no_geocache(monkeypatch):
+    """Resolve through geocache without its LRU and table."""
+    from src import geocache
+    monkeypatch.setattr(geocache, "get_geo_settings", lambda: {"cache": {"enabled": False}})
 
 
 class TestGetTimezoneByCity:
-    """Tests for get_timezone_by_city function."""
+    """Tests for get_timezone_by_city_async against the live service."""
     
-    def test_valid_city_returns_timezone(self):
+    @pytest.mark.asyncio
+    async def test_valid_city_returns_timezone(self, live_geo):
         """Test that a known city returns correct timezone info."""
-        from src.geo import get_timezone_by_city
+        from src.geo import get_timezone_by_city_async
         
         # Use a well-known city that geocoding should always find
-        result = get_timezone_by_city("Berlin")
+        result = await get_timezone_by_city_async("Berlin")
         
         assert result is not None
         assert "error" not in result
@@ -18,25 +47,15 @@ class TestGetTimezoneByCity:
         assert result["city"] == "Berlin"
         assert result["flag"] != ""  # Should have a flag
 
-    def test_invalid_city_returns_none(self):
+    @pytest.mark.asyncio
+    async def test_invalid_city_returns_none(self, live_geo):
         """Test that nonexistent city returns None."""
-        from src.geo import get_timezone_by_city
+        from src.geo import get_timezone_by_city_async
         
-        result = get_timezone_by_city("Nonexistent_City_12345xyz")
+        result = await get_timezone_by_city_async("Nonexistent_City_12345xyz")
         
         assert result is None
 
-    def test_geocoder_timeout_returns_error_dict(self):
-        """Test that geocoder timeout returns error dict, not exception."""
-        from src.geo import get_timezone_by_city
-        from geopy.exc import GeocoderTimedOut
-        
-        with patch("src.geo._geolocator.geocode", side_effect=GeocoderTimedOut("Timeout")):
-            result = get_timezone_by_city("Berlin")
-            
-            assert result is not None
-            assert "error" in result
-
 
 class TestGetTimezoneByOffset:
     """Tests for get_timezone_by_offset function."""
@@ -78,53 +97,99 @@ class TestGetTimezoneByOffset:
         
         result = get_timezone_by_offset(-15)  # Beyond -12
         assert result["offset"] == -12
+    
+    def test_fractional_offsets(self):
+        """Test half- and quarter-hour zones (India, Nepal, Newfoundland)."""
+        from src.geo import get_timezone_by_offset
+        
+        result = get_timezone_by_offset(5.5)
+        assert result["timezone"] == "Asia/Kolkata"
+        assert result["city"] == "UTC+5:30"
+        
+        assert get_timezone_by_offset(5.75)["timezone"] == "Asia/Kathmandu"
+        
+        result = get_timezone_by_offset(-3.5)
+        assert result["timezone"] == "America/St_Johns"
+        assert result["city"] == "UTC-3:30"
+    
+    def test_rounds_to_nearest_valid_offset(self):
+        """Test a few minutes off still lands on the zone."""
+        from src.geo import get_timezone_by_offset
+        
+        assert get_timezone_by_offset(5.55)["timezone"] == "Asia/Kolkata"
+        assert get_timezone_by_offset(2.9)["timezone"] == "Europe/Moscow"
+    
+    def test_time_input_fractional_offset(self):
+        """Test the current-time fallback keeps minutes (no whole-hour rounding)."""
+        from datetime import datetime, timedelta, timezone
+        from src.geo import get_timezone_by_time_input
+        
+        kolkata = datetime.now(timezone.utc) + timedelta(hours=5, minutes=30)
+        result = get_timezone_by_time_input(kolkata.strftime("%H:%M"))
+        
+        assert result["timezone"] == "Asia/Kolkata"
+    
+    def test_time_input_day_boundary_prefers_populous(self):
+        """Test UTC-11 vs UTC+13 (same wall clock): the more populous zone wins."""
+        from datetime import datetime, timedelta, timezone
+        from src.geo import get_timezone_by_time_input
+        
+        clock = datetime.now(timezone.utc) + timedelta(hours=13)
+        result = get_timezone_by_time_input(clock.strftime("%H:%M"))
+        
+        assert result["offset"] == 13  # Tonga/New Zealand, not Midway
 
 
 class TestResolveTimezoneFromInput:
-    """Tests for resolve_timezone_from_input - the universal resolver."""
+    """Tests for geocache.resolve_timezone_from_input - the universal resolver."""
     
-    def test_time_input_returns_offset_timezone(self):
+    @pytest.mark.asyncio
+    async def test_time_input_returns_offset_timezone(self, no_geocache):
         """Test that time string like '15:30' resolves to offset-based timezone."""
-        from src.geo import resolve_timezone_from_input
+        from src.geocache import resolve_timezone_from_input
         
         # We can't predict exact offset without knowing current UTC,
         # but we CAN verify it returns a valid result with offset pattern
-        result = resolve_timezone_from_input("15:30")
+        result = await resolve_timezone_from_input("15:30")
         
         assert result is not None
         assert "timezone" in result
         assert result["flag"] == "🌐"  # Offset-based timezones use globe
     
-    def test_city_input_returns_city_timezone(self):
+    @pytest.mark.asyncio
+    async def test_city_input_returns_city_timezone(self, no_geocache, live_geo):
         """Test that city name resolves to geocoded timezone."""
-        from src.geo import resolve_timezone_from_input
+        from src.geocache import resolve_timezone_from_input
         
-        result = resolve_timezone_from_input("Berlin")
+        result = await resolve_timezone_from_input("Berlin")
         
         assert result is not None
         assert result["timezone"] == "Europe/Berlin"
         assert result["flag"] != "🌐"  # City should have country flag
     
-    def test_invalid_input_returns_none(self):
+    @pytest.mark.asyncio
+    async def test_invalid_input_returns_none(self, no_geocache, fake_geo):
         """Test that garbage input returns None."""
-        from src.geo import resolve_timezone_from_input
+        from src.geocache import resolve_timezone_from_input
         
-        result = resolve_timezone_from_input("xyz123notacity")
+        result = await resolve_timezone_from_input("nonexistent_xyz123")
         
         assert result is None
     
-    def test_time_takes_priority_over_city(self):
+    @pytest.mark.asyncio
+    async def test_time_takes_priority_over_city(self, no_geocache, fake_geo):
         """Test that time pattern is checked BEFORE city geocoding.
         
         This prevents false matches like '19:53' -> Jakarta.
         """
-        from src.geo import resolve_timezone_from_input
+        from src.geocache import resolve_timezone_from_input
         
         # '10:00' should be treated as time, not geocoded
-        result = resolve_timezone_from_input("10:00")
+        result = await resolve_timezone_from_input("10:00")
         
         assert result is not None
         assert result["flag"] == "🌐"  # Should be offset-based, not a city
+        assert fake_geo().queries == []
 
 
 class TestGetCountryFlag:
@@ -152,3 +217,381 @@ class TestGetCountryFlag:
         assert get_country_flag("X") == ""
         assert get_country_flag("TOOLONG") == ""
         assert get_country_flag(None) == ""
+
+
+class FakeGeocoder:
+    """Local stand-in for Nominatim: fixed answers, network delay, call log."""
+    
+    def __init__(self, delay=0.1, error=None):
+        self.delay = delay
+        self.error = error
+        self.queries = []
+        self.active = 0
+        self.max_active = 0
+    
+    async def geocode(self, query, **kwargs):
+        self.queries.append(query)
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(self.delay)  # network round trip
+            if self.error:
+                raise self.error
+            if "nonexistent" in query.lower():
+                return None
+            return SimpleNamespace(
+                latitude=52.52, longitude=13.40,
+                raw={"address": {"country_code": "de"}},
+                address="Berlin, Deutschland"
+            )
+        finally:
+            self.active -= 1
+
+
+GEO_SETTINGS = {
+    "gazetteer": False,
+    "raster": False,
+    "max_concurrency": 4,
+    "rate_limit": {"requests_per_second": 1000, "burst": 100, "max_queue": 100},
+    "breaker": {"failure_threshold": 3, "slow_seconds": 2.0, "reset_seconds": 30},
+}
+
+
+@pytest.fixture
+async def fake_geo(monkeypatch):
+    """Async client of the test loop backed by FakeGeocoder and a slow TimezoneFinder."""
+    from src import geo
+    
+    def slow_timezone_at(lat, lng):
+        time.sleep(0.1)  # CPU-bound point-in-polygon
+        return "Europe/Berlin"
+    
+    settings = {key: dict(value) if isinstance(value, dict) else value for key, value in GEO_SETTINGS.items()}
+    monkeypatch.setattr(geo, "get_geo_settings", lambda: settings)
+    monkeypatch.setattr(geo, "_tf", SimpleNamespace(timezone_at=slow_timezone_at))
+    geocoder = FakeGeocoder()
+    
+    def install(**overrides):
+        """(Re)create the client with settings overrides; returns the fake."""
+        for key, value in overrides.items():
+            if isinstance(value, dict):
+                settings[key].update(value)
+            else:
+                settings[key] = value
+        geo._client = None
+        client = geo._get_client()
+        client.geolocator = geocoder
+        return geocoder
+    
+    install()
+    geo.reset_geo_stats()
+    yield install
+    geo._client = None
+    geo.reset_geo_stats()
+
+
+class TestGetTimezoneByCityAsync:
+    """Tests for the non-blocking lookup used by the bots."""
+    
+    @pytest.mark.asyncio
+    async def test_result(self, fake_geo):
+        from src.geo import get_timezone_by_city_async
+        
+        result = await get_timezone_by_city_async("berlin")
+        
+        assert result == {
+            "city": "Berlin",
+            "timezone": "Europe/Berlin",
+            "country_code": "DE",
+            "flag": "🇩🇪",
+            "display_name": "Berlin",
+        }
+    
+    @pytest.mark.asyncio
+    async def test_loop_stays_responsive(self, fake_geo):
+        """Other tasks keep running while lookups are in flight."""
+        from src.geo import get_timezone_by_city_async
+        
+        gaps = []
+        
+        async def ticker():
+            last = time.perf_counter()
+            while True:
+                await asyncio.sleep(0.005)
+                now = time.perf_counter()
+                gaps.append(now - last)
+                last = now
+        
+        tick = asyncio.create_task(ticker())
+        results = await asyncio.gather(*(get_timezone_by_city_async(f"City{i}") for i in range(8)))
+        tick.cancel()
+        
+        assert all(r["timezone"] == "Europe/Berlin" for r in results)
+        # 8 lookups take ~1 s in total; no tick may wait for one of them
+        assert max(gaps) < 0.04
+    
+    @pytest.mark.asyncio
+    async def test_gazetteer_loaded_off_the_loop(self, fake_geo, monkeypatch):
+        """Loading the offline index on the first lookup doesn't stall other tasks."""
+        from src import gazetteer
+        from src.geo import get_timezone_by_city_async
+        fake_geo(gazetteer=True)
+        
+        def slow_lookup(city_name):
+            time.sleep(0.2)  # reading and indexing the file
+            return gazetteer.Place("Berlin", "DE", "Europe/Berlin", 3_600_000)
+        
+        monkeypatch.setattr(gazetteer, "lookup_city", slow_lookup)
+        ticks = 0
+        
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+        
+        tick = asyncio.create_task(ticker())
+        result = await get_timezone_by_city_async("Berlin")
+        tick.cancel()
+        
+        assert result["timezone"] == "Europe/Berlin"
+        assert ticks >= 10
+    
+    @pytest.mark.asyncio
+    async def test_concurrency_bounded(self, fake_geo):
+        from src.geo import get_timezone_by_city_async
+        geocoder = fake_geo(max_concurrency=2)
+        
+        await asyncio.gather(*(get_timezone_by_city_async(f"City{i}") for i in range(6)))
+        
+        assert geocoder.max_active == 2
+    
+    @pytest.mark.asyncio
+    async def test_timeout_returns_error_dict(self, fake_geo):
+        from src.geo import get_timezone_by_city_async
+        fake_geo().error = GeocoderTimedOut("Timeout")
+        
+        result = await get_timezone_by_city_async("Berlin")
+        
+        assert "error" in result
+    
+    @pytest.mark.asyncio
+    async def test_not_found(self, fake_geo):
+        from src.geo import get_timezone_by_city_async
+        
+        assert await get_timezone_by_city_async("Nonexistent_City_12345xyz") is None
+
+
+class TestCoalescingAndGovernor:
+    """Tests for single-flight lookups and the rate-limit governor."""
+    
+    @pytest.mark.asyncio
+    async def test_same_city_single_request(self, fake_geo):
+        """Concurrent lookups of one city share a single request."""
+        from src.geo import get_timezone_by_city_async, get_geo_stats
+        geocoder = fake_geo()
+        
+        results = await asyncio.gather(
+            get_timezone_by_city_async("Berlin"),
+            get_timezone_by_city_async("berlin"),
+            get_timezone_by_city_async(" BERLIN "),
+        )
+        
+        assert len(geocoder.queries) == 1
+        assert all(r["timezone"] == "Europe/Berlin" for r in results)
+        assert get_geo_stats()["coalesced"] == 2
+        
+        # Once finished, a new lookup goes out again
+        await get_timezone_by_city_async("Berlin")
+        assert len(geocoder.queries) == 2
+    
+    @pytest.mark.asyncio
+    async def test_cancelled_caller_does_not_cancel_others(self, fake_geo):
+        from src.geo import get_timezone_by_city_async
+        fake_geo()
+        
+        first = asyncio.create_task(get_timezone_by_city_async("Berlin"))
+        second = asyncio.create_task(get_timezone_by_city_async("Berlin"))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        
+        assert (await second)["timezone"] == "Europe/Berlin"
+    
+    @pytest.mark.asyncio
+    async def test_rate_limited(self, fake_geo):
+        """Requests are spaced by the configured rate; waiting is recorded."""
+        from src.geo import get_timezone_by_city_async, get_geo_stats
+        geocoder = fake_geo(rate_limit={"requests_per_second": 20, "burst": 1})
+        geocoder.delay = 0
+        
+        started = time.perf_counter()
+        await asyncio.gather(*(get_timezone_by_city_async(f"City{i}") for i in range(5)))
+        elapsed = time.perf_counter() - started
+        
+        # First request is free, the other 4 wait 1/20 s each
+        assert elapsed >= 0.19
+        stats = get_geo_stats()
+        assert stats["requests"] == 5
+        assert stats["wait_seconds_max"] >= 0.15
+        assert stats["queue_length"] == 0
+    
+    @pytest.mark.asyncio
+    async def test_queue_limit_rejects(self, fake_geo):
+        """Past max_queue waiters, lookups fail fast with a busy error."""
+        from src.geo import get_timezone_by_city_async, get_geo_stats
+        geocoder = fake_geo(rate_limit={"requests_per_second": 10, "burst": 1, "max_queue": 2})
+        geocoder.delay = 0
+        
+        results = await asyncio.gather(*(get_timezone_by_city_async(f"City{i}") for i in range(5)))
+        
+        # One goes out at once, two wait in the queue, the rest are rejected
+        busy = [r for r in results if r and r.get("error") == "Geocoding service busy"]
+        assert len(busy) == 2
+        assert get_geo_stats()["rejected"] == 2
+        assert len(geocoder.queries) == 3
+
+
+class TestTokenBucket:
+    """Tests for the governor itself."""
+    
+    @pytest.mark.asyncio
+    async def test_burst_then_rate(self):
+        from src.geo import TokenBucket
+        bucket = TokenBucket(rate=50, burst=3, max_queue=10)
+        
+        waits = [await bucket.acquire() for _ in range(5)]
+        
+        assert all(w < 0.005 for w in waits[:3])
+        assert all(w >= 0.015 for w in waits[3:])
+
+
+class TestCircuitBreaker:
+    """Tests for failing fast while Nominatim is degraded."""
+    
+    @pytest.mark.asyncio
+    async def test_opens_after_failures_and_fails_fast(self, fake_geo):
+        from src.geo import get_timezone_by_city_async, get_geo_stats
+        geocoder = fake_geo()
+        geocoder.error = GeocoderTimedOut("Timeout")
+        
+        for i in range(3):
+            assert "error" in await get_timezone_by_city_async(f"City{i}")
+        assert get_geo_stats()["breaker_state"] == "open"
+        
+        # Open: no request, immediate error (-> time-offset fallback in handlers)
+        started = time.perf_counter()
+        result = await get_timezone_by_city_async("Berlin")
+        assert time.perf_counter() - started < geocoder.delay
+        assert result["error"] == "Geocoding service unavailable"
+        assert len(geocoder.queries) == 3
+        
+        stats = get_geo_stats()
+        assert stats["short_circuited"] == 1
+        assert stats["breaker_opened"] == 1
+    
+    @pytest.mark.asyncio
+    async def test_slow_responses_open(self, fake_geo):
+        from src.geo import get_timezone_by_city_async, get_geo_stats
+        geocoder = fake_geo(breaker={"failure_threshold": 2, "slow_seconds": 0.05})
+        
+        # Slow but successful answers are still returned
+        for i in range(2):
+            assert (await get_timezone_by_city_async(f"City{i}"))["timezone"] == "Europe/Berlin"
+        assert get_geo_stats()["breaker_state"] == "open"
+        assert len(geocoder.queries) == 2
+    
+    @pytest.mark.asyncio
+    async def test_half_open_probe_recovers(self, fake_geo):
+        from src.geo import get_timezone_by_city_async, get_geo_stats
+        geocoder = fake_geo(breaker={"failure_threshold": 1, "reset_seconds": 0.1})
+        geocoder.delay = 0
+        geocoder.error = GeocoderTimedOut("Timeout")
+        
+        await get_timezone_by_city_async("City0")
+        assert get_geo_stats()["breaker_state"] == "open"
+        
+        # Still failing after the reset time: probe fails, breaker re-opens
+        await asyncio.sleep(0.12)
+        await get_timezone_by_city_async("City1")
+        assert get_geo_stats()["breaker_state"] == "open"
+        assert len(geocoder.queries) == 2
+        
+        # Service back: one probe closes it
+        geocoder.error = None
+        await asyncio.sleep(0.12)
+        assert (await get_timezone_by_city_async("City2"))["timezone"] == "Europe/Berlin"
+        assert get_geo_stats()["breaker_state"] == "closed"
+    
+    @pytest.mark.asyncio
+    async def test_other_client_errors_count(self, fake_geo):
+        """aiohttp and other geopy errors open the breaker too."""
+        import aiohttp
+        from geopy.exc import GeocoderParseError
+        from src.geo import get_timezone_by_city_async, get_geo_stats
+        geocoder = fake_geo(breaker={"failure_threshold": 2})
+        geocoder.delay = 0
+        
+        geocoder.error = aiohttp.ClientConnectionError("connection reset")
+        assert (await get_timezone_by_city_async("City0"))["error"] == "Geocoding service unavailable"
+        geocoder.error = GeocoderParseError("bad json")
+        assert "error" in await get_timezone_by_city_async("City1")
+        assert get_geo_stats()["breaker_state"] == "open"
+    
+    @pytest.mark.asyncio
+    async def test_cancelled_probe_is_released(self, fake_geo):
+        """A probe that never reports an outcome doesn't leave the breaker half-open forever."""
+        from src.geo import _geocode, _get_client, get_timezone_by_city_async, get_geo_stats
+        geocoder = fake_geo(breaker={"failure_threshold": 1, "reset_seconds": 0})
+        geocoder.delay = 0
+        geocoder.error = GeocoderTimedOut("Timeout")
+        await get_timezone_by_city_async("City0")
+        geocoder.error = None
+        
+        # Probe cancelled mid-request
+        geocoder.delay = 1
+        probe = asyncio.create_task(_geocode(_get_client(), "City1"))
+        await asyncio.sleep(0.01)
+        assert get_geo_stats()["breaker_state"] == "half_open"
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+        
+        # Probe failing with an error the breaker doesn't count
+        geocoder.delay = 0
+        geocoder.error = KeyError("address")
+        with pytest.raises(KeyError):
+            await _geocode(_get_client(), "City2")
+        
+        geocoder.error = None
+        assert (await get_timezone_by_city_async("City3"))["timezone"] == "Europe/Berlin"
+        assert get_geo_stats()["breaker_state"] == "closed"
+    
+    def test_single_probe_while_half_open(self):
+        from src.geo import CircuitBreaker
+        breaker = CircuitBreaker("test", failure_threshold=1, reset_seconds=0)
+        breaker.record_failure()
+        
+        assert breaker.allow() is True     # probe
+        assert breaker.allow() is False    # others wait for its outcome
+        breaker.release()
+        assert breaker.allow() is True
+
+
+
+class TestPreload:
+    """Tests for loading offline data ahead of the first lookup."""
+    
+    @pytest.mark.asyncio
+    async def test_preload_builds_indexes(self, monkeypatch):
+        from src import gazetteer, geo
+        index = gazetteer.Gazetteer([gazetteer.Place("Berlin", "DE", "Europe/Berlin", 1)], [["berlin"]])
+        monkeypatch.setattr(gazetteer, "_gazetteer", index)
+        monkeypatch.setattr(geo, "get_geo_settings", lambda: {"raster": False})
+        monkeypatch.setattr(geo, "_tf", None)
+        created = []
+        monkeypatch.setattr(geo, "TimezoneFinder", lambda: created.append(1) or SimpleNamespace())
+        
+        await geo.preload()
+        
+        assert index._fuzzy_names == ["berlin"]
+        assert created == [1]
@@ -0,0 +1,171 @@
+"""Tests for geocache module - cached city lookups."""
+import asyncio
+import time
+
+import pytest
+
+from src import geocache
+
+BERLIN = {
+    "city": "Berlin",
+    "timezone": "Europe/Berlin",
+    "country_code": "DE",
+    "flag": "🇩🇪",
+    "display_name": "Berlin",
+}
+
+
+@pytest.fixture
+async def db_storage(sqlite_storage, monkeypatch):
+    """Fresh SQLite storage behind the cache."""
+    monkeypatch.setattr(geocache, "storage", sqlite_storage)
+    geocache.clear_geocache()
+    yield sqlite_storage
+    geocache.clear_geocache()
+
+
+@pytest.fixture
+def lookups(monkeypatch):
+    """Fake geo lookup recording every call."""
+    calls = []
+    results = {"berlin": BERLIN}
+
+    async def fake_lookup(city_name):
+        calls.append(city_name)
+        return results.get(city_name.strip().lower())
+
+    monkeypatch.setattr("src.geo.get_timezone_by_city_async", fake_lookup)
+    return calls
+
+
+class TestGeocache:
+    """Test LRU + table in front of geo lookups."""
+
+    @pytest.mark.asyncio
+    async def test_repeat_lookup_hits_memory(self, db_storage, lookups):
+        assert await geocache.get_timezone_by_city("Berlin") == BERLIN
+        assert await geocache.get_timezone_by_city("  BERLIN ") == BERLIN
+        assert lookups == ["Berlin"]
+        assert geocache.get_geocache_stats()["memory_hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_persisted_across_processes(self, db_storage, lookups):
+        """After a restart (empty LRU) the table answers without geo."""
+        await geocache.get_timezone_by_city("Berlin")
+        geocache.clear_geocache()
+
+        assert await geocache.get_timezone_by_city("berlin") == BERLIN
+        assert lookups == ["Berlin"]
+        assert geocache.get_geocache_stats()["disk_hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_not_found_cached(self, db_storage, lookups):
+        assert await geocache.get_timezone_by_city("Atlantis") is None
+        geocache.clear_geocache()
+        assert await geocache.get_timezone_by_city("Atlantis") is None
+        assert lookups == ["Atlantis"]
+
+    @pytest.mark.asyncio
+    async def test_negative_ttl_shorter(self, db_storage, lookups, monkeypatch):
+        monkeypatch.setattr(
+            geocache, "get_geo_settings",
+            lambda: {"cache": {"ttl_seconds": 3600, "negative_ttl_seconds": -1}}
+        )
+        assert await geocache.get_timezone_by_city("Atlantis") is None
+        assert await geocache.get_timezone_by_city("Atlantis") is None
+        assert lookups == ["Atlantis", "Atlantis"]
+
+        await geocache.get_timezone_by_city("Berlin")
+        await geocache.get_timezone_by_city("Berlin")
+        assert lookups.count("Berlin") == 1
+
+    @pytest.mark.asyncio
+    async def test_service_error_not_cached(self, db_storage, monkeypatch):
+        calls = []
+
+        async def failing_lookup(city_name):
+            calls.append(city_name)
+            return {"error": "Geocoding service unavailable"}
+
+        monkeypatch.setattr("src.geo.get_timezone_by_city_async", failing_lookup)
+        for _ in range(2):
+            result = await geocache.get_timezone_by_city("Berlin")
+            assert "error" in result
+        assert len(calls) == 2
+        assert await db_storage.get_geocode("berlin") is None
+
+    @pytest.mark.asyncio
+    async def test_storage_failure_falls_through(self, lookups, monkeypatch):
+        """A broken cache table never blocks a lookup."""
+        class BrokenStorage:
+            async def get_geocode(self, query):
+                raise RuntimeError("disk gone")
+
+            async def set_geocode(self, query, location, expires_at):
+                raise RuntimeError("disk gone")
+
+        monkeypatch.setattr(geocache, "storage", BrokenStorage())
+        geocache.clear_geocache()
+        assert await geocache.get_timezone_by_city("Berlin") == BERLIN
+
+    @pytest.mark.asyncio
+    async def test_lru_bounded(self, db_storage, lookups, monkeypatch):
+        monkeypatch.setattr(geocache, "get_geo_settings", lambda: {"cache": {"max_size": 2}})
+        for city in ("a", "b", "c"):
+            await geocache.get_timezone_by_city(city)
+        assert geocache.get_geocache_stats()["size"] == 2
+
+    @pytest.mark.asyncio
+    async def test_hits_use_callers_spelling(self, db_storage, monkeypatch):
+        """The first caller's spelling is never shown to later callers."""
+        async def fake_lookup(city_name):
+            if city_name == "Sao Paolo":  # typo corrected by the gazetteer
+                return {**BERLIN, "city": "São Paulo", "timezone": "America/Sao_Paulo"}
+            return {**BERLIN, "city": city_name.title(), "timezone": "Europe/Zurich"}
+
+        monkeypatch.setattr("src.geo.get_timezone_by_city_async", fake_lookup)
+        assert (await geocache.get_timezone_by_city("zurich"))["city"] == "Zurich"
+        assert (await geocache.get_timezone_by_city("Zürich"))["city"] == "Zürich"
+        assert "city" not in (await db_storage.get_geocode("zurich"))["location"]
+
+        geocache.clear_geocache()
+        assert (await geocache.get_timezone_by_city("ZÜRICH"))["city"] == "Zürich"
+        assert geocache.get_geocache_stats()["disk_hits"] == 1
+
+        await geocache.get_timezone_by_city("Sao Paolo")
+        assert (await geocache.get_timezone_by_city("sao paolo"))["city"] == "São Paulo"
+
+    @pytest.mark.asyncio
+    async def test_resolve_time_first(self, db_storage, lookups):
+        result = await geocache.resolve_timezone_from_input("15:30")
+        assert result["flag"] == "🌐"
+        assert lookups == []
+
+        assert await geocache.resolve_timezone_from_input("Berlin") == BERLIN
+        assert await geocache.resolve_timezone_from_input("Atlantis") is None
+
+    @pytest.mark.asyncio
+    async def test_time_input_resolved_off_the_loop(self, db_storage, lookups, monkeypatch):
+        """Building a cold zone index doesn't stall other tasks."""
+        from src import offsets
+        get_zone_index = offsets.get_zone_index
+
+        def slow_index(*args, **kwargs):
+            time.sleep(0.2)  # building the transition table
+            return get_zone_index(*args, **kwargs)
+
+        monkeypatch.setattr(offsets, "get_zone_index", slow_index)
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        tick = asyncio.create_task(ticker())
+        result = await geocache.resolve_timezone_from_input("15:30")
+        tick.cancel()
+
+        assert result["flag"] == "🌐"
+        assert ticks >= 10
@@ -93,14 +93,14 @@ async def test_cmd_settz_start(mock_message, mock_state):
 async def test_process_city_success(mock_storage, mock_message, mock_state, monkeypatch):
     """Test successful city selection."""
     # Mock geo logic
-    # We need to mock 'src.commands.settings.geo'
-    mock_geo = MagicMock()
+    # We need to mock 'src.commands.settings.geocache'
+    mock_geo = AsyncMock()
     mock_geo.get_timezone_by_city.return_value = {
         "city": "Paris",
         "timezone": "Europe/Paris",
         "flag": "🇫🇷"
     }
-    monkeypatch.setattr("src.commands.settings.geo", mock_geo)
+    monkeypatch.setattr("src.commands.settings.geocache", mock_geo)
 
     # Setup message text
     mock_message.text = "Paris"
@@ -151,7 +151,7 @@ async def test_handle_time_mention_success(mock_storage, mock_message, mock_stat
     # Mock formatter (to avoid real complex logic if desired, or verify integration)
     # Let's mock it to verify it's CALLED.
     mock_formatter = MagicMock()
-    mock_formatter.format_conversion_reply.return_value = "Time in NY: 10:00"
+    mock_formatter.iter_conversion_replies.return_value = ["Time in NY: 10:00"]
     monkeypatch.setattr("src.commands.common.formatter", mock_formatter)
     
     # Apply storage mock to common.py too (it's a different module import)
@@ -171,7 +171,51 @@ async def test_handle_time_mention_success(mock_storage, mock_message, mock_stat
     mock_storage.get_chat_members.assert_called_with(mock_message.chat.id, platform="telegram")
     
     # 3. Formatter called?
-    mock_formatter.format_conversion_reply.assert_called_once()
+    mock_formatter.iter_conversion_replies.assert_called_once()
     
     # 4. Reply sent?
     mock_message.answer.assert_called_with("Time in NY: 10:00")
+
+
+@pytest.mark.asyncio
+async def test_layout_keyed_by_version_before_fetch(mock_storage, mock_message, mock_state, monkeypatch):
+    """A member joining during the roster fetch doesn't get the old layout cached under the new version."""
+    versions = {"chat": 1}
+    
+    async def get_chat_members(chat_id, platform):
+        members = [{"user_id": 12345, "city": "Berlin", "timezone": "Europe/Berlin", "flag": "🇩🇪", "username": "me"}]
+        versions["chat"] += 1  # someone joins right after the query
+        return members
+    
+    async def get_chat_version(chat_id, platform):
+        return (0, versions["chat"])
+    
+    mock_storage.get_user.return_value = {"city": "Berlin", "timezone": "Europe/Berlin", "flag": "🇩🇪"}
+    mock_storage.get_chat_members.side_effect = get_chat_members
+    mock_storage.get_chat_version.side_effect = get_chat_version
+    mock_formatter = MagicMock()
+    mock_formatter.iter_conversion_replies.return_value = []
+    monkeypatch.setattr("src.commands.common.formatter", mock_formatter)
+    monkeypatch.setattr("src.commands.common.storage", mock_storage)
+    
+    mock_message.text = "Let's meet at 15:00"
+    await handle_time_mention(mock_message, mock_state)
+    
+    layout_key = mock_formatter.iter_conversion_replies.call_args.kwargs["layout_key"]
+    assert layout_key == ("telegram", mock_message.chat.id, (0, 1))
+
+
+@pytest.mark.asyncio
+async def test_time_mention_filter(mock_message):
+    """Filter drops messages without times and passes captured times on."""
+    from src.commands.filters import TimeMentionFilter
+    
+    time_filter = TimeMentionFilter()
+    
+    mock_message.text = "no digits at all"
+    assert await time_filter(mock_message) is False
+    
+    mock_message.text = "Let's meet at 15:00"
+    result = await time_filter(mock_message)
+    assert [t.text for t in result["times"]] == ["15:00"]
+    assert result["times"][0].minutes == 15 * 60
@@ -0,0 +1,168 @@
+"""Tests for the write-behind membership recorder."""
+import asyncio
+
+import pytest
+
+from src.storage.membership import MembershipRecorder
+
+
+@pytest.fixture
+async def storage(sqlite_storage):
+    """Fresh SQLite storage with two registered users."""
+    await sqlite_storage.set_user(1, "telegram", "Berlin", "Europe/Berlin")
+    await sqlite_storage.set_user(2, "telegram", "Paris", "Europe/Paris")
+    return sqlite_storage
+
+
+class CountingStorage:
+    """Wraps a storage, counting bulk writes."""
+
+    def __init__(self, storage, fail=0):
+        self.storage = storage
+        self.batches = []
+        self.fail = fail
+
+    async def add_chat_members(self, members):
+        if self.fail:
+            self.fail -= 1
+            raise RuntimeError("disk full")
+        self.batches.append(list(members))
+        return await self.storage.add_chat_members(members)
+
+    async def add_chat_member(self, chat_id, user_id, platform):
+        self.batches.append([(chat_id, user_id, platform)])
+        await self.storage.add_chat_member(chat_id, user_id, platform)
+
+
+class TestMembershipRecorder:
+    """Test buffering, dedupe and flushing."""
+
+    @pytest.mark.asyncio
+    async def test_buffers_and_dedupes(self, storage):
+        counting = CountingStorage(storage)
+        recorder = MembershipRecorder(counting, flush_seconds=60)
+
+        for _ in range(100):
+            await recorder.add_chat_member(10, 1, "telegram")
+            await recorder.add_chat_member(10, 2, "telegram")
+
+        assert recorder.pending == 2
+        assert counting.batches == []
+        assert await storage.get_chat_members(10, platform="telegram") == []
+
+        assert await recorder.flush() == 2
+        assert counting.batches == [[(10, 1, "telegram"), (10, 2, "telegram")]]
+        assert len(await storage.get_chat_members(10, platform="telegram")) == 2
+        await recorder.close()
+
+    @pytest.mark.asyncio
+    async def test_flushes_on_timer(self, storage):
+        recorder = MembershipRecorder(CountingStorage(storage), flush_seconds=0.05)
+        recorder.record(10, 1, "telegram")
+        await asyncio.sleep(0.15)
+
+        assert recorder.pending == 0
+        assert len(await storage.get_chat_members(10, platform="telegram")) == 1
+        await recorder.close()
+
+    @pytest.mark.asyncio
+    async def test_flushes_at_size_threshold(self, storage):
+        counting = CountingStorage(storage)
+        recorder = MembershipRecorder(counting, flush_seconds=60, max_pending=2)
+        recorder.record(10, 1, "telegram")
+        recorder.record(10, 2, "telegram")
+        await asyncio.sleep(0.05)
+
+        assert recorder.pending == 0
+        assert len(counting.batches) == 1
+        await recorder.close()
+
+    @pytest.mark.asyncio
+    async def test_close_writes_remaining(self, storage):
+        recorder = MembershipRecorder(CountingStorage(storage), flush_seconds=60)
+        recorder.record(10, 1, "telegram")
+        await recorder.close()
+        assert len(await storage.get_chat_members(10, platform="telegram")) == 1
+
+    @pytest.mark.asyncio
+    async def test_failed_flush_is_retried(self, storage):
+        recorder = MembershipRecorder(CountingStorage(storage, fail=1), flush_seconds=60)
+        recorder.record(10, 1, "telegram")
+
+        assert await recorder.flush() == 0
+        assert recorder.pending == 1
+        assert await recorder.flush() == 1
+        await recorder.close()
+
+    @pytest.mark.asyncio
+    async def test_disabled_writes_through(self, storage):
+        counting = CountingStorage(storage)
+        recorder = MembershipRecorder(counting, enabled=False)
+        await recorder.add_chat_member(10, 1, "telegram")
+
+        assert recorder.pending == 0
+        assert len(await storage.get_chat_members(10, platform="telegram")) == 1
+
+    @pytest.mark.asyncio
+    async def test_removal_drops_pending(self, storage):
+        recorder = MembershipRecorder(storage, flush_seconds=60)
+        recorder.record(10, 1, "telegram")
+        recorder.record(10, 2, "telegram")
+        recorder.record(20, 1, "telegram")
+
+        await recorder.remove_chat_member(10, 1, "telegram")
+        assert recorder.pending == 2
+        await recorder.clear_chat_members(20, "telegram")
+        assert recorder.pending == 1
+
+        await recorder.close()
+        assert [m["user_id"] for m in await storage.get_chat_members(10, platform="telegram")] == [2]
+        assert await storage.get_chat_members(20, platform="telegram") == []
+
+    @pytest.mark.asyncio
+    async def test_removal_waits_for_running_flush(self, storage):
+        class SlowStorage(CountingStorage):
+            async def add_chat_members(self, members):
+                await asyncio.sleep(0.05)
+                return await super().add_chat_members(members)
+
+            async def remove_chat_member(self, chat_id, user_id, platform):
+                await self.storage.remove_chat_member(chat_id, user_id, platform)
+
+        recorder = MembershipRecorder(SlowStorage(storage), flush_seconds=60)
+        recorder.record(10, 1, "telegram")
+        flushing = asyncio.create_task(recorder.flush())
+        await asyncio.sleep(0)
+
+        await recorder.remove_chat_member(10, 1, "telegram")
+        await flushing
+        assert await storage.get_chat_members(10, platform="telegram") == []
+        await recorder.close()
+
+
+class TestMiddleware:
+    """Test the group-message path doesn't write to storage."""
+
+    @pytest.mark.asyncio
+    async def test_middleware_records_without_writing(self, storage, monkeypatch):
+        from unittest.mock import MagicMock
+        from aiogram.types import Chat, Message, User
+        from src.commands import middleware as middleware_module
+
+        recorder = MembershipRecorder(CountingStorage(storage), flush_seconds=60)
+        monkeypatch.setattr(middleware_module, "storage", storage)
+        monkeypatch.setattr(middleware_module, "membership", recorder)
+
+        async def handler(event, data):
+            return "OK"
+
+        event = MagicMock(spec=Message)
+        event.chat = Chat(id=-100, type="group")
+        event.from_user = User(id=1, is_bot=False, first_name="Test")
+
+        assert await middleware_module.PassiveCollectionMiddleware()(handler, event, {}) == "OK"
+        assert recorder.pending == 1
+        assert await storage.get_chat_members(-100, platform="telegram") == []
+
+        await recorder.close()
+        assert len(await storage.get_chat_members(-100, platform="telegram")) == 1
@@ -0,0 +1,151 @@
+"""Tests for cached UTC offset windows."""
+from datetime import datetime, timezone
+
+import pytest
+
+from src import offsets
+from src.transform import get_utc_offset
+
+
+def _ts(*args) -> int:
+    return int(datetime(*args, tzinfo=timezone.utc).timestamp())
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache():
+    """Start every test with an empty cache."""
+    offsets.clear_cache()
+    yield
+    offsets.clear_cache()
+
+
+class TestComputeWindow:
+    """Test transition search."""
+    
+    def test_window_ends_at_dst_transition(self):
+        """Berlin switches to CEST on 2026-03-29 at 01:00 UTC."""
+        window = offsets.compute_window("Europe/Berlin", _ts(2026, 3, 1))
+        assert window.offset == 3600
+        assert window.end == _ts(2026, 3, 29, 1)
+    
+    def test_window_starts_at_dst_transition(self):
+        """Summer window starts exactly at the transition."""
+        window = offsets.compute_window("Europe/Berlin", _ts(2026, 4, 15))
+        assert window.offset == 7200
+        assert window.start == _ts(2026, 3, 29, 1)
+    
+    def test_no_transition_within_horizon(self):
+        """Without a transition nearby the window is capped, not unbounded."""
+        ts = _ts(2026, 6, 1)
+        window = offsets.compute_window("Asia/Tokyo", ts)
+        assert window.start <= ts - 59 * offsets.DAY
+        assert window.end >= ts + 59 * offsets.DAY
+    
+    def test_half_hour_zone(self):
+        """Non-whole-hour offsets are kept in seconds."""
+        window = offsets.compute_window("Asia/Kolkata", _ts(2026, 6, 1))
+        assert window.offset == 5 * 3600 + 1800
+
+
+class TestOffsetCache:
+    """Test cache hits, misses and expiry."""
+    
+    def test_hits_and_misses(self):
+        """First lookup computes the window, the rest are hits."""
+        for _ in range(3):
+            offsets.utc_offset_seconds("Asia/Tokyo", _ts(2026, 6, 1))
+        
+        assert offsets.get_offset_stats() == {"hits": 2, "misses": 1, "size": 1}
+    
+    def test_expires_at_transition(self):
+        """Crossing a transition recomputes the zone's window."""
+        assert offsets.utc_offset_seconds("Europe/Berlin", _ts(2026, 3, 29, 0, 59)) == 3600
+        assert offsets.utc_offset_seconds("Europe/Berlin", _ts(2026, 3, 29, 1)) == 7200
+        assert offsets.get_offset_stats()["misses"] == 2
+    
+    def test_get_utc_offset_uses_cache(self):
+        """Sorting key is served from the cache after the first call."""
+        for _ in range(100):
+            get_utc_offset("America/New_York")
+        
+        stats = offsets.get_offset_stats()
+        assert stats["misses"] == 1
+        assert stats["hits"] == 99
+    
+    def test_invalid_zone(self):
+        """Unknown zone keeps the old fallback of 0."""
+        assert get_utc_offset("Not/A_Zone") == 0
+
+
+class TestZoneIndex:
+    """Test the offset → zone index."""
+    
+    def test_every_offset_slot_is_covered_by_nearest(self):
+        index = offsets.build_zone_index(_ts(2026, 1, 15), {})
+        for hours in range(-12, 15):
+            zone, offset = index.lookup(hours * 3600)
+            assert offset == hours * 3600
+            assert zone
+    
+    def test_population_picks_zone(self):
+        index = offsets.build_zone_index(_ts(2026, 1, 15), {"Asia/Kolkata": 10, "Asia/Colombo": 1})
+        assert index.lookup(19800) == ("Asia/Kolkata", 19800)
+        
+        index = offsets.build_zone_index(_ts(2026, 1, 15), {"Asia/Kolkata": 1, "Asia/Colombo": 10})
+        assert index.lookup(19800) == ("Asia/Colombo", 19800)
+    
+    def test_offsets_follow_dst(self):
+        """Newfoundland is UTC-3:30 in winter, UTC-2:30 in summer."""
+        winter = offsets.build_zone_index(_ts(2026, 1, 15), {})
+        summer = offsets.build_zone_index(_ts(2026, 7, 15), {})
+        assert winter.lookup(-12600) == ("America/St_Johns", -12600)
+        assert summer.lookup(-9000) == ("America/St_Johns", -9000)
+        assert summer.lookup(-12600)[1] != -12600
+    
+    def test_clock_offset_ambiguity(self):
+        """UTC-11 and UTC+13 show the same wall clock; population decides."""
+        ts = _ts(2026, 1, 15)
+        index = offsets.build_zone_index(ts, {"Pacific/Pago_Pago": 10, "Pacific/Tongatapu": 1})
+        assert index.lookup_clock(-11 * 3600) == ("Pacific/Pago_Pago", -11 * 3600)
+        
+        index = offsets.build_zone_index(ts, {"Pacific/Pago_Pago": 1, "Pacific/Tongatapu": 10})
+        assert index.lookup_clock(-11 * 3600) == ("Pacific/Tongatapu", 13 * 3600)
+    
+    def test_priority_without_populations(self):
+        """Without gazetteer data the well-known zone of each offset wins."""
+        index = offsets.build_zone_index(_ts(2026, 1, 15), {})
+        assert index.lookup(3 * 3600)[0] == "Europe/Moscow"
+        assert index.lookup(9 * 3600)[0] == "Asia/Tokyo"
+        assert index.lookup(0)[0] == "Europe/London"
+        assert index.lookup(3600)[0] == "Europe/Paris"
+        assert index.lookup(-5 * 3600)[0] == "America/New_York"
+    
+    def test_standard_offsets_ignore_dst(self):
+        """The standard-time index keeps New York at UTC-5 and London at UTC+0 in summer."""
+        for ts in (_ts(2026, 1, 15), _ts(2026, 7, 15)):
+            index = offsets.build_zone_index(ts, {}, standard=True)
+            assert index.lookup(-5 * 3600)[0] == "America/New_York"
+            assert index.lookup(0)[0] == "Europe/London"
+            assert index.lookup(-12600)[0] == "America/St_Johns"
+    
+    def test_next_index_prepared_in_background(self, monkeypatch):
+        """The index for the next window is built ahead and swapped in at the transition."""
+        import time
+        monkeypatch.setattr(offsets, "_zone_populations", lambda: {})
+        before = offsets.get_zone_index(_ts(2026, 3, 20))
+        for _ in range(100):
+            if False in offsets._next_indexes:
+                break
+            time.sleep(0.05)
+        upcoming = offsets._next_indexes[False]
+        assert upcoming.valid_from == before.valid_until
+        assert offsets.get_zone_index(before.valid_until) is upcoming
+    
+    def test_rebuilt_at_transition(self, monkeypatch):
+        """The index expires at the first offset change of any zone."""
+        monkeypatch.setattr(offsets, "_zone_populations", lambda: {})
+        before = offsets.get_zone_index(_ts(2026, 3, 20))
+        assert before.valid_until <= _ts(2026, 3, 29, 1)  # Europe/Berlin → CEST
+        
+        assert offsets.get_zone_index(before.valid_until - 1) is before
+        assert offsets.get_zone_index(before.valid_until) is not before
@@ -0,0 +1,50 @@
+"""Tests for stats module - periodic counters log."""
+import asyncio
+import logging
+
+import pytest
+
+from src import capture, stats
+
+
+@pytest.fixture(autouse=True)
+def no_task(monkeypatch):
+    monkeypatch.setattr(stats, "_task", None)
+
+
+class TestStats:
+    """Test collecting and logging the counters."""
+
+    def test_collect_all_components(self):
+        collected = stats.collect()
+        assert {"capture", "offsets", "memo", "geo", "geocache", "warmup"} <= set(collected)
+        assert "rejected" in collected["geo"]
+        assert "prefilter_rejected" in collected["capture"]
+
+    def test_format_flattens(self):
+        pairs = stats._format({"geo": {"rejected": 3, "breaker_state": "open"}, "memo": {"hit_rate": 0.5}})
+        assert pairs == ["geo.rejected=3", "geo.breaker_state=open", "memo.hit_rate=0.50"]
+
+    @pytest.mark.asyncio
+    async def test_periodic_log(self, monkeypatch, caplog):
+        monkeypatch.setattr(stats, "get_stats_settings", lambda: {"interval_seconds": 0.01})
+        capture.reset_capture_stats()
+        capture.scan_message("no digits here")
+
+        with caplog.at_level(logging.INFO):
+            stats.start()
+            await asyncio.sleep(0.05)
+            stats.cancel()
+
+        lines = [r.message for r in caplog.records if r.message.startswith("Stats: ")]
+        assert len(lines) >= 2  # periodic plus the one on shutdown
+        assert "capture.prefilter_rejected=1" in lines[-1]
+
+    @pytest.mark.asyncio
+    async def test_disabled(self, monkeypatch, caplog):
+        monkeypatch.setattr(stats, "get_stats_settings", lambda: {"interval_seconds": 0})
+        with caplog.at_level(logging.INFO):
+            stats.start()
+            stats.cancel()
+        assert stats._task is None
+        assert not any(r.message.startswith("Stats: ") for r in caplog.records)
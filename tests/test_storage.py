@@ -21,6 +21,7 @@ async def setup_test_db():
     yield
     
     # Clean up
+    await storage.close()
     if TEST_DB.exists():
         os.remove(TEST_DB)
 
@@ -148,3 +149,202 @@ async def test_mixed_platform_members():
     dc_members = await storage.get_chat_members(CHAT_ID, platform="discord")
     assert len(dc_members) == 1
     assert dc_members[0]["user_id"] == 2
+
+
+@pytest.mark.asyncio
+async def test_chat_version_changes_on_writes():
+    """Membership version changes on roster/user writes, not on no-op adds."""
+    await storage.set_user(1, "telegram", "A", "UTC", "", "u1")
+    v0 = await storage.get_chat_version(77, platform="telegram")
+    
+    await storage.add_chat_member(77, 1, platform="telegram")
+    v1 = await storage.get_chat_version(77, platform="telegram")
+    assert v1 != v0
+    
+    # Re-registering an existing member is a no-op
+    await storage.add_chat_member(77, 1, platform="telegram")
+    assert await storage.get_chat_version(77, platform="telegram") == v1
+    
+    await storage.set_user(1, "telegram", "B", "Europe/Berlin", "", "u1")
+    v2 = await storage.get_chat_version(77, platform="telegram")
+    assert v2 != v1
+    
+    await storage.remove_chat_member(77, 1, platform="telegram")
+    v3 = await storage.get_chat_version(77, platform="telegram")
+    assert v3 != v2
+    
+    await storage.clear_chat_members(77, platform="telegram")
+    assert await storage.get_chat_version(77, platform="telegram") != v3
+
+@pytest.mark.asyncio
+async def test_geocode_cache():
+    """Geocode results round-trip, including 'not found', and expire."""
+    import time
+    berlin = {"city": "Berlin", "timezone": "Europe/Berlin", "flag": "🇩🇪"}
+    
+    assert await storage.get_geocode("berlin") is None
+    
+    await storage.set_geocode("berlin", berlin, time.time() + 60)
+    row = await storage.get_geocode("berlin")
+    assert row["location"] == berlin
+    
+    # Negative entry
+    await storage.set_geocode("atlantis", None, time.time() + 60)
+    row = await storage.get_geocode("atlantis")
+    assert row is not None and row["location"] is None
+    
+    # Expired entries are not returned
+    await storage.set_geocode("berlin", berlin, time.time() - 1)
+    assert await storage.get_geocode("berlin") is None
+
+@pytest.mark.asyncio
+async def test_user_timezones_and_popular_cities():
+    """Warm-up queries: distinct zones, most common real cities."""
+    await storage.set_user(1, "telegram", "Berlin", "Europe/Berlin", "🇩🇪")
+    await storage.set_user(2, "telegram", "Berlin", "Europe/Berlin", "🇩🇪")
+    await storage.set_user(3, "discord", "Paris", "Europe/Paris", "🇫🇷")
+    await storage.set_user(4, "telegram", "UTC+3", "Europe/Moscow", "🌐")
+    await storage.set_user(5, "telegram", "UTC+3", "Europe/Moscow", "🌐")
+    
+    assert sorted(await storage.get_user_timezones()) == ["Europe/Berlin", "Europe/Moscow", "Europe/Paris"]
+    assert await storage.get_popular_cities(10) == ["Berlin", "Paris"]
+    assert await storage.get_popular_cities(1) == ["Berlin"]
+
+@pytest.mark.asyncio
+async def test_connection_lifecycle():
+    """One connection serves all calls; close() releases it, init() reopens."""
+    db = storage.db
+    await storage.set_user(1, "telegram", "Berlin", "Europe/Berlin")
+    await storage.get_user(1, platform="telegram")
+    assert storage.db is db
+    
+    await storage.close()
+    with pytest.raises(RuntimeError):
+        await storage.get_user(1, platform="telegram")
+    await storage.close()  # idempotent
+    
+    await storage.init()
+    assert storage.db is not db
+    assert (await storage.get_user(1, platform="telegram"))["city"] == "Berlin"
+
+@pytest.mark.asyncio
+async def test_concurrent_operations():
+    """Interleaved coroutines share the connection safely."""
+    import asyncio
+    await asyncio.gather(*(
+        storage.set_user(i, "telegram", "Berlin", "Europe/Berlin") for i in range(50)
+    ))
+    await asyncio.gather(*(storage.add_chat_member(1, i, platform="telegram") for i in range(50)))
+    
+    members = await storage.get_chat_members(1, platform="telegram")
+    assert len(members) == 50
+
+@pytest.mark.asyncio
+async def test_write_transactions_do_not_interleave(monkeypatch):
+    """A write's commit never covers another coroutine's statement."""
+    import asyncio
+    db = storage.db
+    events = []
+    execute, commit = db.execute, db.commit
+    
+    async def slow_execute(sql, params=None):
+        events.append("execute")
+        await asyncio.sleep(0.01)
+        return await execute(sql, params)
+    
+    async def logged_commit():
+        events.append("commit")
+        await commit()
+    
+    monkeypatch.setattr(db, "execute", slow_execute)
+    monkeypatch.setattr(db, "commit", logged_commit)
+    await asyncio.gather(*(
+        storage.set_user(i, "telegram", "Berlin", "Europe/Berlin") for i in range(5)
+    ))
+    
+    assert events == ["execute", "commit"] * 5
+
+@pytest.mark.asyncio
+async def test_tuning_pragmas_applied():
+    """Preset pragmas are set on the connection."""
+    from src.storage.sqlite import tuning_pragmas
+    tuned = SQLiteStorage(TEST_DB, tuning_pragmas("fast"))
+    await tuned.init()
+    try:
+        async def pragma(name):
+            return (await tuned.db.execute_fetchall(f"PRAGMA {name}"))[0][0]
+        
+        assert await pragma("journal_mode") == "wal"
+        assert await pragma("synchronous") == 1    # NORMAL
+        assert await pragma("cache_size") == -16384
+        assert await pragma("temp_store") == 2     # MEMORY
+        assert await pragma("busy_timeout") == 5000
+    finally:
+        await tuned.close()
+        for suffix in ("-wal", "-shm"):
+            if Path(f"{TEST_DB}{suffix}").exists():
+                os.remove(f"{TEST_DB}{suffix}")
+
+def test_tuning_presets_and_overrides():
+    """Presets resolve, overrides win, bad names/values are dropped."""
+    from src.storage.sqlite import TUNING_PRESETS, tuning_pragmas
+    assert tuning_pragmas("durable") == TUNING_PRESETS["durable"]
+    assert tuning_pragmas("nope") == TUNING_PRESETS["durable"]
+    assert tuning_pragmas("fast", {"synchronous": "full"})["synchronous"] == "full"
+    assert tuning_pragmas({"cache_size": -4096, "foreign_keys": 1}) == {"cache_size": -4096}
+    assert tuning_pragmas({"journal_mode": "wal; DROP TABLE users"}) == {}
+    assert tuning_pragmas({"mmap_size": True, "temp_store": None, "cache_size": 1.5}) == {}
+
+@pytest.mark.asyncio
+async def test_add_chat_members_bulk():
+    """Bulk insert ignores existing rows and only bumps changed chats."""
+    for user_id in (1, 2, 3):
+        await storage.set_user(user_id, "telegram", "Berlin", "Europe/Berlin")
+    await storage.add_chat_member(10, 1, platform="telegram")
+    v10 = await storage.get_chat_version(10, platform="telegram")
+    v20 = await storage.get_chat_version(20, platform="telegram")
+    
+    inserted = await storage.add_chat_members([(10, 1, "telegram"), (20, 2, "telegram"), (20, 3, "telegram")])
+    
+    assert inserted == 2
+    assert await storage.get_chat_version(10, platform="telegram") == v10
+    assert await storage.get_chat_version(20, platform="telegram") != v20
+    assert len(await storage.get_chat_members(20, platform="telegram")) == 2
+
+@pytest.mark.asyncio
+async def test_failed_bulk_insert_keeps_concurrent_writes(monkeypatch):
+    """Rolling back a failed batch never discards another coroutine's write."""
+    import asyncio
+    db = storage.db
+    commit = db.commit
+    
+    async def slow_commit():
+        await asyncio.sleep(0.05)
+        await commit()
+    
+    monkeypatch.setattr(db, "commit", slow_commit)
+    results = await asyncio.gather(
+        storage.add_chat_members([(10, 1, "telegram"), (20, 2, object())]),  # unbindable platform
+        storage.set_user(5, "telegram", "Paris", "Europe/Paris"),
+        return_exceptions=True,
+    )
+    
+    assert isinstance(results[0], Exception)
+    assert results[1] is None
+    assert (await storage.get_user(5, platform="telegram"))["city"] == "Paris"
+    assert await storage.get_chat_members(10, platform="telegram") == []
+
+@pytest.mark.asyncio
+async def test_failed_write_releases_lock():
+    """A failing statement doesn't leave its transaction open."""
+    import sqlite3
+    with pytest.raises(sqlite3.IntegrityError):
+        await storage._write("INSERT INTO users (user_id, platform, city, timezone) VALUES (1, 'telegram', NULL, 'UTC')")
+    assert not storage.db.in_transaction
+    
+    other = sqlite3.connect(TEST_DB, timeout=0)
+    try:
+        other.execute("BEGIN IMMEDIATE")
+        other.rollback()
+    finally:
+        other.close()
@@ -0,0 +1,161 @@
+"""Tests for the read-through storage cache."""
+import pytest
+
+from src.storage.cached import CachedStorage
+from src.storage.sqlite import SQLiteStorage
+
+class CountingStorage(SQLiteStorage):
+    """SQLite storage counting the queries that reach it."""
+
+    def __init__(self, db_path):
+        super().__init__(db_path)
+        self.reads = 0
+
+    async def _read(self, sql, params=()):
+        self.reads += 1
+        return await super()._read(sql, params)
+
+
+@pytest.fixture
+async def inner(db_path):
+    """Storage behind the cache (initialized by CachedStorage.init)."""
+    storage = CountingStorage(db_path)
+    yield storage
+    await storage.close()
+
+
+@pytest.fixture
+async def cached(inner):
+    """Cache over a storage with two users in chat 10."""
+    storage = CachedStorage(inner, max_users=100, max_chats=10)
+    await storage.init()
+    await storage.set_user(1, "telegram", "Berlin", "Europe/Berlin")
+    await storage.set_user(2, "telegram", "Paris", "Europe/Paris")
+    await storage.add_chat_member(10, 1, "telegram")
+    await storage.add_chat_member(10, 2, "telegram")
+    inner.reads = 0
+    return storage
+
+
+class TestUserCache:
+    """Test cached user lookups."""
+
+    @pytest.mark.asyncio
+    async def test_repeated_lookup_hits(self, cached, inner):
+        first = await cached.get_user(1, "telegram")
+        for _ in range(10):
+            assert await cached.get_user(1, "telegram") == first
+        assert first["city"] == "Berlin"
+        assert inner.reads == 1
+
+        stats = cached.get_cache_stats()["users"]
+        assert stats["hits"] == 10
+        assert stats["misses"] == 1
+
+    @pytest.mark.asyncio
+    async def test_unknown_user_cached(self, cached, inner):
+        assert await cached.get_user(99, "telegram") is None
+        assert await cached.get_user(99, "telegram") is None
+        assert inner.reads == 1
+
+        await cached.set_user(99, "telegram", "Tokyo", "Asia/Tokyo")
+        assert (await cached.get_user(99, "telegram"))["city"] == "Tokyo"
+
+    @pytest.mark.asyncio
+    async def test_set_user_invalidates(self, cached):
+        await cached.get_user(1, "telegram")
+        await cached.set_user(1, "telegram", "London", "Europe/London")
+        assert (await cached.get_user(1, "telegram"))["timezone"] == "Europe/London"
+
+    @pytest.mark.asyncio
+    async def test_platforms_separate(self, cached):
+        await cached.get_user(1, "telegram")
+        assert await cached.get_user(1, "discord") is None
+
+    @pytest.mark.asyncio
+    async def test_lru_bound(self, inner):
+        storage = CachedStorage(inner, max_users=2)
+        await storage.init()
+        for user_id in (1, 2, 3):
+            await storage.get_user(user_id, "telegram")
+        assert storage.get_cache_stats()["users"]["size"] == 2
+
+        inner.reads = 0
+        await storage.get_user(3, "telegram")
+        await storage.get_user(1, "telegram")  # evicted first
+        assert inner.reads == 1
+
+
+class TestRosterCache:
+    """Test cached chat rosters and their invalidation."""
+
+    @pytest.mark.asyncio
+    async def test_repeated_roster_no_sql(self, cached, inner):
+        first = await cached.get_chat_members(10, "telegram")
+        assert {m["user_id"] for m in first} == {1, 2}
+        for _ in range(10):
+            assert await cached.get_chat_members(10, "telegram") == first
+        assert inner.reads == 1
+        assert cached.get_cache_stats()["rosters"]["hit_rate"] == pytest.approx(10 / 11)
+
+    @pytest.mark.asyncio
+    async def test_noop_registration_keeps_roster(self, cached, inner):
+        await cached.get_chat_members(10, "telegram")
+        await cached.add_chat_member(10, 1, "telegram")
+        await cached.add_chat_members([(10, 2, "telegram")])
+        await cached.get_chat_members(10, "telegram")
+        assert inner.reads == 1
+
+    @pytest.mark.asyncio
+    async def test_new_member_invalidates(self, cached):
+        await cached.set_user(3, "telegram", "Tokyo", "Asia/Tokyo")
+        await cached.get_chat_members(10, "telegram")
+        await cached.add_chat_member(10, 3, "telegram")
+        assert len(await cached.get_chat_members(10, "telegram")) == 3
+
+        stats = cached.get_cache_stats()["rosters"]
+        assert stats["hits"] == 0
+        assert stats["misses"] == 2
+
+    @pytest.mark.asyncio
+    async def test_removal_invalidates(self, cached):
+        await cached.get_chat_members(10, "telegram")
+        await cached.remove_chat_member(10, 2, "telegram")
+        assert [m["user_id"] for m in await cached.get_chat_members(10, "telegram")] == [1]
+
+        await cached.clear_chat_members(10, "telegram")
+        assert await cached.get_chat_members(10, "telegram") == []
+
+    @pytest.mark.asyncio
+    async def test_user_change_invalidates(self, cached):
+        await cached.get_chat_members(10, "telegram")
+        await cached.set_user(2, "telegram", "Madrid", "Europe/Madrid")
+        members = await cached.get_chat_members(10, "telegram")
+        assert {m["city"] for m in members} == {"Berlin", "Madrid"}
+
+    @pytest.mark.asyncio
+    async def test_returned_list_is_a_copy(self, cached):
+        members = await cached.get_chat_members(10, "telegram")
+        members.clear()
+        assert len(await cached.get_chat_members(10, "telegram")) == 2
+
+
+class TestForwarding:
+    """Test methods passed through to the wrapped storage."""
+
+    @pytest.mark.asyncio
+    async def test_geocode(self, cached):
+        await cached.set_geocode("berlin", {"city": "Berlin"}, expires_at=2**40)
+        assert (await cached.get_geocode("berlin"))["location"] == {"city": "Berlin"}
+
+    @pytest.mark.asyncio
+    async def test_aggregates(self, cached, inner):
+        assert sorted(await cached.get_user_timezones()) == ["Europe/Berlin", "Europe/Paris"]
+        assert len(await cached.get_popular_cities(5)) == 2
+        assert await cached.get_chat_version(10, "telegram") == await inner.get_chat_version(10, "telegram")
+
+    @pytest.mark.asyncio
+    async def test_init_clears(self, cached):
+        await cached.get_user(1, "telegram")
+        await cached.init()
+        assert cached.get_cache_stats()["users"] == {"hits": 0, "misses": 0, "hit_rate": 0.0, "size": 0}
@@ -0,0 +1,169 @@
+"""Tests for the pooled storage mode - WAL readers and a batching writer."""
+import asyncio
+import sqlite3
+
+import pytest
+
+from src.storage.pooled import PooledSQLiteStorage
+
+@pytest.fixture
+async def storage(db_path):
+    """Fresh pooled storage for each test."""
+    storage = PooledSQLiteStorage(db_path, readers=2, batch_size=50)
+    await storage.init()
+    yield storage
+    await storage.close()
+
+
+class TestPooledStorage:
+    """Test reads, writes and transactions in pooled mode."""
+
+    @pytest.mark.asyncio
+    async def test_wal_mode(self, storage):
+        rows = await storage.db.execute_fetchall("PRAGMA journal_mode")
+        assert rows[0][0] == "wal"
+
+    @pytest.mark.asyncio
+    async def test_waits_for_other_process_lock(self, storage):
+        """With no configured busy_timeout, a batch still waits for another writer."""
+        assert storage.pragmas["busy_timeout"] == 5000
+        assert (await storage.db.execute_fetchall("PRAGMA busy_timeout"))[0][0] == 5000
+
+        other = sqlite3.connect(storage.db_path, isolation_level=None)
+        other.execute("BEGIN IMMEDIATE")
+        loop = asyncio.get_running_loop()
+        loop.call_later(0.2, other.commit)
+        try:
+            await storage.set_user(1, "telegram", "Berlin", "Europe/Berlin")
+        finally:
+            other.close()
+        assert (await storage.get_user(1, "telegram"))["city"] == "Berlin"
+
+    @pytest.mark.asyncio
+    async def test_read_your_writes(self, storage):
+        await storage.set_user(1, "telegram", "Berlin", "Europe/Berlin", "🇩🇪", "alice")
+        await storage.add_chat_member(10, 1, platform="telegram")
+
+        user = await storage.get_user(1, platform="telegram")
+        assert user["city"] == "Berlin"
+        members = await storage.get_chat_members(10, platform="telegram")
+        assert [m["user_id"] for m in members] == [1]
+
+    @pytest.mark.asyncio
+    async def test_readers_are_read_only(self, storage):
+        with pytest.raises(sqlite3.OperationalError):
+            await storage._read("DELETE FROM users")
+
+    @pytest.mark.asyncio
+    async def test_concurrent_writes_share_transactions(self, storage, monkeypatch):
+        batches = []
+        commit_batch = storage._commit_batch
+
+        async def recording(batch):
+            batches.append(len(batch))
+            await commit_batch(batch)
+
+        monkeypatch.setattr(storage, "_commit_batch", recording)
+        await asyncio.gather(*(
+            storage.set_user(i, "telegram", "Berlin", "Europe/Berlin") for i in range(120)
+        ))
+
+        assert sum(batches) == 120
+        assert max(batches) <= 50
+        assert len(batches) < 120
+        assert len(await storage.get_user_timezones()) == 1
+
+    @pytest.mark.asyncio
+    async def test_rowcount_per_write(self, storage):
+        await storage.set_user(1, "telegram", "Berlin", "Europe/Berlin")
+        versions = []
+        for _ in range(2):
+            await storage.add_chat_member(10, 1, platform="telegram")
+            versions.append(await storage.get_chat_version(10, platform="telegram"))
+        # The second insert is a no-op and doesn't bump the roster version
+        assert versions[0] == versions[1]
+
+    @pytest.mark.asyncio
+    async def test_failing_write_only_fails_its_caller(self, storage):
+        results = await asyncio.gather(
+            storage.set_user(1, "telegram", "Berlin", "Europe/Berlin"),
+            storage._write("INSERT INTO no_such_table VALUES (1)"),
+            storage.set_user(2, "telegram", "Paris", "Europe/Paris"),
+            return_exceptions=True,
+        )
+        assert isinstance(results[1], sqlite3.OperationalError)
+        assert await storage.get_user(1, platform="telegram") is not None
+        assert await storage.get_user(2, platform="telegram") is not None
+
+    @pytest.mark.asyncio
+    async def test_writer_survives_non_sqlite_errors(self, storage, monkeypatch):
+        execute, commit = storage.db.execute, storage.db.commit
+        calls = 0
+
+        def picky_execute(sql, params=None):
+            if sql == "BAD":
+                raise TypeError("unsupported parameter type")
+            return execute(sql, params)
+
+        async def failing_commit():
+            nonlocal calls
+            calls += 1
+            if calls == 1:
+                raise ValueError("no active connection")
+            await commit()
+
+        monkeypatch.setattr(storage.db, "execute", picky_execute)
+        monkeypatch.setattr(storage.db, "commit", failing_commit)
+        with pytest.raises(ValueError):
+            await asyncio.wait_for(storage.set_user(1, "telegram", "Berlin", "Europe/Berlin"), 5)
+        with pytest.raises(TypeError):
+            await asyncio.wait_for(storage._write("BAD"), 5)
+
+        await asyncio.wait_for(storage.set_user(2, "telegram", "Paris", "Europe/Paris"), 5)
+        await asyncio.wait_for(storage.flush(), 5)
+        assert await storage.get_user(1, platform="telegram") is None
+        assert (await storage.get_user(2, platform="telegram"))["city"] == "Paris"
+
+    @pytest.mark.asyncio
+    async def test_flush_and_close_commit_queued_writes(self, storage):
+        pending = asyncio.ensure_future(storage.set_geocode("berlin", {"timezone": "Europe/Berlin"}, 2e9))
+        await asyncio.sleep(0)
+        await storage.flush()
+        assert pending.done()
+        assert (await storage.get_geocode("berlin"))["location"] == {"timezone": "Europe/Berlin"}
+
+        late = asyncio.ensure_future(storage.set_user(3, "telegram", "Tokyo", "Asia/Tokyo"))
+        await asyncio.sleep(0)
+        await storage.close()
+        assert late.done() and late.exception() is None
+
+        await storage.init()
+        assert (await storage.get_user(3, platform="telegram"))["city"] == "Tokyo"
+
+    @pytest.mark.asyncio
+    async def test_not_initialized(self, db_path):
+        storage = PooledSQLiteStorage(db_path)
+        with pytest.raises(RuntimeError):
+            await storage.get_user(1, platform="telegram")
+        with pytest.raises(RuntimeError):
+            await storage.set_user(1, "telegram", "Berlin", "Europe/Berlin")
+
+    @pytest.mark.asyncio
+    async def test_readers_get_tuning(self, storage, db_path):
+        await storage.close()
+        storage = PooledSQLiteStorage(db_path, readers=1, pragmas={"journal_mode": "delete", "cache_size": -4096})
+        await storage.init()
+        try:
+            # Pooled mode always runs WAL; other pragmas reach the readers too
+            assert (await storage.db.execute_fetchall("PRAGMA journal_mode"))[0][0] == "wal"
+            assert (await storage._read("PRAGMA cache_size"))[0][0] == -4096
+        finally:
+            await storage.close()
+
+    @pytest.mark.asyncio
+    async def test_bulk_membership(self, storage):
+        await storage.set_user(1, "telegram", "Berlin", "Europe/Berlin")
+        await storage.set_user(2, "telegram", "Paris", "Europe/Paris")
+        inserted = await storage.add_chat_members([(10, 1, "telegram"), (10, 2, "telegram"), (10, 1, "telegram")])
+        assert inserted == 2
+        assert len(await storage.get_chat_members(10, platform="telegram")) == 2
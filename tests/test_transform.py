@@ -1,5 +1,13 @@
 """Tests for time transformation module."""
-from src.transform import parse_time_string, convert_time, get_utc_offset
+from datetime import date, datetime, timedelta, timezone
+from zoneinfo import ZoneInfo, available_timezones
+
+import pytest
+
+from src.transform import (
+    parse_time_string, convert_time, convert_minutes, convert_time_many, convert_time_reference,
+    get_utc_offset, ConversionMemo, get_memo, get_memo_stats, reset_memo,
+)
 
 
 class TestParseTimeString:
@@ -113,3 +121,137 @@ class TestGetUtcOffset:
         """New York should be negative offset."""
         offset = get_utc_offset("America/New_York")
         assert offset < 0
+
+
+class TestMinutesEngine:
+    """Differential tests: minute-of-day engine vs datetime reference."""
+    
+    @staticmethod
+    def _transition_dates(tz_name: str, year: int) -> list[date]:
+        """Local dates on which the zone's UTC offset changes."""
+        tz = ZoneInfo(tz_name)
+        dates = []
+        day = datetime(year, 1, 1, 12, tzinfo=timezone.utc)
+        prev = day.astimezone(tz).utcoffset()
+        for _ in range(366):
+            day += timedelta(days=1)
+            offset = day.astimezone(tz).utcoffset()
+            if offset != prev:
+                local = (day - timedelta(days=1)).astimezone(tz).date()
+                dates.extend([local, local + timedelta(days=1)])
+            prev = offset
+        return dates
+    
+    @staticmethod
+    def _check(from_tz: str, to_tz: str, day: date, step: int):
+        reference = datetime.combine(day, datetime.min.time())
+        for minutes in range(0, 24 * 60, step):
+            t = f"{minutes // 60:02d}:{minutes % 60:02d}"
+            expected = convert_time_reference(t, from_tz, to_tz, reference)
+            assert convert_minutes(minutes, from_tz, to_tz, day) == expected, (t, from_tz, to_tz, day)
+    
+    def test_all_zones_match_reference(self):
+        """Every IANA zone, to and from UTC/Berlin, on normal and DST edge days."""
+        plain_day = date(2026, 6, 15)
+        for tz_name in sorted(available_timezones()):
+            for partner in ("UTC", "Europe/Berlin"):
+                self._check(tz_name, partner, plain_day, 60)
+                self._check(partner, tz_name, plain_day, 60)
+                for day in self._transition_dates(tz_name, 2026):
+                    self._check(tz_name, partner, day, 15)
+                    self._check(partner, tz_name, day, 15)
+    
+    def test_gap_and_fold(self):
+        """Nonexistent and ambiguous wall times resolve like datetime (fold=0)."""
+        # 02:30 does not exist in Berlin on 2026-03-29, 02:30 happens twice on 2026-10-25
+        for day in (date(2026, 3, 29), date(2026, 10, 25)):
+            self._check("Europe/Berlin", "UTC", day, 15)
+            self._check("America/New_York", "Europe/Berlin", day, 15)
+    
+    def test_same_zone_in_gap(self):
+        """Same-zone conversion keeps the wall time, like astimezone()."""
+        assert convert_minutes(150, "Europe/Berlin", "Europe/Berlin", date(2026, 3, 29)) == ("02:30", 0)
+    
+    def test_engine_switch(self, monkeypatch):
+        """Config can select the datetime reference engine."""
+        monkeypatch.setattr("src.transform.get_transform_settings", lambda: {"engine": "datetime"})
+        assert convert_time("23:00", "Europe/London", "Asia/Tokyo")[1] == 1
+
+
+class TestConvertTimeMany:
+    """Test batch conversion to many zones."""
+    
+    def test_matches_single_conversions(self):
+        """Batch result equals one convert_time call per zone."""
+        reference = datetime(2026, 3, 29)
+        zones = ["UTC", "Asia/Tokyo", "America/New_York", "Europe/Berlin", "Asia/Kolkata"]
+        expected = [convert_time("02:30", "Europe/Berlin", tz, reference) for tz in zones]
+        assert convert_time_many("02:30", "Europe/Berlin", zones, reference) == expected
+    
+    def test_large_batch_all_zones(self):
+        """A batch to every zone agrees with the reference engine."""
+        reference = datetime(2026, 10, 25)
+        zones = sorted(available_timezones())
+        expected = [convert_time_reference("23:30", "Asia/Kolkata", tz, reference) for tz in zones]
+        assert convert_time_many("23:30", "Asia/Kolkata", zones, reference) == expected
+    
+    def test_empty_targets(self):
+        """No targets, no results."""
+        assert convert_time_many("14:00", "UTC", []) == []
+
+
+class TestConversionMemo:
+    """Test memoized conversion results."""
+    
+    @pytest.fixture(autouse=True)
+    def fresh_memo(self):
+        reset_memo()
+        yield
+        reset_memo()
+    
+    def test_repeated_conversion_hits(self):
+        """Same minute, zones and date are served from the memo."""
+        reference = datetime(2026, 6, 15)
+        first = convert_time("10:00", "Europe/Berlin", "Asia/Tokyo", reference)
+        second = convert_time("10:00", "Europe/Berlin", "Asia/Tokyo", reference)
+        
+        assert first == second == ("17:00", 0)
+        stats = get_memo_stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["size"] == 1
+    
+    def test_cleared_at_midnight(self):
+        """A new date drops the previous day's entries."""
+        convert_time("10:00", "UTC", "Asia/Tokyo", datetime(2026, 6, 15))
+        convert_time("10:00", "UTC", "Asia/Tokyo", datetime(2026, 6, 16))
+        
+        stats = get_memo_stats()
+        assert stats["misses"] == 2
+        assert stats["size"] == 1
+    
+    def test_dst_day_not_stale(self):
+        """Dates on both sides of a transition give their own results."""
+        before = convert_time("12:00", "UTC", "Europe/Berlin", datetime(2026, 3, 28))
+        after = convert_time("12:00", "UTC", "Europe/Berlin", datetime(2026, 3, 29))
+        assert before == ("13:00", 0)
+        assert after == ("14:00", 0)
+    
+    def test_bounded_size(self):
+        """Least recently used entries are evicted."""
+        memo = ConversionMemo(max_size=2)
+        memo.put("a", ("01:00", 0))
+        memo.put("b", ("02:00", 0))
+        memo.get("a")
+        memo.put("c", ("03:00", 0))
+        
+        assert memo.get("b") is None
+        assert memo.get("a") == ("01:00", 0)
+        assert memo.stats()["size"] == 2
+    
+    def test_disabled_in_config(self, monkeypatch):
+        """Memo can be turned off."""
+        monkeypatch.setattr("src.transform.get_transform_settings", lambda: {"memo": {"enabled": False}})
+        assert get_memo() is None
+        assert convert_time("23:00", "Europe/London", "Asia/Tokyo")[1] == 1
+        assert get_memo_stats() == {}
@@ -0,0 +1,77 @@
+"""Tests for the compact transition table."""
+import random
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from src import tzdb
+
+
+@pytest.fixture(scope="module")
+def table():
+    """Table built once for all tests in this module."""
+    return tzdb.build_table(2026)
+
+
+def _ts(*args) -> int:
+    return int(datetime(*args, tzinfo=timezone.utc).timestamp())
+
+
+def _zoneinfo_offset(tz_name: str, ts: int) -> int:
+    return int(datetime.fromtimestamp(ts, ZoneInfo(tz_name)).utcoffset().total_seconds())
+
+
+class TestTransitionTable:
+    """Test lookups against zoneinfo."""
+    
+    def test_all_zones_match_zoneinfo(self, table):
+        """Random instants in range agree with zoneinfo for every zone."""
+        rng = random.Random(42)
+        for name in table.names:
+            for _ in range(20):
+                ts = rng.randrange(table.range_start, table.range_end)
+                assert table.offset_at(name, ts) == _zoneinfo_offset(name, ts), (name, ts)
+    
+    def test_transition_boundary(self, table):
+        """Offset changes exactly at the transition second."""
+        switch = _ts(2026, 3, 29, 1)
+        assert table.offset_at("Europe/Berlin", switch - 1) == 3600
+        assert table.offset_at("Europe/Berlin", switch) == 7200
+        assert table.window("Europe/Berlin", switch) == (switch, _ts(2026, 10, 25, 1), 7200)
+    
+    def test_not_covered(self, table):
+        """Unknown zones and out-of-range instants return None."""
+        assert table.offset_at("Not/A_Zone", _ts(2026, 1, 1)) is None
+        assert table.offset_at("Europe/Berlin", table.range_end) is None
+        assert table.window("Europe/Berlin", table.range_start - 1) is None
+
+
+class TestTableFile:
+    """Test saving and memory-mapping the table."""
+    
+    def test_roundtrip(self, table, tmp_path):
+        """Memory-mapped table answers like the built one."""
+        path = tmp_path / "tzdb.bin"
+        tzdb.save_table(table, path)
+        loaded = tzdb.load_table(path)
+        
+        assert loaded is not None
+        assert loaded.names == table.names
+        assert loaded.tzdata_version == table.tzdata_version
+        for ts in (_ts(2026, 1, 15), _ts(2026, 7, 15), _ts(2030, 3, 31, 1)):
+            for name in ("Europe/Berlin", "America/Sao_Paulo", "Australia/Lord_Howe", "Asia/Kathmandu"):
+                assert loaded.offset_at(name, ts) == table.offset_at(name, ts)
+    
+    def test_missing_or_corrupt_file(self, tmp_path):
+        """Unusable files are ignored."""
+        assert tzdb.load_table(tmp_path / "missing.bin") is None
+        
+        bad = tmp_path / "bad.bin"
+        bad.write_bytes(b"not a table")
+        assert tzdb.load_table(bad) is None
+    
+    def test_is_current(self, table):
+        """Table is stale outside its range."""
+        assert table.is_current(_ts(2026, 6, 1))
+        assert not table.is_current(table.range_end)
@@ -0,0 +1,126 @@
+"""Tests for tzraster module - memory-mapped coordinate → timezone grid."""
+import random
+
+import pytest
+
+from src import tzraster
+from src.tzraster import BORDER, build_raster, load_raster, save_raster
+
+
+class StripesFinder:
+    """Fake TimezoneFinder: zones are 30° longitude stripes, plus a small island."""
+
+    def timezone_at(self, lat, lng):
+        if 10 <= lat <= 11 and 10 <= lng <= 11:
+            return "Island/Zone"
+        return f"Stripe/{int((lng + 180) // 30) % 12}"
+
+
+@pytest.fixture(scope="module")
+def stripes():
+    return build_raster(resolution=5, tf=StripesFinder())
+
+
+class TestBuildRaster:
+    """Test grid construction."""
+
+    def test_shape(self, stripes):
+        assert stripes.width == 72
+        assert stripes.height == 36
+        assert len(stripes.grid) == 72 * 36
+
+    def test_interior_cells_answered(self, stripes):
+        assert stripes.zone_at(50.0, 7.5) == "Stripe/6"
+        assert stripes.zone_at(-42.0, -170.0) == "Stripe/0"
+
+    def test_border_cells_left_to_finder(self, stripes):
+        # Cell [0°, 5°) longitude at lng 0 is interior; the cell touching lng 30° is a border
+        assert stripes.zone_at(50.0, 27.5) is None
+        # Island sits inside one cell: its center sample marks the cell as border
+        assert stripes.zone_at(12.0, 12.0) is None
+
+    def test_interior_matches_finder(self, stripes):
+        finder = StripesFinder()
+        rng = random.Random(3)
+        for _ in range(2000):
+            lat, lng = rng.uniform(-90, 90), rng.uniform(-180, 180)
+            zone = stripes.zone_at(lat, lng)
+            if zone is not None:
+                assert zone == finder.timezone_at(lat, lng)
+
+    def test_edges(self, stripes):
+        assert stripes.zone_at(90.0, 170.0) == "Stripe/11"
+        assert stripes.zone_at(-90.0, -180.0) == "Stripe/0"
+        assert stripes.zone_at(90.0, 180.0) is None  # last column touches the -180° stripe
+        assert stripes.zone_at(-91.0, 0.0) is None
+
+
+class TestRasterFile:
+    """Test saving and memory-mapping the grid."""
+
+    def test_round_trip(self, stripes, tmp_path):
+        path = tmp_path / "tzraster.bin"
+        save_raster(stripes, path)
+        loaded = load_raster(path)
+
+        assert loaded.width == stripes.width
+        assert loaded.height == stripes.height
+        assert loaded.resolution == stripes.resolution
+        assert list(loaded.grid) == list(stripes.grid)
+        assert loaded.zone_at(50.0, 7.5) == "Stripe/6"
+        assert loaded.is_current()
+
+    def test_missing_or_bad_file(self, tmp_path):
+        assert load_raster(tmp_path / "missing.bin") is None
+        bad = tmp_path / "bad.bin"
+        bad.write_bytes(b"junk")
+        assert load_raster(bad) is None
+
+    def test_stale_raster_ignored(self, stripes, tmp_path, monkeypatch):
+        path = tmp_path / "tzraster.bin"
+        stripes.data_version = "0.0.1"
+        save_raster(stripes, path)
+        monkeypatch.setattr(tzraster, "load_raster", lambda: load_raster(path))
+        monkeypatch.setattr(tzraster, "_loaded", False)
+        monkeypatch.setattr(tzraster, "_raster", None)
+
+        assert tzraster.get_raster() is None
+
+
+class TestGeoIntegration:
+    """Test geo.timezone_at with the raster in front of TimezoneFinder."""
+
+    def test_interior_skips_finder(self, stripes, monkeypatch):
+        from src import geo
+        stripes.data_version = tzraster._data_version()
+        monkeypatch.setattr(tzraster, "_raster", stripes)
+        monkeypatch.setattr(tzraster, "_loaded", True)
+
+        class NoFinder:
+            def timezone_at(self, lat, lng):
+                raise AssertionError("polygon test not expected")
+
+        monkeypatch.setattr(geo, "_tf", NoFinder())
+        assert geo.timezone_at(50.0, 7.5) == "Stripe/6"
+
+    def test_border_uses_finder(self, stripes, monkeypatch):
+        from src import geo
+        monkeypatch.setattr(tzraster, "_raster", stripes)
+        monkeypatch.setattr(tzraster, "_loaded", True)
+        monkeypatch.setattr(geo, "_tf", StripesFinder())
+
+        assert geo.timezone_at(10.5, 10.5) == "Island/Zone"
+
+    def test_real_data(self):
+        """Coarse grid from the real TimezoneFinder data agrees with it."""
+        from timezonefinder import TimezoneFinder
+        finder = TimezoneFinder()
+        raster = build_raster(resolution=4, tf=finder)
+
+        assert raster.grid.count(BORDER) < len(raster.grid)
+        rng = random.Random(5)
+        for _ in range(500):
+            lat, lng = rng.uniform(-80, 80), rng.uniform(-180, 180)
+            zone = raster.zone_at(lat, lng)
+            if zone is not None:
+                assert zone == finder.timezone_at(lat=lat, lng=lng)
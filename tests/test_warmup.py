@@ -0,0 +1,134 @@
+"""Tests for warmup module - startup cache warm-up."""
+import asyncio
+
+import pytest
+
+from src import geocache, offsets, warmup
+
+BERLIN = {"city": "Berlin", "timezone": "Europe/Berlin", "flag": "🇩🇪"}
+
+
+@pytest.fixture
+async def db_storage(sqlite_storage, monkeypatch):
+    """Fresh SQLite storage with a few users, shared by warmup and geocache."""
+    storage = sqlite_storage
+    await storage.set_user(1, "telegram", "Berlin", "Europe/Berlin", "🇩🇪")
+    await storage.set_user(2, "telegram", "Atlantis", "Asia/Tokyo", "🇯🇵")
+    await storage.set_user(3, "telegram", "UTC+5:30", "Asia/Kolkata", "🌐")
+    monkeypatch.setattr(warmup, "storage", storage)
+    monkeypatch.setattr(geocache, "storage", storage)
+    monkeypatch.setattr(warmup, "_task", None)
+    geocache.clear_geocache()
+    offsets.clear_cache()
+    yield storage
+    geocache.clear_geocache()
+
+
+@pytest.fixture
+def fake_geo(monkeypatch):
+    """Record preload and city lookups instead of loading data / calling Nominatim."""
+    calls = {"preload": 0, "cities": []}
+
+    async def preload():
+        calls["preload"] += 1
+
+    async def lookup(city_name):
+        calls["cities"].append(city_name)
+        return BERLIN if city_name == "Berlin" else None
+
+    monkeypatch.setattr("src.geo.preload", preload)
+    monkeypatch.setattr("src.geo.get_timezone_by_city_async", lookup)
+    return calls
+
+
+def use_settings(monkeypatch, **settings):
+    monkeypatch.setattr(warmup, "get_warmup_settings", lambda: settings)
+
+
+class TestWarmUp:
+    """Test the warm-up steps."""
+
+    @pytest.mark.asyncio
+    async def test_warms_zones_and_cities(self, db_storage, fake_geo):
+        stats = await warmup.warm_up()
+
+        assert stats["zones"] == 3
+        assert stats["cities"] == 2
+        assert stats["resolved"] == 1
+        assert stats["seconds"] >= 0
+        assert warmup.get_warmup_stats() == stats
+
+        # Offset windows cached, offset-based "UTC+5:30" not geocoded
+        assert offsets.get_offset_stats()["size"] >= 3
+        assert sorted(fake_geo["cities"]) == ["Atlantis", "Berlin"]
+        assert fake_geo["preload"] == 1
+
+    @pytest.mark.asyncio
+    async def test_cities_land_in_geocache(self, db_storage, fake_geo):
+        await warmup.warm_up()
+        assert await geocache.get_timezone_by_city("Berlin") == BERLIN
+        assert fake_geo["cities"].count("Berlin") == 1
+
+    @pytest.mark.asyncio
+    async def test_top_cities_limit(self, db_storage, fake_geo, monkeypatch):
+        use_settings(monkeypatch, top_cities=0)
+        stats = await warmup.warm_up()
+        assert stats["cities"] == 0
+        assert fake_geo["cities"] == []
+
+    @pytest.mark.asyncio
+    async def test_failing_step_does_not_stop_others(self, db_storage, fake_geo, monkeypatch):
+        async def broken():
+            raise RuntimeError("no data")
+
+        monkeypatch.setattr("src.geo.preload", broken)
+        stats = await warmup.warm_up()
+        assert stats["zones"] == 3
+        assert stats["resolved"] == 1
+
+
+class TestStart:
+    """Test foreground/background modes."""
+
+    @pytest.mark.asyncio
+    async def test_background_returns_immediately(self, db_storage, fake_geo, monkeypatch):
+        use_settings(monkeypatch, background=True)
+        release = asyncio.Event()
+
+        async def slow_preload():
+            await release.wait()
+
+        monkeypatch.setattr("src.geo.preload", slow_preload)
+        await warmup.start()
+        assert warmup._task is not None and not warmup._task.done()
+
+        release.set()
+        stats = await warmup._task
+        assert stats["resolved"] == 1
+
+    @pytest.mark.asyncio
+    async def test_foreground_waits(self, db_storage, fake_geo, monkeypatch):
+        use_settings(monkeypatch, background=False)
+        await warmup.start()
+        assert warmup._task is None
+        assert fake_geo["preload"] == 1
+
+    @pytest.mark.asyncio
+    async def test_disabled(self, db_storage, fake_geo, monkeypatch):
+        use_settings(monkeypatch, enabled=False)
+        await warmup.start()
+        assert warmup._task is None
+        assert fake_geo["preload"] == 0
+
+    @pytest.mark.asyncio
+    async def test_cancel(self, db_storage, fake_geo, monkeypatch):
+        use_settings(monkeypatch, background=True)
+
+        async def never():
+            await asyncio.Event().wait()
+
+        monkeypatch.setattr("src.geo.preload", never)
+        await warmup.start()
+        warmup.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await warmup._task